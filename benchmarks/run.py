@@ -0,0 +1,178 @@
+"""
+Benchmarks of the submission pipeline on synthetic submission files (see synthetic.py)
+
+Every stage of the pipeline is timed on a synthetic file of each size, in the order the notebook runs them, and the
+results are written into a JSON file so that regressions can be tracked between commits. A previous result file can be
+given to compare against, and stages that became slower than the tolerance are reported.
+
+Examples (run from the project directory, since the data rules are loaded from there):
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10000 1000000 --repeat 3 --compare workingdir/benchmarks/<previous result>.json
+
+@date Oct 19, 2026
+"""
+from __future__ import annotations  # Delay the evaluation of undefined types
+import argparse
+from datetime import datetime
+import json
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from scripts.domain import InputDataDiagnosis, InputDataEntity, OutputDataEntity
+from .synthetic import write_synthetic_submission
+
+DEFAULT_SIZES = [10000, 1000000, 10000000]
+RESULTSDIR_PATH = Path("workingdir") / "benchmarks"
+REGRESSION_TOLERANCE = 1.2  # - a stage regressed if it became slower than this ratio of its previous median time
+REGRESSION_MIN_SECONDS = 0.01  # - ... and by more than this many seconds, since tiny timings are mostly noise
+STAGES = [
+    "InputDataEntity.create",
+    "InputDataDiagnosis.create",
+    "OutputDataEntity.create",
+    "OutputDataEntity.update_unknown_label_actions",
+    "OutputDataEntity.get_value_trends_table",
+    "OutputDataEntity.get_growth_trends_table",
+]
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """Run the pipeline benchmarks on a synthetic file of each size, and return the results"""
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": [],
+    }
+    with tempfile.TemporaryDirectory() as tempdir_name:
+        tempdir_path = Path(tempdir_name)
+        for nrows in sizes:
+            input_path = tempdir_path / "synthetic_{}.csv".format(nrows)
+            spec = write_synthetic_submission(input_path, nrows, seed)
+            times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+            for _ in range(repeat):
+                dst_dir_path = tempdir_path / "output_{}".format(nrows)
+                dst_dir_path.mkdir(exist_ok=True)
+                for stage, seconds in _run_pipeline(input_path, spec, dst_dir_path).items():
+                    times[stage].append(seconds)
+            for stage in STAGES:
+                results["benchmarks"].append(
+                    {
+                        "name": stage,
+                        "nrows": nrows,
+                        "times": times[stage],
+                        "min": min(times[stage]),
+                        "median": statistics.median(times[stage]),
+                    }
+                )
+            input_path.unlink()
+    return results
+
+
+def find_regressions(results: Dict[str, Any], previous_results: Dict[str, Any]) -> List[str]:
+    """Return descriptions of the benchmarks whose median time regressed since the previous results"""
+    previous_medians = {
+        (benchmark["name"], benchmark["nrows"]): benchmark["median"] for benchmark in previous_results["benchmarks"]
+    }
+    regressions = []
+    for benchmark in results["benchmarks"]:
+        previous_median = previous_medians.get((benchmark["name"], benchmark["nrows"]))
+        if (previous_median is None) or (previous_median <= 0):
+            continue
+        ratio = benchmark["median"] / previous_median
+        if (ratio > REGRESSION_TOLERANCE) and (benchmark["median"] - previous_median > REGRESSION_MIN_SECONDS):
+            regressions.append(
+                "{} ({} rows): {:.3f}s -> {:.3f}s ({:.2f}x)".format(
+                    benchmark["name"], benchmark["nrows"], previous_median, benchmark["median"], ratio
+                )
+            )
+    return regressions
+
+
+def _run_pipeline(input_path: Path, spec: Dict[str, Any], dst_dir_path: Path) -> Dict[str, float]:
+    """Run every stage of the pipeline on the input file, and return the time taken by each stage in seconds"""
+    times: Dict[str, float] = {}
+
+    def timed(stage: str, func: Callable[[], Any]) -> Any:
+        start_time = time.perf_counter()
+        result = func()
+        times[stage] = time.perf_counter() - start_time
+        return result
+
+    input_entity: InputDataEntity = timed("InputDataEntity.create", lambda: _create_input_entity(input_path, spec))
+    diagnosis: InputDataDiagnosis = timed(
+        "InputDataDiagnosis.create", lambda: InputDataDiagnosis.create(input_entity, dst_dir_path)
+    )
+    output_entity: OutputDataEntity = timed(
+        "OutputDataEntity.create", lambda: OutputDataEntity.create(input_entity, diagnosis, dst_dir_path)
+    )
+    # Fix every unknown label with its closest match, like a user accepting every suggestion
+    for label_info in diagnosis.unknown_labels:
+        label_info.fix = label_info.closest_match
+    timed(
+        "OutputDataEntity.update_unknown_label_actions",
+        lambda: output_entity.update_unknown_label_actions(diagnosis.unknown_labels),
+    )
+    # Slice the charts by the most frequent scenario, region, and variable
+    processed_data = output_entity.processed_data
+    chart_slice = [
+        str(processed_data[colname].mode().iloc[0]) if processed_data.shape[0] > 0 else ""
+        for colname in [output_entity.SCENARIO_COLNAME, output_entity.REGION_COLNAME, output_entity.VARIABLE_COLNAME]
+    ]
+    timed("OutputDataEntity.get_value_trends_table", lambda: output_entity.get_value_trends_table(*chart_slice))
+    timed("OutputDataEntity.get_growth_trends_table", lambda: output_entity.get_growth_trends_table(*chart_slice))
+    return times
+
+
+def _create_input_entity(input_path: Path, spec: Dict[str, Any]) -> InputDataEntity:
+    input_entity = InputDataEntity.create(input_path)
+    input_entity.apply_spec(spec)
+    return input_entity
+
+
+def _get_commit() -> str:
+    """Return the hash of the checked-out commit, or an empty string if it is unknown"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and write their results, and return 1 if some benchmarks regressed, else 0"""
+    parser = argparse.ArgumentParser(description="Benchmark the submission pipeline on synthetic submission files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of rows to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of times to run the pipeline per size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic file generator")
+    parser.add_argument("--output", type=Path, default=None, help="Result file (default: a new file in workingdir)")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous result file to check for regressions")
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.sizes, max(args.repeat, 1), args.seed)
+    output_path: Path = args.output
+    if output_path is None:
+        output_path = RESULTSDIR_PATH / "{}.json".format(datetime.now().strftime("%Y%m%d_%H%M%S"))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(output_path), "w", encoding="utf-8") as resultfile:
+        json.dump(results, resultfile, indent=2)
+    for benchmark in results["benchmarks"]:
+        print("{:<48} {:>10} rows {:>10.3f}s".format(benchmark["name"], benchmark["nrows"], benchmark["median"]))
+    print("Results were written into {}".format(output_path))
+    if args.compare is None:
+        return 0
+    with open(str(args.compare), "r", encoding="utf-8") as previousfile:
+        regressions = find_regressions(results, json.load(previousfile))
+    for regression in regressions:
+        print("Regression: " + regression)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Generator of synthetic submission files for the benchmarks
+
+The labels of a synthetic file are drawn from the data rules in DataRuleRepository, and configurable rates of rows are
+corrupted with the issues that the submission pipeline looks for (bad labels, unknown labels, duplicate records,
+structural issues, and out-of-range values, including ones that are only found once an unknown variable is fixed).
+@date Oct 19, 2026
+"""
+from __future__ import annotations  # Delay the evaluation of undefined types
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from scripts.domain import DataRuleRepository
+
+HEADER = "Model,Scenario,Region,Variable,Item,Unit,Year,Value"
+# Spec of the synthetic files (see InputDataEntity.apply_spec())
+SPEC: Dict[str, Any] = {
+    "delimiter": ",",
+    "initial_lines_to_skip": 0,
+    "header_is_included": True,
+    "scenarios_to_ignore": [],
+    "scenario_colnum": 2,
+    "region_colnum": 3,
+    "variable_colnum": 4,
+    "item_colnum": 5,
+    "unit_colnum": 6,
+    "year_colnum": 7,
+    "value_colnum": 8,
+}
+YEARS = [str(year) for year in range(2010, 2101, 10)]
+_NUNKNOWN_LABELS = 20  # - number of distinct unknown items, since the pipeline reports every distinct unknown label
+_CHUNK_NROWS = 1000000  # - number of rows generated and written at a time
+
+
+def write_synthetic_submission(
+    file_path: Path,
+    nrows: int,
+    seed: int = 0,
+    bad_label_rate: float = 0.01,
+    unknown_label_rate: float = 0.01,
+    duplicate_rate: float = 0.01,
+    struct_issue_rate: float = 0.01,
+    out_of_range_rate: float = 0.01,
+    unknown_variable_rate: float = 0.01,
+) -> Dict[str, Any]:
+    """
+    Write a synthetic submission file with the given number of data rows and a header row
+    Return the spec of the file (see InputDataEntity.apply_spec())
+
+    Every rate is the probability of a row being corrupted with the issue, so the actual number of corrupted rows
+    varies slightly. A bad label is a region in the wrong case, an unknown label is an unknown item, and a structural
+    issue is a non-integer year. An out-of-range value is greater than the maximum value of its variable and unit.
+    An unknown variable is a misspelled variable with a value range, and half of its rows have out-of-range values. Their
+    values are only range-checked once the variable is fixed (see OutputDataEntity.update_unknown_label_actions()).
+    """
+    rng = np.random.default_rng(seed)
+    model_name = DataRuleRepository.query_model_names()[0]
+    scenarios = np.array(DataRuleRepository.query_scenarios())
+    regions = np.array(DataRuleRepository.query_regions())
+    items = np.array(DataRuleRepository.query_items())
+    variables, units, minvalues, maxvalues = _get_variable_unit_ranges()
+    bounded_indexes = np.flatnonzero(np.isfinite(maxvalues))
+    with open(str(file_path), "w", encoding="utf-8", newline="") as file:
+        file.write(HEADER + "\n")
+        for chunk_start in range(0, nrows, _CHUNK_NROWS):
+            chunk_nrows = min(_CHUNK_NROWS, nrows - chunk_start)
+            # Draw valid rows
+            region_column = regions[rng.integers(len(regions), size=chunk_nrows)].astype(object)
+            item_column = items[rng.integers(len(items), size=chunk_nrows)].astype(object)
+            year_column = np.array(YEARS, dtype=object)[rng.integers(len(YEARS), size=chunk_nrows)]
+            range_indexes = rng.integers(len(variables), size=chunk_nrows)
+            lower_bounds = np.where(np.isfinite(minvalues), minvalues, 0.0)[range_indexes]
+            upper_bounds = np.where(np.isfinite(maxvalues), maxvalues, 1000.0)[range_indexes]
+            upper_bounds = np.maximum(upper_bounds, lower_bounds)
+            values = lower_bounds + rng.random(chunk_nrows) * (upper_bounds - lower_bounds)
+            # Corrupt rows
+            mask = rng.random(chunk_nrows) < bad_label_rate
+            region_column[mask] = [region.lower() for region in region_column[mask]]
+            mask = rng.random(chunk_nrows) < unknown_label_rate
+            item_column[mask] = [
+                "UnknownItem{}".format(index) for index in rng.integers(_NUNKNOWN_LABELS, size=int(mask.sum()))
+            ]
+            mask = rng.random(chunk_nrows) < struct_issue_rate
+            year_column[mask] = "20X0"
+            if len(bounded_indexes) > 0:
+                mask = rng.random(chunk_nrows) < out_of_range_rate
+                range_indexes[mask] = bounded_indexes[rng.integers(len(bounded_indexes), size=int(mask.sum()))]
+                values[mask] = maxvalues[range_indexes[mask]] + 1
+            variable_column = variables[range_indexes].astype(object)
+            if len(bounded_indexes) > 0:
+                mask = rng.random(chunk_nrows) < unknown_variable_rate
+                range_indexes[mask] = bounded_indexes[rng.integers(len(bounded_indexes), size=int(mask.sum()))]
+                variable_column[mask] = [variable + "X" for variable in variables[range_indexes[mask]]]
+                values[mask] = np.where(
+                    rng.random(int(mask.sum())) < 0.5,
+                    maxvalues[range_indexes[mask]] + 1,
+                    np.where(np.isfinite(minvalues), minvalues, maxvalues)[range_indexes[mask]],
+                )
+            lines = [
+                ",".join(fields)
+                for fields in zip(
+                    [model_name] * chunk_nrows,
+                    scenarios[rng.integers(len(scenarios), size=chunk_nrows)],
+                    region_column,
+                    variable_column,
+                    item_column,
+                    units[range_indexes],
+                    year_column,
+                    np.round(values, 4).astype(str),
+                )
+            ]
+            # Duplicate the previous rows of random rows
+            for index in np.flatnonzero(rng.random(chunk_nrows) < duplicate_rate):
+                if index > 0:
+                    lines[index] = lines[index - 1]
+            file.write("\n".join(lines) + "\n")
+    return dict(SPEC, model_name=model_name)
+
+
+def _get_variable_unit_ranges() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the variables, units, and minimum and maximum values of the valid variable and unit pairs
+    Pairs without a range get infinite minimum and maximum values
+    """
+    pairs: List[Tuple[str, str, float, float]] = []
+    units = DataRuleRepository.query_units()
+    for variable in DataRuleRepository.query_variables():
+        for unit in units:
+            minvalue = DataRuleRepository.query_variable_min_value(variable, unit)
+            maxvalue = DataRuleRepository.query_variable_max_value(variable, unit)
+            if (not math.isinf(minvalue)) or (not math.isinf(maxvalue)):
+                pairs.append((variable, unit, minvalue, maxvalue))
+    if len(pairs) == 0:
+        pairs = [(variable, units[0], -math.inf, math.inf) for variable in DataRuleRepository.query_variables()]
+    return (
+        np.array([pair[0] for pair in pairs]),
+        np.array([pair[1] for pair in pairs]),
+        np.array([pair[2] for pair in pairs], dtype=float),
+        np.array([pair[3] for pair in pairs], dtype=float),
+    )
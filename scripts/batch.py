@@ -0,0 +1,182 @@
+"""
+Command-line entry point to diagnose and process submission files without the notebook
+
+Every input file goes through the same pipeline as in the notebook (InputDataEntity -> InputDataDiagnosis -> 
+OutputDataEntity). Its category files (rows with structural issue, duplicate records, etc), its processed data, and a 
+summary.json are written into its own directory under the output directory. Unknown labels cannot be fixed or 
+overridden here, so records that contain them are dropped from the processed data.
+
+The input format and column assignments are read from a spec file, which is either a JSON file or an option file 
+(.opt) of the legacy submission processing script (see InputDataEntity.read_spec_file()). Anything that the spec does 
+not specify is guessed like in the notebook.
+
+Examples (run from the project directory, since the data rules are loaded from there):
+    python -m scripts.batch resources/submissions/*.opt
+    python -m scripts.batch uploads/*.csv --spec AIM.json --workers 8 --output-dir workingdir/batch
+
+@date Oct 19, 2026
+"""
+from __future__ import annotations  # Delay the evaluation of undefined types
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .domain import InputDataDiagnosis, InputDataEntity, OutputDataEntity
+from .utils import Delimiter
+
+EXIT_OK = 0  # - every file was processed, and none of their rows were rejected
+EXIT_REJECTED_ROWS = 1  # - every file was processed, but some rows were rejected
+EXIT_ERROR = 2  # - some files could not be processed
+
+SUMMARY_FILE_NAME = "summary.json"
+
+
+def process_file(input_path: Path, spec: Dict[str, Any], dst_dir_path: Path) -> Dict[str, Any]:
+    """
+    Diagnose and process an input file with the given spec, and write the results into the destination directory
+    Return the summary of the results, which is also written into the directory
+    """
+    summary: Dict[str, Any] = {"file": str(input_path), "exit_code": EXIT_ERROR}
+    try:
+        dst_dir_path.mkdir(parents=True, exist_ok=True)
+        # The input directory may be read-only or shared, so a UTF-8 copy of the input file is written with the results
+        input_entity = InputDataEntity.create(input_path, dst_dir_path)
+        _apply_spec_or_guess(input_entity, spec)
+        diagnosis = InputDataDiagnosis.create(input_entity, dst_dir_path)
+        diagnosis.write_struct_issue_report()
+        output_entity = OutputDataEntity.create(input_entity, diagnosis, dst_dir_path)
+        output_entity.save_parquet_file()
+        summary.update(
+            model_name=input_entity.model_name,
+            output_file=str(output_entity.file_path),
+            nrows_accepted=diagnosis.nrows_accepted,
+            nrows_w_struct_issue=diagnosis.nrows_w_struct_issue,
+            nrows_w_ignored_scenario=diagnosis.nrows_w_ignored_scenario,
+            nrows_duplicate=diagnosis.nrows_duplicate,
+            nrows_processed=int(output_entity.processed_data.shape[0]),
+            struct_issues=[
+                {
+                    "issue": issue_info.code.value,
+                    "variable": issue_info.variable,
+                    "nrows": issue_info.nrows,
+                    "example_rownums": issue_info.example_rownums,
+                }
+                for issue_info in diagnosis.struct_issues.values()
+            ],
+            bad_labels=[vars(label_info) for label_info in diagnosis.bad_labels],
+            unknown_labels=[vars(label_info) for label_info in diagnosis.unknown_labels],
+        )
+        has_rejected_rows = (
+            (diagnosis.nrows_w_struct_issue > 0)
+            or (diagnosis.nrows_duplicate > 0)
+            or (summary["nrows_processed"] < diagnosis.nrows_accepted)
+        )
+        summary["exit_code"] = EXIT_REJECTED_ROWS if has_rejected_rows else EXIT_OK
+    except Exception as e:
+        summary["error"] = str(e)
+        if not dst_dir_path.is_dir():  # The summary cannot be written either
+            return summary
+    finally:
+        # Remove the UTF-8 copy of the input file, if it was transcoded
+        transcoded_file_path = InputDataEntity.get_transcoded_file_path(input_path, dst_dir_path)
+        if transcoded_file_path.is_file():
+            transcoded_file_path.unlink()
+    with open(str(dst_dir_path / SUMMARY_FILE_NAME), "w", encoding="utf-8") as summaryfile:
+        json.dump(summary, summaryfile, indent=2)
+    return summary
+
+
+def _apply_spec_or_guess(input_entity: InputDataEntity, spec: Dict[str, Any]) -> None:
+    """Apply the given spec to the input entity, guess what the spec does not specify, and validate the result"""
+    input_entity.apply_spec_n_guess_the_rest(spec, Delimiter.get_models())
+    if len(input_entity.model_name) == 0:
+        raise Exception("Model name is not specified")
+    colnums = input_entity.assigned_colnums
+    if (min(colnums) < 1) or (len(set(colnums)) < len(colnums)):
+        raise Exception("Column assignments are incomplete or have duplicate columns")
+
+
+def _process_job(job: Tuple[Path, Dict[str, Any], Path]) -> Dict[str, Any]:
+    """Process a job in a worker process (see process_file())"""
+    return process_file(*job)
+
+
+def _create_job(
+    input_path: Path, spec_path: Optional[Path], output_dir_path: Path, dst_dir_names: Set[str]
+) -> Tuple[Path, Dict[str, Any], Path]:
+    """
+    Return the input file path, spec, and destination directory path of a job
+    The input is either an input file (processed with the given spec file) or a spec file that names its input file
+    """
+    if input_path.suffix.lower() in InputDataEntity.SPEC_FILE_SUFFIXES:
+        spec = InputDataEntity.read_spec_file(input_path)
+        if "file_name" not in spec:
+            raise Exception("Spec file does not name its input file")
+        # Input files are looked up next to their spec files
+        input_path = input_path.parent / spec["file_name"]
+    else:
+        spec = InputDataEntity.read_spec_file(spec_path) if spec_path is not None else {}
+    if not input_path.is_file():
+        raise Exception("Input file does not exist: {}".format(input_path))
+    dst_dir_name = input_path.name
+    while dst_dir_name in dst_dir_names:  # Input files from different directories may have the same name
+        dst_dir_name += "_"
+    dst_dir_names.add(dst_dir_name)
+    return input_path, spec, output_dir_path / dst_dir_name
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command-line entry point and return its exit code"""
+    parser = argparse.ArgumentParser(description="Diagnose and process AgMIP submission files without the notebook")
+    parser.add_argument(
+        "inputs", nargs="+", type=Path, help="input files, or spec files (.json / .opt) that name their input files"
+    )
+    parser.add_argument("--spec", type=Path, help="spec file (.json / .opt) for the input files")
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path("workingdir") / "batch", help="directory to write the results into"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    args = parser.parse_args(argv)
+    exit_code = EXIT_OK
+    jobs: List[Tuple[Path, Dict[str, Any], Path]] = []
+    dst_dir_names: Set[str] = set()
+    for input_path in args.inputs:
+        try:
+            jobs.append(_create_job(input_path, args.spec, args.output_dir, dst_dir_names))
+        except Exception as e:
+            print("ERROR\t{}\t{}".format(input_path, e), file=sys.stderr)
+            exit_code = EXIT_ERROR
+    if len(jobs) == 0:
+        return exit_code
+    try:
+        with ProcessPoolExecutor(max_workers=max(min(args.workers, len(jobs)), 1)) as executor:
+            for summary in executor.map(_process_job, jobs):
+                exit_code = max(exit_code, summary["exit_code"])
+                if summary["exit_code"] == EXIT_ERROR:
+                    print("ERROR\t{}\t{}".format(summary["file"], summary["error"]), file=sys.stderr)
+                    continue
+                print(
+                    "{}\t{}\t{:,} accepted, {:,} processed, {:,} with structural issue, {:,} with ignored scenario, "
+                    "{:,} duplicate".format(
+                        "OK" if summary["exit_code"] == EXIT_OK else "REJECTED ROWS",
+                        summary["file"],
+                        summary["nrows_accepted"],
+                        summary["nrows_processed"],
+                        summary["nrows_w_struct_issue"],
+                        summary["nrows_w_ignored_scenario"],
+                        summary["nrows_duplicate"],
+                    )
+                )
+    except Exception as e:
+        # A worker process crashed (e.g. it was killed for running out of memory), so the remaining files are lost
+        print("ERROR\t{}\t{}".format("worker process", repr(e)), file=sys.stderr)
+        return EXIT_ERROR
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,31 @@
 from __future__ import annotations  # Delay the evaluation of undefined types
+import functools
 from pathlib import Path
 import shutil
+from typing import Any, Callable
 
 import ipywidgets as ui
 
+from .instrumentation import profiled
 from .utils import ApplicationMode, VisualizationTab
 from .utils import UserPage
 from .utils import Notification
 from .utils import CSS, Delimiter
 
 
+def profiled_page_transition(callback: Callable) -> Callable:
+    """Decorate a page transition callback of Controller to be profiled when profiling is enabled (see Model)"""
+
+    @functools.wraps(callback)
+    def wrapper(self: Controller, *args: Any) -> Any:
+        if not self.model.profiling_is_enabled:
+            return callback(self, *args)
+        with profiled(callback.__name__, self.model.PROFILINGDIR_PATH):
+            return callback(self, *args)
+
+    return wrapper
+
+
 class Controller:
     def __init__(self):
         # Import MVC classes here to prevent circular import problem
@@ -43,6 +59,7 @@ class Controller:
         if self.model.is_user_an_admin:
             self.model.application_mode = ApplicationMode.ADMIN
             self.view.modify_cursor_style(CSS.CURSOR_MOD__WAIT)
+            self.model.init_admin_page_states()
             self.view.update_base_app()
             self.view.modify_cursor_style(None)
         else: 
@@ -55,16 +72,72 @@ class Controller:
         self.view.update_base_app()
         self.view.modify_cursor_style(None)
 
+    # Admin page callbacks
+
+    def onchange_submissions_name_filter(self, change: dict) -> None:
+        """The file name filter of the submissions table was changed"""
+        self.model.submissions_name_filter = change["new"]
+        self.model.submissions_page = 0
+        self.view.update_admin_page()
+
+    def onchange_submissions_project_filter(self, change: dict) -> None:
+        """The project filter of the submissions table was changed"""
+        self.model.submissions_project_filter = change["new"] if change["new"] is not None else ""
+        self.model.submissions_page = 0
+        self.view.update_admin_page()
+
+    def onchange_submissions_status_filter(self, change: dict) -> None:
+        """The status filter of the submissions table was changed"""
+        self.model.submissions_status_filter = change["new"] if change["new"] is not None else ""
+        self.model.submissions_page = 0
+        self.view.update_admin_page()
+
+    def onchange_submissions_sort_key(self, change: dict) -> None:
+        """The sort key of the submissions table was changed"""
+        self.model.submissions_sort_key = change["new"]
+        self.model.submissions_page = 0
+        self.view.update_admin_page()
+
+    def onchange_submissions_sort_order(self, change: dict) -> None:
+        """The sort order of the submissions table was changed"""
+        self.model.submissions_sort_ascending = change["new"]
+        self.model.submissions_page = 0
+        self.view.update_admin_page()
+
+    def onclick_previous_submissions_page(self, widget: ui.Button) -> None:
+        """The previous page button of the submissions table was clicked"""
+        self.model.submissions_page = max(0, self.model.submissions_page - 1)
+        self.view.update_admin_page()
+
+    def onclick_next_submissions_page(self, widget: ui.Button) -> None:
+        """The next page button of the submissions table was clicked"""
+        self.model.submissions_page = min(self.model.nsubmissions_pages - 1, self.model.submissions_page + 1)
+        self.view.update_admin_page()
+
+    def onchange_profiling_checkbox(self, change: dict) -> None:
+        """The checkbox to profile page transitions in this session was changed"""
+        self.model.profiling_is_enabled = change["new"]
+        self.model.init_profiling_reports_states()
+        self.view.update_admin_page()
+
     # File upload page callbacks
 
     def onchange_ua_file_label(self, change: dict) -> None:
         """Value of the hidden file label in upload area (ua) changed"""
-        CSV = ".csv"
+        SUPPORTED_FILE_SUFFIXES = (".csv", ".csv.gz", ".zip")  # - CSV files, which may be compressed
         file_name: str = change["new"]
         if len(file_name) == 0:  # This change was triggered by View's internal operation, not by a user aciton
             return
+        if self.model.is_chunked_upload(file_name):
+            # The label holds the ID of a chunked upload, whose chunks have to be assembled into the uploaded file
+            error_message = self.model.assemble_uploaded_chunks(file_name)
+            if error_message is not None:
+                self.view.show_notification(Notification.ERROR, error_message)
+                self.view.update_file_upload_page()  # Resets the label, so that the upload can be resumed
+                return
+            file_name = self.model.uploadedfile_name
         self.model.uploadedfile_name = file_name
-        if file_name.endswith(CSV):
+        if file_name.endswith(SUPPORTED_FILE_SUFFIXES):
             self.view.show_notification(Notification.SUCCESS, Notification.FILE_UPLOAD_SUCCESS)
             self.view.update_file_upload_page()
         else:
@@ -86,6 +159,7 @@ class Controller:
         self.model.associated_project_dirnames = list(change["new"])
         self._reset_later_pages()
 
+    @profiled_page_transition
     def onclick_next_from_upage_1(self, widget: ui.Button) -> None:
         """'Next' button on the file upload page was clicked"""
         if len(self.model.uploadedfile_name) == 0:
@@ -102,6 +176,10 @@ class Controller:
             self.view.update_data_specification_page()
             if error_message is not None:
                 self.view.show_notification(Notification.ERROR, error_message)
+            elif len(self.model.imported_spec_name) > 0:
+                self.view.show_notification(
+                    Notification.INFO, Notification.FIELDS_WERE_IMPORTED.format(self.model.imported_spec_name)
+                )
             else:
                 self.view.show_notification(Notification.INFO, Notification.FIELDS_WERE_PREPOPULATED)
         self.view.update_base_app()
@@ -264,6 +342,7 @@ class Controller:
         self.model.current_user_page = UserPage.FILE_UPLOAD
         self.view.update_base_app()
     
+    @profiled_page_transition
     def onclick_next_from_upage_2(self, widget: ui.Button) -> None:
         """'Next' button on the data specification page was clicked"""
         warning_message = self.model.validate_data_specification_input()
@@ -299,12 +378,23 @@ class Controller:
             return
         self.model.unknown_labels_overview_tbl[row_index][CHECKBOX_INDEX] = new_value
         self._reset_later_pages()
+
+    def onclick_download_rows_w_struct_issue(self, widget: ui.Button) -> None:
+        """Download button for the rows with structural issue was clicked"""
+        self.view.modify_cursor_style(CSS.CURSOR_MOD__WAIT)
+        error_message = self.model.prepare_struct_issue_file()
+        self.view.modify_cursor_style(None)
+        if error_message is not None:
+            self.view.show_notification(Notification.ERROR, error_message)
+            return
+        self.view.download_file(self.model.STRUCTISSUEFILE_PATH)
     
     def onclick_previous_from_upage_3(self, widget: ui.Button) -> None:
         """'Previous' button on the data specification page was clicked"""
         self.model.current_user_page = UserPage.DATA_SPECIFICATION
         self.view.update_base_app()
 
+    @profiled_page_transition
     def onclick_next_from_upage_3(self, widget: ui.Button) -> None:
         """'Next' button on the data specification page was clicked"""
         warning_message = self.model.validate_unknown_labels_table(self.model.unknown_labels_overview_tbl)
@@ -408,12 +498,15 @@ class Controller:
         self.model.current_user_page = UserPage.INTEGRITY_CHECKING
         self.view.update_base_app()
 
+    @profiled_page_transition
     def onclick_submit(self, widget: ui.Button) -> None:
         """The 'submit' button in the last page was clicked"""
         self.view.modify_cursor_style(CSS.CURSOR_MOD__PROGRESS)
-        self.model.submit_processed_file()
+        error_message = self.model.submit_processed_file()
         self.view.modify_cursor_style(None)
         self.view.show_notification(Notification.SUCCESS, "Your file has been successfully submitted")
+        if error_message is not None:
+            self.view.show_notification(Notification.WARNING, error_message)
         if self.model.overridden_labels > 0:
             self.view.show_modal_dialog(
                 "Pending Submission Approval",
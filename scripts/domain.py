@@ -1,26 +1,53 @@
 from __future__ import annotations  # Delay the evaluation of types
-from contextlib import redirect_stderr
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stderr
 from copy import copy
 from copy import deepcopy
+import codecs
 import csv
 from datetime import datetime
 import difflib
+from enum import Enum
+import gzip
+import hashlib
 import io
 from io import TextIOWrapper
+from itertools import islice
+import json
 import math
 import numpy as np
 import os
 import pandas as pd
 from pandas import DataFrame
 from pathlib import Path
-from typing import Callable, Optional, List, Dict, Set, Union, Tuple
+import re
+import shutil
+import urllib.parse
+import uuid
+import zipfile
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, List, Dict, Set, TextIO, Union, Tuple
 
 from pandas.core.groupby.generic import DataFrameGroupBy
 
+from .instrumentation import instrumented
+
 
 WORKINGDIR_PATH: Path = Path(__name__).parent.parent / "workingdir"  # <PROJECT_DIR>/workingdir
 DOWNLOADDIR_PATH: Path = WORKINGDIR_PATH / "downloads"
 
+# pyarrow is an optional dependency, which is only needed to store processed data in the Parquet format
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_IS_SUPPORTED = True
+except ImportError:
+    PARQUET_IS_SUPPORTED = False
+
+try:
+    import fcntl
+except ImportError:  # - not available on Windows
+    fcntl = None  # type: ignore
+
 
 class BadLabelInfo:
     """
@@ -89,6 +116,316 @@ class UnknownLabelInfo:
         return f"{self.label},{self.associated_column},{self.closest_match},{self.fix},{self.override}"
 
 
+class StructIssueCode(Enum):
+    """Enum for the structural issues that a row can have, valued by their descriptions"""
+
+    MISMATCHED_NCOLUMNS = "Mismatched number of fields"
+    EMPTY_SCENARIO = "Empty scenario field"
+    EMPTY_REGION = "Empty region field"
+    EMPTY_VARIABLE = "Empty variable field"
+    EMPTY_ITEM = "Empty item field"
+    EMPTY_UNIT = "Empty unit field"
+    EMPTY_YEAR = "Empty year field"
+    NON_INTEGER_YEAR = "Non-integer year field"
+    NON_NUMERIC_VALUE = "Non-numeric value field"
+    VALUE_BELOW_MINIMUM = "Value smaller than the minimum"
+    VALUE_ABOVE_MAXIMUM = "Value greater than the maximum"
+
+
+class StructIssueInfo:
+    """
+    A value model to store aggregated information about rows with the same structural issue
+    Issues with the value range are aggregated per variable, the other issues are aggregated per issue code only
+    @date Oct 19, 2026
+    """
+
+    NEXAMPLES = 5  # - maximum number of example row numbers kept per issue
+
+    def __init__(self, code: StructIssueCode, variable: str = "") -> None:
+        self.code = code
+        self.variable = variable  # - variable of the rows (only for issues with the value range)
+        self.nrows = 0
+        self.example_rownums: List[int] = []  # - numbers of the first rows with the issue
+
+
+class CSVTokenizer:
+    """
+    A quote-aware tokenizer that splits lines of delimited text into fields
+    Every parsing stage (format guessing, input data preview, and diagnosis) should tokenize through this class so 
+    that they agree on the fields of a row.
+
+    Tokenization is done by the C-implemented csv module, so a quoted field may contain the delimiter. The surrounding
+    quotes and whitespaces of each field are stripped once here, instead of in each stage that reads the field.
+    If column indexes to use are given, the rows yielded by tokenize_w_lines() only hold the fields of those columns, so
+    that unused columns (e.g. notes or long descriptions) are never stripped, copied or stored.
+    @date Oct 19, 2026
+    """
+
+    _STRIPPED_CHARS = "'\"` "  # - characters stripped from both ends of every field
+
+    def __init__(self, delimiter: str, quoting: int = csv.QUOTE_MINIMAL, usecols: Optional[List[int]] = None) -> None:
+        self.delimiter = delimiter
+        self.quoting = quoting  # - QUOTE_MINIMAL to parse quoted fields, QUOTE_NONE to keep quote characters as is
+        self.usecols = usecols  # - (0-based) indexes of the columns to keep, in the order they should be kept
+
+    def tokenize(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        """Yield all the fields of each row in the given lines (which may or may not end with line terminators)"""
+        stripped_chars = self._STRIPPED_CHARS
+        for fields in self._read(lines):
+            yield [field.strip(stripped_chars) for field in fields]
+
+    def count_fields(self, lines: Iterable[str]) -> Iterator[int]:
+        """Yield the number of fields of each row in the given lines"""
+        for fields in self._read(lines):
+            yield len(fields)
+
+    def tokenize_w_lines(self, lines: Iterable[str]) -> Iterator[Tuple[int, str, int, List[str]]]:
+        """
+        Yield the (1-based) number of the first line of each row in the given lines, the text of the row (without its
+        line terminator), the number of fields of the row, and the fields of the used columns (all fields if no column
+        to use was given). The fields are empty if the row is too short to have all the used columns.
+        NOTE: A row spans multiple lines if a quoted field contains a line break
+        """
+        consumed_lines: List[str] = []
+
+        def consume(lines: Iterable[str]) -> Iterator[str]:
+            for line in lines:
+                consumed_lines.append(line)
+                yield line
+
+        stripped_chars = self._STRIPPED_CHARS
+        usecols = self.usecols
+        min_ncolumns = max(usecols) + 1 if usecols else 0
+        rownum = 1
+        for fields in self._read(consume(lines)):
+            text = "".join(consumed_lines).rstrip("\r\n")
+            ncolumns = len(fields)
+            if usecols is None:
+                used_fields = [field.strip(stripped_chars) for field in fields]
+            elif ncolumns >= min_ncolumns:
+                used_fields = [fields[colidx].strip(stripped_chars) for colidx in usecols]
+            else:
+                used_fields = []
+            yield rownum, text, ncolumns, used_fields
+            rownum += len(consumed_lines)
+            consumed_lines.clear()
+
+    def _read(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        """Yield the unstripped fields of each row in the given lines"""
+        if self.delimiter == "":  # No delimiter was specified, so every line is a single field
+            for line in lines:
+                yield [line.rstrip("\r\n")]
+            return
+        for fields in csv.reader(lines, delimiter=self.delimiter, quotechar='"', quoting=self.quoting):
+            # An empty line is a row with an empty field (like what str.split() returns)
+            yield fields if len(fields) > 0 else [""]
+
+
+class StructIssueWriter:
+    """
+    A buffered writer for rows with structural issues
+
+    Instead of writing a padded CSV line for every bad row during the diagnosis, each row is buffered as a compact 
+    record of integers (row number, number of lines spanned by the row, and index of the issue description) which are
+    written into a binary spill file in large blocks. The padded CSV report is only rendered from these records (by
+    re-reading the rows from the input file) when it is requested.
+    @date Oct 19, 2026
+    """
+
+    _NRECORDS_IN_BLOCK = 64 * 1024
+    _RECORD_SIZE = 3  # - number of integers in a record
+
+    def __init__(self, spill_file_path: Path) -> None:
+        self.spill_file_path = spill_file_path
+        self.issue_descriptions: List[str] = []  # - distinct issue descriptions, referred to by index in the records
+        self.nrecords = 0
+        self._issue_description_indexes: Dict[str, int] = {}
+        self._buffer = array("q")
+        self._spill_file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> StructIssueWriter:
+        self._spill_file = open(str(self.spill_file_path), "wb")
+        return self
+
+    def __exit__(self, *args) -> None:
+        assert self._spill_file is not None
+        self._flush()
+        self._spill_file.close()
+        self._spill_file = None
+
+    def write(self, rownum: int, nlines: int, issue_description: str) -> None:
+        """Buffer a record of a row with structural issue (rows must be written in ascending order)"""
+        issue_index = self._issue_description_indexes.get(issue_description)
+        if issue_index is None:
+            issue_index = len(self.issue_descriptions)
+            self._issue_description_indexes[issue_description] = issue_index
+            self.issue_descriptions.append(issue_description)
+        self._buffer.extend((rownum, nlines, issue_index))
+        self.nrecords += 1
+        if len(self._buffer) >= self._NRECORDS_IN_BLOCK * self._RECORD_SIZE:
+            self._flush()
+
+    def iter_records(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield the row number, number of lines, and issue description of every written record"""
+        with open(str(self.spill_file_path), "rb") as spillfile:
+            while True:
+                block = array("q")
+                block.frombytes(spillfile.read(self._NRECORDS_IN_BLOCK * self._RECORD_SIZE * block.itemsize))
+                if len(block) == 0:
+                    return
+                for index in range(0, len(block), self._RECORD_SIZE):
+                    yield block[index], block[index + 1], self.issue_descriptions[block[index + 2]]
+
+    def render(self, lines: Iterable[str], tokenizer: CSVTokenizer, ncolumns: int, dst_path: Path) -> None:
+        """
+        Render the padded CSV report of the written records into the destination file
+        Every line of the report has the row number, the fields of the row (padded with empty fields), and the issue 
+        description as its last field, i.e. exactly the given number of columns
+        """
+        records = self.iter_records()
+        record = next(records, None)
+        row_lines: List[str] = []
+        log_rows: List[List[str]] = []
+        with open(str(dst_path), "w", encoding="utf-8", newline="") as dstfile:
+            # Fields that contain a comma or a quote are quoted, so that every line keeps exactly ncolumns fields
+            dstfile_writer = csv.writer(dstfile, lineterminator="\n")
+            for linenum, line in enumerate(lines, 1):
+                if record is None:
+                    break
+                rownum, nlines, issue_description = record
+                if linenum < rownum:
+                    continue
+                row_lines.append(line)
+                if linenum < rownum + nlines - 1:
+                    continue
+                row = next(tokenizer.tokenize(row_lines), [""])
+                log_row = [str(rownum), *row[: ncolumns - 2]]
+                log_row.extend("" for _ in range(ncolumns - 1 - len(log_row)))
+                log_row.append(issue_description)
+                log_rows.append(log_row)
+                if len(log_rows) >= self._NRECORDS_IN_BLOCK:
+                    dstfile_writer.writerows(log_rows)
+                    log_rows.clear()
+                row_lines.clear()
+                record = next(records, None)
+            dstfile_writer.writerows(log_rows)
+
+    def _flush(self) -> None:
+        """Write the buffered records into the spill file"""
+        assert self._spill_file is not None
+        self._buffer.tofile(self._spill_file)
+        self._buffer = array("q")
+
+
+class ChunkedUpload:
+    """
+    A domain entity that represents a file uploaded from the browser in chunks (see script.html)
+
+    Each chunk is uploaded as a separate file, named "<chunk index>.part", into the upload's chunk directory. Chunks are
+    uploaded concurrently, and after each confirmed chunk the browser rewrites a small manifest in the same directory:
+
+        {"file_name": str, "file_size": int, "chunk_size": int, "nchunks": int, "chunks": {"<index>": "<sha256>"}}
+
+    An interrupted upload is resumed by uploading only the chunks that are missing from the manifest. Once every chunk
+    is confirmed, this class verifies the chunks' checksums and concatenates them into the uploaded file.
+    @date Oct 19, 2026
+    """
+
+    CHUNKSDIR_NAME = "chunks"  # - NOTE: Must not be hidden, else Jupyter's contents API refuses to write into it
+    MANIFEST_NAME = "manifest.json"
+    # - upload IDs are made of these characters only (see script.html), so that they are plain directory names
+    _UPLOADID_PATTERN = re.compile(r"[A-Za-z0-9._-]+")
+
+    def __init__(self) -> None:
+        self.dir_path: Path = Path()  # - chunk directory of the upload
+        self.file_name = ""  # - name of the uploaded file
+        self.file_size = 0
+        self.chunk_size = 0
+        self.nchunks = 0
+        self.chunk_checksums: Dict[int, str] = {}  # - SHA-256 digests of confirmed chunks, mapped by chunk index
+
+    @classmethod
+    def is_valid_upload_id(cls, upload_id: str) -> bool:
+        """
+        Return whether the given upload ID may name a chunk directory
+        NOTE: The ID comes from the browser, so it must not be able to refer to any other directory (like "..")
+        """
+        return (
+            (cls._UPLOADID_PATTERN.fullmatch(upload_id) is not None)
+            and (Path(upload_id).name == upload_id)
+            and (upload_id.strip(".") != "")
+        )
+
+    @classmethod
+    def create(cls, dir_path: Path) -> ChunkedUpload:
+        """Create an instance of this class from the given chunk directory"""
+        manifest_path = dir_path / cls.MANIFEST_NAME
+        if not manifest_path.is_file():
+            raise Exception("Upload manifest could not be found")
+        with open(str(manifest_path), "r") as manifestfile:
+            manifest = json.load(manifestfile)
+        upload = ChunkedUpload()
+        upload.dir_path = dir_path
+        upload.file_name = Path(manifest["file_name"]).name  # Drop any directory component
+        upload.file_size = int(manifest["file_size"])
+        upload.chunk_size = int(manifest["chunk_size"])
+        upload.nchunks = int(manifest["nchunks"])
+        upload.chunk_checksums = {int(index): checksum for index, checksum in manifest["chunks"].items()}
+        return upload
+
+    def assemble(self, dst_dir_path: Path) -> Path:
+        """
+        Verify the uploaded chunks and concatenate them into a file in the given directory, then remove the chunk 
+        directory. Return the path of the assembled file.
+        Corrupted chunks are removed from the manifest, so that uploading the same file again only resends them
+        """
+        missing_chunks = [index for index in range(self.nchunks) if index not in self.chunk_checksums]
+        if len(missing_chunks) > 0:
+            raise Exception(f"Upload is incomplete ({len(missing_chunks)} chunks are missing)")
+        corrupted_chunks = [index for index in range(self.nchunks) if not self._verify_chunk(index)]
+        if len(corrupted_chunks) > 0:
+            for index in corrupted_chunks:
+                del self.chunk_checksums[index]
+            self._save_manifest()
+            raise Exception(
+                f"Upload is corrupted ({len(corrupted_chunks)} chunks failed the checksum). Please upload the file again"
+            )
+        file_path = dst_dir_path / self.file_name
+        temp_file_path = dst_dir_path / (self.file_name + ".part")
+        with open(str(temp_file_path), "wb") as dstfile:
+            for index in range(self.nchunks):
+                with open(str(self._get_chunk_path(index)), "rb") as chunkfile:
+                    shutil.copyfileobj(chunkfile, dstfile)
+        os.replace(str(temp_file_path), str(file_path))
+        shutil.rmtree(str(self.dir_path), ignore_errors=True)
+        return file_path
+
+    def _verify_chunk(self, index: int) -> bool:
+        """Return whether the chunk exists with the expected size and checksum"""
+        chunk_path = self._get_chunk_path(index)
+        expected_size = min(self.chunk_size, self.file_size - index * self.chunk_size)
+        if (not chunk_path.is_file()) or (chunk_path.stat().st_size != expected_size):
+            return False
+        if self.chunk_checksums[index] == "":  # The browser could not compute a checksum (e.g. in an insecure context)
+            return True
+        with open(str(chunk_path), "rb") as chunkfile:
+            return hashlib.sha256(chunkfile.read()).hexdigest() == self.chunk_checksums[index]
+
+    def _get_chunk_path(self, index: int) -> Path:
+        return self.dir_path / f"{index}.part"
+
+    def _save_manifest(self) -> None:
+        manifest = {
+            "file_name": self.file_name,
+            "file_size": self.file_size,
+            "chunk_size": self.chunk_size,
+            "nchunks": self.nchunks,
+            "chunks": {str(index): checksum for index, checksum in self.chunk_checksums.items()},
+        }
+        with open(str(self.dir_path / self.MANIFEST_NAME), "w") as manifestfile:
+            json.dump(manifest, manifestfile)
+
+
 class InputDataEntity:
     """ 
     A domain entity that represents our input data/file
@@ -100,6 +437,39 @@ class InputDataEntity:
     """
 
     _NROWS_IN_SAMPLE_DATA = 1000
+    _NLINES_IN_CACHED_HEAD = 10 * _NROWS_IN_SAMPLE_DATA  # - number of topmost lines kept to sample skipped files from
+    SUPPORTED_FILE_SUFFIXES = [".csv", ".csv.gz", ".zip"]  # - plain CSV files, or CSV files compressed with gzip / zip
+    # Attributes that can be specified by a spec, in the order they should be applied (see apply_spec())
+    SPEC_KEYS = [
+        "delimiter",
+        "initial_lines_to_skip",
+        "header_is_included",
+        "model_name",
+        "scenarios_to_ignore",
+        "scenario_colnum",
+        "region_colnum",
+        "variable_colnum",
+        "item_colnum",
+        "unit_colnum",
+        "year_colnum",
+        "value_colnum",
+    ]
+    SPEC_FILE_SUFFIXES = [".json", ".opt"]
+    _OPT_DELIMITER_NAMES = {"tab": "\t", "\\t": "\t", "space": " ", "comma": ",", "semicolon": ";", "pipe": "|"}
+    # Roles guessed for the sample columns (see guess_model_name_n_column_assignments()), in the order of precedence
+    _GUESSED_ROLES = ["Model", "Scenario", "Region", "Variable", "Item", "Unit", "Year", "Value"]
+    _MIN_ROLE_SCORE = 0.1  # - minimum score of a column to be given a role
+    _ENCODING_SAMPLE_SIZE = 64 * 1024  # - number of bytes sampled to guess the encoding
+    _TRANSCODING_BUFFER_SIZE = 1024 * 1024
+    # Byte order marks and their encodings
+    # NOTE: UTF-32 BOMs must be checked first, since the UTF-32-LE BOM starts with the UTF-16-LE BOM
+    _BOMS = [
+        (codecs.BOM_UTF32_LE, "utf-32"),
+        (codecs.BOM_UTF32_BE, "utf-32"),
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ]
 
     def __init__(self):
         # Input format specification attributes
@@ -112,6 +482,10 @@ class InputDataEntity:
         self._file_path: Path = Path()
         self._delimiter: str = ""
         self._initial_lines_to_skip: int = 0
+        self.quoting: int = csv.QUOTE_MINIMAL  # - quote style of the fields (QUOTE_NONE if no field is quoted)
+        self.encoding: str = "utf-8"  # - encoding of the file, guessed once from a sample of its bytes
+        self._transcoded_file_path: Optional[Path] = None  # - UTF-8 copy of a UTF-16 / UTF-32 file, if any
+        self._transcoding_dir_path: Optional[Path] = None  # - directory of the UTF-8 copy, if not the file's directory
         # Column assignment attributes
         self.scenario_colnum: int = 0   # colnum -> column number (1-based indexing)
         self.region_colnum: int = 0
@@ -127,143 +501,322 @@ class InputDataEntity:
         # TODO: Simplify the operations that require these two sample attributes
         # @date Aug 5, 2021
         self._input_data_topmost_sample: list[str] = []     # top X input data       
+        self._input_data_head: list[str] = []  # top lines of the input data, which the samples are sliced from
         self._input_data_nonskipped_sample: list[str] = []  # top X non-skipped input data
         self._sample_parsed_input_data_memo: Optional[list[list[str]]] = None
 
     @classmethod
-    def create(cls, file_path: Path) -> InputDataEntity:
+    @instrumented("InputDataEntity.create", lambda entity, cls, file_path, *_: (entity.file_nrows, file_path.stat().st_size))
+    def create(cls, file_path: Path, transcoding_dir_path: Optional[Path] = None) -> InputDataEntity:
         """
         Create an instance of this class
+        A UTF-16 / UTF-32 file is transcoded into the given directory (see get_transcoded_file_path())
         Return the created instance or raise an exception if an error occurred
         """
         entity = InputDataEntity()
         entity._file_path = file_path
+        entity._transcoding_dir_path = transcoding_dir_path
         assert file_path.is_file()
+        entity._input_data_head = []
         entity._input_data_topmost_sample = []
         entity._input_data_nonskipped_sample = []
         try:
-            with open(str(file_path)) as csvfile:
-                lines = csvfile.readlines()
-                entity._file_nrows = len(lines)
-                entity._input_data_topmost_sample = lines[: entity._NROWS_IN_SAMPLE_DATA]
-                entity._input_data_nonskipped_sample = (
-                    lines[entity.initial_lines_to_skip: entity.initial_lines_to_skip + entity._NROWS_IN_SAMPLE_DATA]
-                    if entity.initial_lines_to_skip < entity._file_nrows 
-                    else []
-                )
+            entity._update_encoding()
+            with entity.open_file() as csvfile:
+                # Only the head of the file is held in memory, while the remaining lines are just counted
+                entity._input_data_head = list(islice(csvfile, entity._NLINES_IN_CACHED_HEAD))
+                entity._file_nrows = len(entity._input_data_head) + sum(1 for _ in csvfile)
+                entity._input_data_topmost_sample = entity._input_data_head[: entity._NROWS_IN_SAMPLE_DATA]
+                entity._input_data_nonskipped_sample = entity._input_data_topmost_sample  # - no lines are skipped yet
         except:
             raise Exception("Error when opening file")
         return entity 
 
-    def guess_delimiter(self, valid_delimiters: list[str]) -> bool:
-        """Guess the delimiter from the sample input data and update the value
-        Return True if the guess was successful, else False
+    def guess_input_format(self, valid_delimiters: list[str]) -> bool:
         """
-        sample = "\n".join(self._input_data_topmost_sample)
-        delimiters = "".join(valid_delimiters)
-        format_sniffer = csv.Sniffer()
-        try:
-            csv_dialect = format_sniffer.sniff(sample, delimiters=delimiters)
-        except csv.Error:  # Could be due to insufficient sample size, etc
-            return False
-        self.delimiter = csv_dialect.delimiter
-        return True
-
-    def guess_header_is_included(self) -> bool:
-        """Guess if a header row is included in the sample input data and update the value
+        Guess the delimiter, whether a header row is included, the initial number of lines to skip, and the quote style
+        from the sample input data, then update their values
         Return True if the guess was successful, else False
-        """
-        sample = "\n".join(self._input_data_topmost_sample)
-        format_sniffer = csv.Sniffer()
-        try:
-            self.header_is_included = format_sniffer.has_header(sample)
-        except csv.Error:  # Could be due to insufficient sample size, etc
-            return False
-        return True
 
-    def guess_initial_lines_to_skip(self) -> bool:
-        """Guess the initial number of lines to skip and update the value
-        Return True if the guess was successful, else False
+        The sample is tokenized once per candidate delimiter (with a quote-aware tokenizer). A 'clean' row is assumed to
+        have the most frequent number of fields, so the delimiter whose clean rows are the most consistent (i.e. the 
+        most frequent) wins. The other formats are derived from the winning tokenization without re-reading the sample.
         """
-        rows = [
-            row.split(self.delimiter) if len(self.delimiter) > 0 else [row] for row in self._input_data_topmost_sample
-        ]
-        if len(rows) == 0:
-            return True
-        # Use the most frequent no. of columns as a proxy for the no. of columns of a 'clean' row
-        _ncolumns_bincount = np.bincount([len(row) for row in rows])
-        most_frequent_ncolumns = int(_ncolumns_bincount.argmax())  # type-casted to raise error for non-int values
-        # Skip initial lines with mimatched number of columns
-        count = 0
+        lines = [line.rstrip("\r\n") for line in self._input_data_topmost_sample]
+        if len(lines) == 0:
+            return False
+        best_guess: Optional[Tuple[float, int, str, List[List[str]]]] = None
+        for delimiter in valid_delimiters:
+            rows = list(CSVTokenizer(delimiter).tokenize(lines))
+            ncolumns = [len(row) for row in rows]
+            most_frequent_ncolumns = int(np.bincount(ncolumns).argmax())
+            if most_frequent_ncolumns < 2:  # The delimiter does not split the rows
+                continue
+            consistency = ncolumns.count(most_frequent_ncolumns) / len(rows)
+            # Prefer the more consistent delimiter, then the one that splits rows into more fields
+            if (best_guess is None) or ((consistency, most_frequent_ncolumns) > best_guess[:2]):
+                best_guess = (consistency, most_frequent_ncolumns, delimiter, rows)
+        if best_guess is None:
+            return False
+        _, most_frequent_ncolumns, delimiter, rows = best_guess
+        # Skip initial lines with mismatched number of columns
+        nlines_to_skip = 0
         for row in rows:
             if len(row) == most_frequent_ncolumns:
                 break
-            count += 1
+            nlines_to_skip += 1
         # Assume the guess had failed if the guessed number is too much
-        if count > self._NROWS_IN_SAMPLE_DATA * 0.9:
-            self.initial_lines_to_skip = 0
+        if nlines_to_skip > self._NROWS_IN_SAMPLE_DATA * 0.9:
+            nlines_to_skip = 0
+        clean_rows = [row for row in rows[nlines_to_skip:] if len(row) == most_frequent_ncolumns]
+        self.delimiter = delimiter
+        self.initial_lines_to_skip = nlines_to_skip
+        self.header_is_included = self._guess_header_is_included(clean_rows)
+        # Fields only need to be unquoted if any field in the sample was quoted
+        self.quoting = csv.QUOTE_MINIMAL if any('"' in line for line in lines) else csv.QUOTE_NONE
+        return True
+
+    def _guess_header_is_included(self, clean_rows: List[List[str]]) -> bool:
+        """
+        Guess if the first of the given rows is a header row
+        Every data row has numeric year and value fields, so the first row is a header if it has a non-numeric field 
+        in a column whose other fields are (almost) all numeric
+        """
+        if len(clean_rows) < 2:
+            return False
+        for colidx in range(len(clean_rows[0])):
+            data_fields = [row[colidx] for row in clean_rows[1:]]
+            nnumeric_fields = len([field for field in data_fields if self._is_numeric(field)])
+            if (nnumeric_fields >= len(data_fields) * 0.9) and (not self._is_numeric(clean_rows[0][colidx])):
+                return True
+        return False
+
+    @staticmethod
+    def _is_numeric(field: str) -> bool:
+        try:
+            float(field)
+        except ValueError:
             return False
-        self.initial_lines_to_skip = count
         return True
 
     def guess_model_name_n_column_assignments(self) -> bool:
         """
         Guess the model name and column assignments, and mutate the appropariate states
         Return True if some guesses were successful, else False
+
+        Every sample column is profiled in bulk. Its score for a label role (like Scenario) is the fraction of its 
+        values that are in the role's label table, its score for the year role is the fraction of integers between 1000
+        and 9999, and its score for the value role is the fraction of numbers. A header cell that names a role adds 1 
+        to the column's score for that role. The roles are then given to their best scoring columns, so stray cells 
+        don't win a role over a whole column.
         """
-        sample_parsed_csv_rows = self.sample_parsed_input_data
-        nrows = len(sample_parsed_csv_rows)
-        ncols = len(sample_parsed_csv_rows[0]) if nrows > 0 else 0
-        if nrows == 0 or ncols == 0:
+        rows = self.sample_parsed_input_data
+        if (len(rows) == 0) or (len(rows[0]) == 0):
             return False
-        quotes = '\'\"`'
-        guessed_something = False
-        for col_index in range(ncols):
-            for row_index in range(nrows):
-                cell_value = sample_parsed_csv_rows[row_index][col_index].strip(quotes)
-                successful_guess_id = self._guess_model_name_n_column_assignments_util(cell_value, col_index)
-                if successful_guess_id != -1:
-                    guessed_something = True
-                    break
-        return guessed_something
+        sample = DataFrame(rows, dtype=str)  # - the fields are unquoted by the tokenizer already
+        header: List[str] = []
+        if self.header_is_included:
+            header = [cell.lower() for cell in sample.iloc[0]]
+            if len(sample) > 1:
+                sample = sample.iloc[1:]
+        scores = np.zeros((len(self._GUESSED_ROLES), sample.shape[1]))
+        for col_index, (_, column) in enumerate(sample.items()):
+            label_hit_rates = DataRuleRepository.query_label_hit_rates(column)
+            numbers = pd.to_numeric(column, errors="coerce")
+            integers = numbers.where(column.str.fullmatch(r"[+-]?\d+"))
+            for role_index, role in enumerate(self._GUESSED_ROLES):
+                if role == "Year":
+                    scores[role_index, col_index] = ((integers > 1000) & (integers < 9999)).mean()
+                elif role == "Value":
+                    scores[role_index, col_index] = numbers.notna().mean()
+                else:
+                    scores[role_index, col_index] = label_hit_rates[role]
+                if (len(header) > col_index) and (header[col_index] == role.lower()):
+                    scores[role_index, col_index] += 1
+        # Give each role to its best scoring column that has not been given a role yet, starting from the best score
+        # NOTE: Ties are broken by the order of the roles, since a year column is also a column of numbers
+        candidates = sorted(
+            (
+                (-scores[role_index, col_index], role_index, col_index)
+                for role_index in range(scores.shape[0])
+                for col_index in range(scores.shape[1])
+                if scores[role_index, col_index] >= self._MIN_ROLE_SCORE
+            )
+        )
+        guessed_role_indexes: Set[int] = set()
+        guessed_col_indexes: Set[int] = set()
+        for _, role_index, col_index in candidates:
+            if (role_index in guessed_role_indexes) or (col_index in guessed_col_indexes):
+                continue
+            guessed_role_indexes.add(role_index)
+            guessed_col_indexes.add(col_index)
+            role = self._GUESSED_ROLES[role_index]
+            if role == "Model":
+                model_names = sample.iloc[:, col_index]
+                model_names = model_names[model_names.map(DataRuleRepository.query_label_in_model_names)]
+                if len(model_names) > 0:
+                    self.model_name = str(model_names.mode().iloc[0])
+            else:
+                setattr(self, role.lower() + "_colnum", col_index + 1)
+        return len(guessed_role_indexes) > 0
+
+    def apply_spec(self, spec: Dict[str, Any]) -> None:
+        """
+        Update the input format specification and column assignments from the given spec (see SPEC_KEYS), skipping 
+        the guesses
+        Raise an exception if the spec has an unknown key
+        """
+        unknown_keys = [key for key in spec.keys() if key not in self.SPEC_KEYS and key != "file_name"]
+        if len(unknown_keys) > 0:
+            raise Exception("Unknown spec keys: {}".format(", ".join(unknown_keys)))
+        # NOTE: Keys are applied in the order of SPEC_KEYS, since setting the delimiter or the number of lines to skip 
+        # may reset the column assignments. Unchanged values are not reassigned for the same reason.
+        for key in self.SPEC_KEYS:
+            if (key in spec) and (getattr(self, key) != spec[key]):
+                setattr(self, key, spec[key])
+
+    def apply_spec_n_guess_the_rest(self, spec: Dict[str, Any], valid_delimiters: list[str]) -> None:
+        """
+        Apply the given spec (see apply_spec()), and guess the input format, model name, and column assignments that 
+        it does not specify. Nothing is guessed if the spec specifies everything, like the legacy option files do.
+        """
+        format_keys = ["delimiter", "initial_lines_to_skip", "header_is_included"]
+        if any(key not in spec for key in format_keys):
+            self.guess_input_format(valid_delimiters)
+        self.apply_spec({key: value for key, value in spec.items() if not key.endswith("_colnum")})
+        if any(key not in spec for key in self.SPEC_KEYS if key.endswith("_colnum") or key == "model_name"):
+            self.guess_model_name_n_column_assignments()
+        self.apply_spec(spec)
+
+    def get_spec(self) -> Dict[str, Any]:
+        """Return the current input format specification and column assignments as a spec (see apply_spec())"""
+        spec = {key: getattr(self, key) for key in self.SPEC_KEYS}
+        spec["scenarios_to_ignore"] = list(self.scenarios_to_ignore)
+        return spec
+
+    def get_header_fingerprint(self) -> Optional[str]:
+        """Return the fingerprint of the header row (see get_line_fingerprints()), or None if there is no header row"""
+        fingerprints = self.get_line_fingerprints(self.initial_lines_to_skip + 1)
+        if (not self.header_is_included) or (len(fingerprints) <= self.initial_lines_to_skip):
+            return None
+        return fingerprints[self.initial_lines_to_skip]
 
-    def _guess_model_name_n_column_assignments_util(self, cell_value: str, col_index: int) -> int:
+    def get_line_fingerprints(self, nlines: int) -> List[str]:
         """
-        Return -1 if no guesses were made, or a non-negative integer if a guess was made
-        Each type of successful guess is associated with a unique non-negative integer
+        Return the fingerprints of the topmost lines of the input file, up to the given number of lines
+        A line's fingerprint is a hash of its text, ignoring case and surrounding whitespace
         """
-        if DataRuleRepository.query_label_in_model_names(cell_value):
-            self.model_name = cell_value
-            return 0
-        elif (cell_value == "Scenario") or DataRuleRepository.query_label_in_scenarios(cell_value):
-            self.scenario_colnum = col_index + 1
-            return 1
-        elif (cell_value == "Region") or DataRuleRepository.query_label_in_regions(cell_value):
-            self.region_colnum = col_index + 1
-            return 2
-        elif (cell_value == "Variable") or DataRuleRepository.query_label_in_variables(cell_value):
-            self.variable_colnum = col_index + 1
-            return 3
-        elif (cell_value == "Item") or DataRuleRepository.query_label_in_items(cell_value):
-            self.item_colnum = col_index + 1
-            return 4
-        elif (cell_value == "Unit") or DataRuleRepository.query_label_in_units(cell_value):
-            self.unit_colnum = col_index + 1
-            return 5
-        try:
-            # Reminder: int(<float value in str repr>) will raise an error
-            if (1000 < int(cell_value)) and (int(cell_value) < 9999):
-                self.year_colnum = col_index + 1
-                return 6
-        except ValueError:
-            pass
+        return [
+            hashlib.sha1(line.strip().lower().encode("utf-8")).hexdigest()
+            for line in self._input_data_topmost_sample[:nlines]
+        ]
+
+    def load_spec_file(self, file_path: Path, valid_delimiters: list[str]) -> None:
+        """Load the given spec file (see read_spec_file()) into this entity, and guess what it does not specify"""
+        self.apply_spec_n_guess_the_rest(self.read_spec_file(file_path), valid_delimiters)
+
+    def find_spec_file(self, dir_path: Path) -> Optional[Path]:
+        """
+        Return the spec file in the given directory that applies to the input file, or None if there is none
+        A spec file applies if it names the input file, or else if its model name is the first word of the input 
+        file's name (like the AIM spec for "AIM_DIET_ALL_18FEB2021.csv")
+        """
+        if not dir_path.is_dir():
+            return None
+        spec_file_paths = sorted(path for path in dir_path.iterdir() if path.suffix.lower() in self.SPEC_FILE_SUFFIXES)
+        model_name_in_file_name = self.file_stem.replace("-", "_").split("_")[0].lower()
+        spec_file_path_w_model_name: Optional[Path] = None
+        for spec_file_path in spec_file_paths:
+            try:
+                spec = self.read_spec_file(spec_file_path)
+            except Exception:
+                continue  # Ignore invalid spec files
+            if Path(str(spec.get("file_name", ""))).stem == self.file_stem:
+                return spec_file_path
+            if (spec_file_path_w_model_name is None) and (
+                str(spec.get("model_name", "")).lower() == model_name_in_file_name
+            ):
+                spec_file_path_w_model_name = spec_file_path
+        return spec_file_path_w_model_name
+
+    @classmethod
+    def read_spec_file(cls, file_path: Path) -> Dict[str, Any]:
+        """
+        Read a spec file and return the spec (see apply_spec())
+        A spec file is either a JSON file that maps spec keys to their values, or an option file (.opt) of the legacy 
+        submission processing script. Either may also name the input file it applies to, with the "file_name" key.
+        """
+        suffix = file_path.suffix.lower()
+        if suffix == ".json":
+            with open(str(file_path), "r", encoding="utf-8") as specfile:
+                spec = json.load(specfile)
+            if not isinstance(spec, dict):
+                raise Exception("JSON spec file must contain an object")
+            return spec
+        if suffix == ".opt":
+            return cls._read_opt_spec_file(file_path)
+        raise Exception("Spec file must be a JSON file (.json) or an option file (.opt)")
+
+    @classmethod
+    def _read_opt_spec_file(cls, file_path: Path) -> Dict[str, Any]:
+        """
+        Read a legacy option file and return its spec
+
+        An option file has a title line (like "Skip:") followed by the line(s) of its value. The concordance lists the 
+        (1-based) input column of every output field, and the year / value / unit column lines refer to positions in
+        the concordance. A negative skip count means the file has no header row.
+        """
+        with open(str(file_path), "r", encoding="utf-8", errors="replace") as optfile:
+            lines = [line.rstrip("\r\n") for line in optfile]
+        spec: Dict[str, Any] = {"delimiter": ","}  # - comma is the default delimiter of the legacy script
+        concordance: List[int] = []
+        positions = {"year_colnum": 5, "unit_colnum": 6, "value_colnum": 7}  # - positions in the concordance
+        index = 0
         try:
-            float(cell_value)
-            self.value_colnum = col_index + 1
-            return 7
+            while index < len(lines):
+                title = lines[index].strip().lower()
+                value = lines[index + 1].strip() if index + 1 < len(lines) else ""
+                index += 1
+                if title == "model:":
+                    spec["model_name"] = value
+                elif title == "folder:":
+                    pass  # Folders are paths on the machines of the modeling teams, so input files are found by name
+                elif title == "filename:":
+                    spec["file_name"] = value + ".csv"
+                elif title == "skip:":
+                    skip = int(value)
+                    spec["initial_lines_to_skip"] = max(skip, 0)
+                    spec["header_is_included"] = skip >= 0
+                elif title == "delimiter:":
+                    spec["delimiter"] = cls._OPT_DELIMITER_NAMES.get(value.lower(), value)
+                elif title.startswith("concord"):
+                    concordance = [int(line) for line in lines[index : index + 7]]
+                    index += 7
+                    continue
+                elif title == "year column:":
+                    positions["year_colnum"] = int(value)
+                elif title == "unit column:":
+                    positions["unit_colnum"] = int(value)
+                elif title == "value column:":
+                    positions["value_colnum"] = int(value)
+                elif title == "drop scenarios:":
+                    nscenarios = int(value)
+                    spec["scenarios_to_ignore"] = [line.strip() for line in lines[index + 1 : index + 1 + nscenarios]]
+                    index += 1 + nscenarios
+                    continue
+                else:
+                    continue
+                index += 1
         except ValueError:
-            pass
-        return -1
+            raise Exception("Invalid option file: {}".format(file_path.name))
+        if len(concordance) == 7:
+            # The remaining positions in the concordance are assigned to scenario, region, variable, and item in order
+            other_positions = [position for position in range(1, 8) if position not in positions.values()]
+            for key, position in zip(["scenario_colnum", "region_colnum", "variable_colnum", "item_colnum"], other_positions):
+                spec[key] = concordance[position - 1]
+            for key, position in positions.items():
+                spec[key] = concordance[position - 1]
+        return spec
 
     @property
     def delimiter(self) -> str:
@@ -286,6 +839,115 @@ class InputDataEntity:
     def file_path(self) -> Path:
         return self._file_path
 
+    @property
+    def file_nrows(self) -> int:
+        """Number of lines in the input file"""
+        return self._file_nrows
+
+    @property
+    def file_stem(self) -> str:
+        """Name of the input file without its (possibly compressed) CSV suffix"""
+        for suffix in self.SUPPORTED_FILE_SUFFIXES:
+            if self._file_path.name.endswith(suffix):
+                return self._file_path.name[: -len(suffix)]
+        return self._file_path.stem
+
+    @property
+    def assigned_colnums(self) -> List[int]:
+        """Assigned column numbers, ordered as scenario, region, variable, item, unit, year, and value"""
+        return [
+            self.scenario_colnum,
+            self.region_colnum,
+            self.variable_colnum,
+            self.item_colnum,
+            self.unit_colnum,
+            self.year_colnum,
+            self.value_colnum,
+        ]
+
+    def open_file(self) -> TextIO:
+        """
+        Open the input file in text mode, decoded with the guessed encoding
+        Compressed files are decompressed on the fly while being read, without inflating them to disk
+        """
+        if self._transcoded_file_path is not None:
+            return open(str(self._transcoded_file_path), "r", encoding="utf-8")
+        # NOTE: The encoding is guessed from a sample, so undecodable bytes after the sample are replaced instead of 
+        # failing the whole diagnosis
+        return io.TextIOWrapper(self._open_binary_file(), encoding=self.encoding, errors="replace")
+
+    @classmethod
+    def get_transcoded_file_path(cls, file_path: Path, dir_path: Optional[Path] = None) -> Path:
+        """
+        Return the path of the UTF-8 copy of the given input file (which only exists for UTF-16 / UTF-32 files)
+        The copy is stored in the given directory, or next to the input file if no directory is given
+        """
+        return (dir_path if dir_path is not None else file_path.parent) / ("." + file_path.name + ".utf-8.csv")
+
+    def _open_binary_file(self) -> BinaryIO:
+        """Open the (decompressed) input file in binary mode"""
+        if self._file_path.name.endswith(".gz"):
+            return gzip.open(str(self._file_path), "rb")  # type: ignore
+        if self._file_path.name.endswith(".zip"):
+            with zipfile.ZipFile(str(self._file_path)) as archive:
+                member_names = [name for name in archive.namelist() if not name.endswith("/")]
+                if len(member_names) != 1:
+                    raise Exception("Zip archive must contain exactly one CSV file")
+                # The opened member keeps the archive file open after the archive is closed
+                return archive.open(member_names[0])  # type: ignore
+        return open(str(self._file_path), "rb")
+
+    def _update_encoding(self) -> None:
+        """
+        Guess the encoding of the input file from a sample of its bytes and update its value
+        UTF-16 / UTF-32 files are transcoded to UTF-8 once, in a single buffered pass, so that every later stage reads
+        an ASCII-compatible file
+        """
+        with self._open_binary_file() as binaryfile:
+            sample = binaryfile.read(self._ENCODING_SAMPLE_SIZE)
+        self.encoding = self._guess_encoding(sample)
+        self._transcoded_file_path = None
+        if codecs.lookup(self.encoding).name not in ["utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-32-le", "utf-32-be"]:
+            return
+        transcoded_file_path = self.get_transcoded_file_path(self._file_path, self._transcoding_dir_path)
+        # fmt: off
+        with \
+            io.TextIOWrapper(self._open_binary_file(), encoding=self.encoding, errors="replace", newline="") as srcfile, \
+            open(str(transcoded_file_path), "w", encoding="utf-8", newline="") as dstfile \
+        :
+        # fmt: on
+            shutil.copyfileobj(srcfile, dstfile, self._TRANSCODING_BUFFER_SIZE)
+        self._transcoded_file_path = transcoded_file_path
+
+    @classmethod
+    def _guess_encoding(cls, sample: bytes) -> str:
+        """Return the encoding guessed from the given sample of bytes (taken from the start of a file)"""
+        for bom, encoding in cls._BOMS:
+            if sample.startswith(bom):
+                return encoding
+        # Without a BOM, mostly-ASCII UTF-16 text has a null byte in every other position
+        nbytes_in_half = len(sample) // 2
+        if nbytes_in_half > 0:
+            nnulls_in_even_bytes = sample[0::2].count(0)
+            nnulls_in_odd_bytes = sample[1::2].count(0)
+            if nnulls_in_even_bytes == 0 and nnulls_in_odd_bytes > nbytes_in_half * 0.5:
+                return "utf-16-le"
+            if nnulls_in_odd_bytes == 0 and nnulls_in_even_bytes > nbytes_in_half * 0.5:
+                return "utf-16-be"
+        # The sample may end in the middle of a multi-byte character, so it is decoded incrementally
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+        # Files exported from Excel on Windows are usually encoded with Windows-1252, a superset of Latin-1's printable
+        # characters. Latin-1 is the final fallback since it can decode any byte.
+        try:
+            sample.decode("cp1252")
+            return "cp1252"
+        except UnicodeDecodeError:
+            return "latin-1"
+
     @property
     def initial_lines_to_skip(self) -> int:
         return self._initial_lines_to_skip
@@ -308,14 +970,17 @@ class InputDataEntity:
         if value == 0:
             self._input_data_nonskipped_sample = self._input_data_topmost_sample
             return
+        # The file does not need to be re-read if its cached head already covers the non-skipped sample
+        if (value + self._NROWS_IN_SAMPLE_DATA <= len(self._input_data_head)) or (
+            len(self._input_data_head) == self._file_nrows
+        ):
+            self._input_data_nonskipped_sample = self._input_data_head[value : value + self._NROWS_IN_SAMPLE_DATA]
+            return
         self._input_data_nonskipped_sample = []
         try:
-            with open(str(self.file_path)) as csvfile:
-                lines = csvfile.readlines()
-                self._input_data_topmost_sample = lines[: self._NROWS_IN_SAMPLE_DATA]
-                self._input_data_nonskipped_sample = (
-                    lines[self.initial_lines_to_skip: self.initial_lines_to_skip + self._NROWS_IN_SAMPLE_DATA]
-                )
+            with self.open_file() as csvfile:
+                # Skip the lines without holding them in memory, and stop reading after the sample
+                self._input_data_nonskipped_sample = list(islice(csvfile, value, value + self._NROWS_IN_SAMPLE_DATA))
         except:
             return
 
@@ -337,9 +1002,7 @@ class InputDataEntity:
         if self._sample_parsed_input_data_memo is not None:
             return self._sample_parsed_input_data_memo
         # Split rows in the sample input data
-        rows = [
-            row.split(self.delimiter) if self.delimiter != "" else [row] for row in self._input_data_nonskipped_sample
-        ]
+        rows = list(CSVTokenizer(self.delimiter, self.quoting).tokenize(self._input_data_nonskipped_sample))
         # Return if input data has no rows
         if len(rows) == 0:
             self._sample_parsed_input_data_memo = rows
@@ -358,6 +1021,7 @@ class InputDataEntity:
         return f"""
         > Input Data Entity
         File path = {str(self.file_path)}
+        Encoding = {self.encoding}
         Model name = {self.model_name}
         Delimiter = {self.delimiter}
         Header is included = {self.header_is_included}
@@ -390,11 +1054,10 @@ class InputDataDiagnosis:
     VALUE_COLNAME = "Value"
     # File destination paths for diagnosed rows 
     STRUCTISSUEROWS_DSTPATH = _DOWNLOADDIR_PATH / "Rows With Structural Issue.csv"
+    STRUCTISSUES_SPILLPATH = _DOWNLOADDIR_PATH / ".structural_issues.bin"
     DUPLICATESROWS_DSTPATH = _DOWNLOADDIR_PATH / "Duplicate Records.csv"
     IGNOREDSCENARIOROWS_DSTPATH = _DOWNLOADDIR_PATH / "Records With An Ignored Scenario.csv"
     ACCEPTEDROWS_DSTPATH = _DOWNLOADDIR_PATH / "Accepted Records.csv"
-    # File destination path for filtered output data
-    FILTERED_OUTPUT_DSTPATH = _DOWNLOADDIR_PATH / "Filtered Output Data.csv"
 
     def __init__(self) -> None:
         # Results of row checks
@@ -407,6 +1070,8 @@ class InputDataDiagnosis:
         self.unknown_labels: List[UnknownLabelInfo] = [] # Labels that violate data protocol but cannot be fixed automatically
         self.unknown_years: Set[str] = set()   # Valid years that do not exist in the data protocol yet. Needs to be included
         # into the data protocol file so that we can generate the appropriate GAMS header file later
+        # Aggregated information about the rows with structural issue, mapped by issue code and variable
+        self.struct_issues: Dict[Tuple[StructIssueCode, str], StructIssueInfo] = {}
         # Private helper attributes
         # - information about input file
         self._input_entity = InputDataEntity()
@@ -414,55 +1079,41 @@ class InputDataDiagnosis:
         self._largest_ncolumns = 0
         # - row occurrence dictionary for duplicate checking
         self._row_occurence_dict: Dict[str, int] = {}
+        # - compact records of rows with structural issue, rendered into the destination file only when requested
+        self._struct_issue_writer = StructIssueWriter(self.STRUCTISSUES_SPILLPATH)
+        self._struct_issue_report_is_written = False
+
+    @property
+    def nrows(self) -> int:
+        """Number of diagnosed rows"""
+        return self.nrows_w_struct_issue + self.nrows_w_ignored_scenario + self.nrows_duplicate + self.nrows_accepted
     
-    def rediagnose_n_filter_output_data(self, output_entity: OutputDataEntity) -> bool:  # type: ignore
+    def write_struct_issue_report(self) -> Path:
         """
-        Re-diagnose and filter output data and store the result in the appropriate file. Return whether or not new 
-        issues were found after the re-diagnosis
-
-        Justification: If unknown variables or units were swapped with a valid label, their associated values were 
-        never checked against the acceptable range. So, we want to check and filter them here.
+        Write the rows with structural issue into their destination file (only once) and return the file's path
+        Each line has the row number, the fields of the row padded to the largest number of columns, and the issue
         """
-        has_new_issues = False
-        is_fixed_unknown_variable_or_unit: Callable[[UnknownLabelInfo], bool] = (
-            lambda label_info: (label_info.associated_column == self.VARIABLE_COLNAME) or (label_info.associated_column == self.UNIT_COLNAME) and (label_info.fix != "")
-        )
-        fixed_variables_or_units = set(label_info.fix for label_info in self.unknown_labels if is_fixed_unknown_variable_or_unit(label_info))
-        # TODO: Reimplement using vectorization techniques for better performance
-        # TODO: Update files / attributes relating to accepted rows and rows with structural issue too
-        with open(output_entity.file_path, "r") as outputfile, open(self.FILTERED_OUTPUT_DSTPATH, "w+") as filteredoutputfile:
-            rows = outputfile.readlines()
-            variable_colidx = output_entity.processed_data.columns.tolist().index(output_entity.VARIABLE_COLNAME)
-            value_colidx = output_entity.processed_data.columns.tolist().index(output_entity.VALUE_COLNAME)
-            unit_colidx = output_entity.processed_data.columns.tolist().index(output_entity.UNIT_COLNAME)
-            for line in rows:
-                row = line.strip("\n ").split(",") 
-                if len(row) == 0: 
-                    continue
-                value_field = row[value_colidx]
-                variable_field = row[variable_colidx]
-                unit_field = row[unit_colidx]
-                # Log unaffected rows (their variable field were not fixed/modified) into the destination file
-                if variable_field not in fixed_variables_or_units:
-                    filteredoutputfile.write(line)
-                    continue
-                # Get min/max value for the given variable and unit
-                min_value = DataRuleRepository.query_variable_min_value(variable_field, unit_field)
-                max_value = DataRuleRepository.query_variable_max_value(variable_field, unit_field)
-                # Ignore rows with out-of-bound values
-                if float(value_field) < min_value or float(value_field) > max_value:
-                    has_new_issues = True
-                    continue
-                # Log row with acceptable value
-                filteredoutputfile.write(line)
-        return has_new_issues
+        if self._struct_issue_report_is_written:
+            return self.STRUCTISSUEROWS_DSTPATH
+        tokenizer = CSVTokenizer(self._input_entity.delimiter, self._input_entity.quoting)
+        with self._input_entity.open_file() as inputfile:
+            self._struct_issue_writer.render(
+                inputfile, tokenizer, self._largest_ncolumns + 2, self.STRUCTISSUEROWS_DSTPATH
+            )
+        self._struct_issue_report_is_written = True
+        return self.STRUCTISSUEROWS_DSTPATH
 
     @classmethod
-    def create(cls, input_entity: InputDataEntity) -> InputDataDiagnosis:
+    @instrumented(
+        "InputDataDiagnosis.create",
+        lambda diagnosis, cls, input_entity, *_: (diagnosis.nrows, input_entity.file_path.stat().st_size),
+    )
+    def create(cls, input_entity: InputDataEntity, dst_dir_path: Optional[Path] = None) -> InputDataDiagnosis:
         """
         Create an return an instance of this class
         
-        To create the instance, we will diagnose the input data and populate the relevant attributes and files.
+        To create the instance, we will diagnose the input data and populate the relevant attributes and files. The 
+        files are stored in the given directory, or in the default download directory.
 
         In general, the diagnosis involves performing "row checks" on data rows and categorizing them as
         1. Rows with structural issue
@@ -481,6 +1132,8 @@ class InputDataDiagnosis:
         @date Aug 5, 2021
         """
         diagnosis = InputDataDiagnosis()
+        if dst_dir_path is not None:
+            diagnosis._set_dst_dir_path(dst_dir_path)
         diagnosis._initialize_row_destination_files()
         diagnosis._input_entity = input_entity
         # Initialize sets to store found labels/fields
@@ -494,32 +1147,27 @@ class InputDataDiagnosis:
         delimiter = input_entity.delimiter
         header_is_included = input_entity.header_is_included
         initial_lines_to_skip = input_entity.initial_lines_to_skip
-        scenario_colidx = input_entity.scenario_colnum - 1
-        region_colidx = input_entity.region_colnum - 1
-        variable_colidx = input_entity.variable_colnum - 1
-        item_colidx = input_entity.item_colnum - 1
-        unit_colidx = input_entity.unit_colnum - 1
-        year_colidx = input_entity.year_colnum - 1
-        value_colidx = input_entity.value_colnum - 1
+        # Only the fields of the assigned columns are kept (in the order of the output columns), unused columns like
+        # notes or descriptions are never stripped, copied or stored
+        usecols = [colnum - 1 for colnum in input_entity.assigned_colnums]
+        tokenizer = CSVTokenizer(delimiter, input_entity.quoting, usecols)
         # Update private helper attributes
-        diagnosis._update_ncolumns_info(input_entity)
+        diagnosis._update_ncolumns_info(input_entity, tokenizer)
         # Open all row destination files 
         # fmt: off
         with \
-            open(str(input_entity.file_path), "r") as inputfile, \
-            open(str(diagnosis.STRUCTISSUEROWS_DSTPATH), "w+") as structissuefile, \
-            open(str(diagnosis.IGNOREDSCENARIOROWS_DSTPATH), "w+") as ignoredscenfile, \
-            open(str(diagnosis.DUPLICATESROWS_DSTPATH), "w+") as duplicatesfile, \
-            open(str(diagnosis.ACCEPTEDROWS_DSTPATH), "w+") as acceptedfile \
+            input_entity.open_file() as inputfile, \
+            diagnosis._struct_issue_writer as structissuewriter, \
+            open(str(diagnosis.IGNOREDSCENARIOROWS_DSTPATH), "w+", encoding="utf-8") as ignoredscenfile, \
+            open(str(diagnosis.DUPLICATESROWS_DSTPATH), "w+", encoding="utf-8") as duplicatesfile, \
+            open(str(diagnosis.ACCEPTEDROWS_DSTPATH), "w+", encoding="utf-8") as acceptedfile \
         :
         # fmt: on
-            # Get lines and ncolumns info from input file
-            lines = inputfile.readlines()
-            # Diagnose every line from the input file
-            for line_index in range(len(lines)):
-                line = lines[line_index].strip("\n")
-                row = line.split(delimiter)
-                rownum = line_index + 1
+            # Accepted rows are stored with the tokenized fields of the assigned columns, so that they are parsed the same
+            # way later on
+            acceptedrows_writer = csv.writer(acceptedfile, delimiter=delimiter, lineterminator="\n")
+            # Diagnose every row from the input file
+            for rownum, line, ncolumns, row in tokenizer.tokenize_w_lines(inputfile):
                 # Ignore skipped row
                 if rownum <= initial_lines_to_skip:
                     continue
@@ -527,21 +1175,21 @@ class InputDataDiagnosis:
                 if (rownum == initial_lines_to_skip + 1) and header_is_included:
                     continue
                 # Ignore row that fails a row check
-                if diagnosis._diagnose_row(rownum, row, line, structissuefile, ignoredscenfile, duplicatesfile):
+                if diagnosis._diagnose_row(rownum, ncolumns, row, line, structissuewriter, ignoredscenfile, duplicatesfile):
                     continue
                 # Log accepted row
                 diagnosis.nrows_accepted += 1
-                acceptedfile.write(line + "\n")
+                acceptedrows_writer.writerow(row)
                 # Store found labels/fields
-                _quotes_and_space = '\'\"` '
-                scenario_fields.add(row[scenario_colidx].strip(_quotes_and_space))
-                region_fields.add(row[region_colidx].strip(_quotes_and_space))
-                variable_fields.add(row[variable_colidx].strip(_quotes_and_space))
-                item_fields.add(row[item_colidx].strip(_quotes_and_space))
-                unit_fields.add(row[unit_colidx].strip(_quotes_and_space))
-                year_fields.add(row[year_colidx].strip(_quotes_and_space))
+                scenario, region, variable, item, unit, year, value = row
+                scenario_fields.add(scenario)
+                region_fields.add(region)
+                variable_fields.add(variable)
+                item_fields.add(item)
+                unit_fields.add(unit)
+                year_fields.add(year)
                 # Parse value
-                diagnosis._diagnose_value_field(row[value_colidx].strip(_quotes_and_space))
+                diagnosis._diagnose_value_field(value)
         # Diagnose all found fields 
         for scenario in scenario_fields:
             diagnosis._diagnose_scenario_field(scenario)
@@ -564,21 +1212,24 @@ class InputDataDiagnosis:
 
     # Private util methods for row checks
 
-    def _diagnose_row(self, rownum: int, row: list[str], line: str, structissuefile: TextIOWrapper, ignoredscenfile: TextIOWrapper, duplicatesfile: TextIOWrapper) -> bool:
+    def _diagnose_row(self, rownum: int, ncolumns: int, row: list[str], line: str, structissuewriter: StructIssueWriter, ignoredscenfile: TextIOWrapper, duplicatesfile: TextIOWrapper) -> bool:
         """
         Check the given row for various issues
         If a row fails a check, then it will be logged into the appropriate file
         Return True if the row fails a check, else return False
+
+        NOTE: The given row only holds the fields of the assigned columns (scenario, region, variable, item, unit, year, 
+        and value), while the number of columns and the line are those of the whole row
         """
-        if self._check_row_for_structural_issue(rownum, row, structissuefile):
+        if self._check_row_for_structural_issue(rownum, ncolumns, row, line, structissuewriter):
             return True
-        if self._check_row_for_ignored_scenario(rownum, row, ignoredscenfile):
+        if self._check_row_for_ignored_scenario(rownum, row, line, ignoredscenfile):
             return True
         if self._check_if_duplicate_row(rownum, line, duplicatesfile):
             return True
         return False 
     
-    def _check_row_for_structural_issue(self, rownum: int, row: list[str], structissuefile: TextIOWrapper) -> bool:
+    def _check_row_for_structural_issue(self, rownum: int, ncolumns: int, row: list[str], line: str, structissuewriter: StructIssueWriter) -> bool:
         """
         Checks if a row has a structural issue and logs it into the file if it has.
         Returns the result of the structural check.
@@ -593,52 +1244,49 @@ class InputDataDiagnosis:
         @date July 7, 2021
         """
         self.nrows_w_struct_issue += 1  # Assume the row has a structural issue
-        if len(row) != self._correct_ncolumns:
-            self._log_row_w_struct_issue(rownum, row, "Mismatched number of fields", structissuefile)
+        if ncolumns != self._correct_ncolumns or len(row) == 0:
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.MISMATCHED_NCOLUMNS, structissuewriter)
             return True
-        if row[self._input_entity.scenario_colnum - 1] == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty scenario field", structissuefile)
+        scenario_field, region_field, variable_field, item_field, unit_field, year_field, value_field = row
+        if scenario_field == "":
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_SCENARIO, structissuewriter)
             return True
-        if row[self._input_entity.region_colnum - 1] == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty region field", structissuefile)
+        if region_field == "":
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_REGION, structissuewriter)
             return True
-        if row[self._input_entity.variable_colnum - 1] == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty variable field", structissuefile)
+        if variable_field == "":
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_VARIABLE, structissuewriter)
             return True
-        if row[self._input_entity.item_colnum - 1] == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty item field", structissuefile)
+        if item_field == "":
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_ITEM, structissuewriter)
             return True
-        if row[self._input_entity.unit_colnum - 1] == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty unit field", structissuefile)
+        if unit_field == "":
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_UNIT, structissuewriter)
             return True
-        year_field = row[self._input_entity.year_colnum - 1]
         if year_field == "":
-            self._log_row_w_struct_issue(rownum, row, "Empty year field", structissuefile)
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.EMPTY_YEAR, structissuewriter)
             return True
         try:
             int(year_field)
         except:
-            self._log_row_w_struct_issue(rownum, row, "Non-integer year field", structissuefile)
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.NON_INTEGER_YEAR, structissuewriter)
             return True
-        if self._check_row_for_value_w_structural_issue(rownum, row, structissuefile):
+        if self._check_row_for_value_w_structural_issue(rownum, variable_field, unit_field, value_field, line, structissuewriter):
             return True
 
         self.nrows_w_struct_issue -= 1  # Substract the value back if the row does not have a struc. issue
         return False
 
-    def _check_row_for_value_w_structural_issue(self, rownum: int, row: list[str], structissuefile: TextIOWrapper) -> bool:
+    def _check_row_for_value_w_structural_issue(self, rownum: int, variable_field: str, unit_field: str, value_field: str, line: str, structissuewriter: StructIssueWriter) -> bool:
         """Check if row has a value field with a structural issue and log it if it does"""
-        value_field = row[self._input_entity.value_colnum - 1]
         try:
             # Get fixed value
             value_fix = DataRuleRepository.query_fix_from_value_fix_table(value_field)
             value_fix = value_fix if value_fix is not None else value_field
             # Get matching variable 
-            variable_field = row[self._input_entity.variable_colnum - 1]
             matching_variable = DataRuleRepository.query_matching_variable(variable_field)
             matching_variable = matching_variable if matching_variable is not None else variable_field
             # Get matching unit
-            unit_field = row[self._input_entity.unit_colnum - 1]
             matching_unit = DataRuleRepository.query_matching_unit(unit_field)
             matching_unit = matching_unit if matching_unit is not None else unit_field 
             # Get min/max value for the given variable and unit
@@ -646,26 +1294,27 @@ class InputDataDiagnosis:
             max_value = DataRuleRepository.query_variable_max_value(matching_variable, matching_unit)
             if float(value_fix) < min_value:
                 issue_text = "Value for variable {} is smaller than {} {}".format(matching_variable, min_value, matching_unit)
-                self._log_row_w_struct_issue(rownum, row, issue_text, structissuefile)
+                self._log_row_w_struct_issue(rownum, line, StructIssueCode.VALUE_BELOW_MINIMUM, structissuewriter, matching_variable, issue_text)
                 return True
             if float(value_fix) > max_value:
                 issue_text = "Value for variable {} is greater than {} {}".format(matching_variable, max_value, matching_unit)
-                self._log_row_w_struct_issue(rownum, row, issue_text, structissuefile)
+                self._log_row_w_struct_issue(rownum, line, StructIssueCode.VALUE_ABOVE_MAXIMUM, structissuewriter, matching_variable, issue_text)
                 return True
         except:
-            self._log_row_w_struct_issue(rownum, row, "Non-numeric value field", structissuefile)
+            self._log_row_w_struct_issue(rownum, line, StructIssueCode.NON_NUMERIC_VALUE, structissuewriter)
             return True
         return False
 
-    def _check_row_for_ignored_scenario(self, rownum: int, row: list[str], ignoredscenfile: TextIOWrapper) -> bool:
+    def _check_row_for_ignored_scenario(self, rownum: int, row: list[str], line: str, ignoredscenfile: TextIOWrapper) -> bool:
         """
         Check if a row contains an ignored scenario and logs it into the given file if it does.
         Returns the result of the check.
         """
-        if row[self._input_entity.scenario_colnum - 1] in self._input_entity.scenarios_to_ignore:
-            log_row = [str(rownum), *row]
-            log_text = ",".join(log_row) + "\n"
-            ignoredscenfile.write(log_text)
+        if row[0] in self._input_entity.scenarios_to_ignore:
+            # The row is only tokenized in full to be logged
+            log_row = [str(rownum), *self._tokenize_line(line)]
+            # Fields that contain a comma or a quote are quoted, so that the logged row keeps its fields
+            csv.writer(ignoredscenfile, lineterminator="\n").writerow(log_row)
             self.nrows_w_ignored_scenario += 1
             return True
         return False
@@ -787,14 +1436,20 @@ class InputDataDiagnosis:
 
     # Private util methods to log found errors/issues
 
-    def _log_row_w_struct_issue(self, rownum: int, row: list[str], issue_description: str, structissuefile: TextIOWrapper) -> None:
-        """Return the log text for the given row with structural issue"""
-        log_ncolumns = self._largest_ncolumns + 2
-        log_row = [str(rownum), *row] + ["" for _ in range(log_ncolumns)]
-        log_row = log_row[:log_ncolumns]
-        log_row[-1] = issue_description
-        log_text = ",".join(log_row) + "\n"
-        structissuefile.write(log_text)
+    def _log_row_w_struct_issue(self, rownum: int, line: str, issue_code: StructIssueCode, structissuewriter: StructIssueWriter, variable: str = "", issue_description: str = "") -> None:
+        """
+        Log the given row with structural issue (see write_struct_issue_report()) and count it for its issue
+        The issue description defaults to the description of the issue code
+        """
+        structissuewriter.write(rownum, line.count("\n") + 1, issue_description if issue_description else issue_code.value)
+        issue_key = (issue_code, variable)
+        issue_info = self.struct_issues.get(issue_key)
+        if issue_info is None:
+            issue_info = StructIssueInfo(issue_code, variable)
+            self.struct_issues[issue_key] = issue_info
+        issue_info.nrows += 1
+        if len(issue_info.example_rownums) < StructIssueInfo.NEXAMPLES:
+            issue_info.example_rownums.append(rownum)
 
     def _log_bad_label(self, bad_label: str, associated_column: str, fix: str) -> None:
         """Logs bad label"""
@@ -807,6 +1462,20 @@ class InputDataDiagnosis:
 
     # Other private util methods
 
+    def _tokenize_line(self, line: str) -> List[str]:
+        """Return all the fields of the given row text"""
+        tokenizer = CSVTokenizer(self._input_entity.delimiter, self._input_entity.quoting)
+        return next(tokenizer.tokenize(io.StringIO(line)), [""])
+
+    def _set_dst_dir_path(self, dst_dir_path: Path) -> None:
+        """Store the destination files in the given directory instead of the default download directory"""
+        self.STRUCTISSUEROWS_DSTPATH = dst_dir_path / self.STRUCTISSUEROWS_DSTPATH.name
+        self.STRUCTISSUES_SPILLPATH = dst_dir_path / self.STRUCTISSUES_SPILLPATH.name
+        self.DUPLICATESROWS_DSTPATH = dst_dir_path / self.DUPLICATESROWS_DSTPATH.name
+        self.IGNOREDSCENARIOROWS_DSTPATH = dst_dir_path / self.IGNOREDSCENARIOROWS_DSTPATH.name
+        self.ACCEPTEDROWS_DSTPATH = dst_dir_path / self.ACCEPTEDROWS_DSTPATH.name
+        self._struct_issue_writer = StructIssueWriter(self.STRUCTISSUES_SPILLPATH)
+
     def _initialize_row_destination_files(self):
         """Create/Recreate destination files"""
         # Deletes existing files, if any
@@ -824,15 +1493,13 @@ class InputDataDiagnosis:
         self.DUPLICATESROWS_DSTPATH.touch()
         self.ACCEPTEDROWS_DSTPATH.touch()
 
-    def _update_ncolumns_info(self, input_entity: InputDataEntity) -> None:
+    def _update_ncolumns_info(self, input_entity: InputDataEntity, tokenizer: CSVTokenizer) -> None:
         """Get info about number of columns and populate the relevant private attributes"""
         self._correct_ncolumns = 0
         largest_ncolumns = 0
         ncolumns_occurence_dict: Dict[int, int] = {}
-        with open(str(input_entity.file_path)) as csvfile:
-            lines = csvfile.readlines()
-            for line in lines:
-                ncolumns = len(line.split(input_entity.delimiter))
+        with input_entity.open_file() as csvfile:
+            for ncolumns in tokenizer.count_fields(csvfile):
                 ncolumns_occurence_dict.setdefault(ncolumns, 0)
                 ncolumns_occurence_dict[ncolumns] += 1
                 largest_ncolumns = max(largest_ncolumns, ncolumns)
@@ -948,7 +1615,8 @@ class OutputDataEntity:
     VALUE_COLNAME: str = "Value"
 
     def __init__(self) -> None:
-        self.file_path: Path = Path()
+        self.file_path: Path = Path()  # - path of the processed data in CSV format (required by GAMS)
+        self.parquet_file_path: Optional[Path] = None  # - path of the processed data in Parquet format, once saved
         # A pandas dataframe that store our processed data
         # Data frame specification
         # 1. follows the column arrangement dictated by the GlobalEcon team
@@ -962,6 +1630,19 @@ class OutputDataEntity:
         self.unique_variables: List[str] = []
         self.unique_items: List[str] = []
         self.unique_years: List[str] = []
+        # Private attributes to help rebuild the processed data incrementally when the actions selected for unknown
+        # labels change
+        # NOTE: The base data is the processed data before any unknown label action was applied (bad labels have been
+        # fixed). Its label columns are categorical, so relabeling them only requires remapping categories and codes.
+        # @date Oct 19, 2026
+        self._input_diagnosis: Optional[InputDataDiagnosis] = None  # - diagnosis that the base data was derived from
+        self._base_data: pd.DataFrame = DataFrame()
+        self._applied_unknown_label_actions: Dict[Tuple[str, str], Tuple[str, bool]] = {}  # - (column, label) ->
+        # (fix, override)
+        self._fixed_label_columns: Dict[str, pd.Series] = {}  # - base label columns with unknown label fixes applied
+        self._dropped_rows_masks: Dict[str, np.ndarray] = {}  # - base rows containing a dropped label, per column
+        self._out_of_bound_rows_mask: np.ndarray = np.zeros(0, dtype=bool)  # - base rows with an out-of-bound value
+        self._range_checked_fixes: Dict[Tuple[str, str], str] = {}  # - fixes that the mask above was computed for
 
     def get_value_trends_table(self, scenario: str, region: str, variable: str) -> Optional[DataFrameGroupBy]:
         """
@@ -1010,41 +1691,67 @@ class OutputDataEntity:
         return sliced_data.groupby(self.ITEM_COLNAME)
 
     @classmethod
-    def create(cls, input_entity: InputDataEntity, input_diagnosis: InputDataDiagnosis) -> OutputDataEntity:
+    @instrumented(
+        "OutputDataEntity.create",
+        lambda output_entity, *_: (output_entity.processed_data.shape[0], output_entity.file_path.stat().st_size),
+    )
+    def create(cls, input_entity: InputDataEntity, input_diagnosis: InputDataDiagnosis, dst_dir_path: Optional[Path] = None) -> OutputDataEntity:
         """
         Create and return an instance of this class
+        The processed data is stored in the given directory, or in the default download directory
         TODO: Consider abstracting some functionalities in this class into a Factory class and a Service class
         """
+        output_entity = OutputDataEntity()
+        output_entity._input_diagnosis = input_diagnosis
+        output_entity._base_data = cls._create_base_data(input_entity, input_diagnosis)
+        output_entity._out_of_bound_rows_mask = np.zeros(output_entity._base_data.shape[0], dtype=bool)
+        output_entity.file_path = (dst_dir_path if dst_dir_path is not None else DOWNLOADDIR_PATH) / (
+            input_entity.file_stem + datetime.now().strftime("_%m%d%Y_%H%M%S").upper() + ".csv"
+        )
+        # Apply the actions selected for unknown labels and store processed data in a downloadable file
+        output_entity._apply_unknown_label_actions(input_diagnosis.unknown_labels, check_values=False)
+        output_entity._save_processed_data()
+        return output_entity
+
+    def is_derived_from(self, input_diagnosis: InputDataDiagnosis) -> bool:
+        """Return whether this entity was created from the given input data diagnosis"""
+        return self._input_diagnosis is input_diagnosis
+
+    def update_unknown_label_actions(self, unknown_labels: List[UnknownLabelInfo]) -> bool:
+        """
+        Incrementally rebuild the processed data after the actions (fix / override) for unknown labels changed
+        Return whether new records with out-of-bound values were found (and filtered out)
+
+        Only the label columns whose mappings changed are relabeled, and the value range checks are only rerun on the
+        records whose variable or unit label was fixed differently since the last check.
+        Justification: If unknown variables or units were swapped with a valid label, their associated values were 
+        never checked against the acceptable range. So, we want to check and filter them here.
+        """
+        has_changed, has_new_issues = self._apply_unknown_label_actions(unknown_labels, check_values=True)
+        if has_changed:
+            self._save_processed_data()
+        return has_new_issues
+
+    @classmethod
+    def _create_base_data(cls, input_entity: InputDataEntity, input_diagnosis: InputDataDiagnosis) -> pd.DataFrame:
+        """Return a data frame built from the accepted rows, with bad labels fixed and unknown labels left as is"""
         # Read from accepted rows destination file
         # The file should have no header row or lines to skip, and should not have records with any row issues, but 
         # may still contain records with fixable field issues. The records in this file should also not have additional
         # or removed columns. 
         # @ date  Aug 5, 2021
-        processed_data = pd.read_csv(input_diagnosis.ACCEPTEDROWS_DSTPATH, delimiter=input_entity.delimiter, header=None, dtype=object) # type: ignore
-        # Make sure the data frame has all the required 8 columns (not more) in the correct arrangement
-        colnames = processed_data.columns
-        colnames = [
-            colnames[input_entity.scenario_colnum - 1],
-            colnames[input_entity.region_colnum - 1],
-            colnames[input_entity.variable_colnum - 1],
-            colnames[input_entity.item_colnum - 1],
-            colnames[input_entity.unit_colnum - 1],
-            colnames[input_entity.year_colnum - 1],
-            colnames[input_entity.value_colnum - 1],
-        ]
-        processed_data = processed_data[colnames]
+        # NOTE: Default NA values are not parsed, so that values like "NA" can be fixed based on the bad labels info
+        # NOTE: The diagnosis only stores the fields of the assigned columns, in the same order as the output columns
+        processed_data = pd.read_csv(
+            input_diagnosis.ACCEPTEDROWS_DSTPATH, 
+            delimiter=input_entity.delimiter, 
+            header=None, 
+            names=cls._get_colnames()[1:], 
+            dtype=object, 
+            keep_default_na=False,
+            encoding="utf-8"
+        )  # type: ignore
         processed_data.insert(0, cls.MODEL_COLNAME, input_entity.model_name)
-        # Rename data frame columns 
-        processed_data.columns = [
-            cls.MODEL_COLNAME, 
-            cls.SCENARIO_COLNAME,
-            cls.REGION_COLNAME,
-            cls.VARIABLE_COLNAME,
-            cls.ITEM_COLNAME,
-            cls.UNIT_COLNAME,
-            cls.YEAR_COLNAME, 
-            cls.VALUE_COLNAME
-        ]
         # Reassign column dtypes 
         # Note: numeric columns are stored as str because we might have values like NA, N/A, #DIV/0! etc
         processed_data[cls.SCENARIO_COLNAME] = processed_data[cls.SCENARIO_COLNAME].astype("category")  
@@ -1054,146 +1761,239 @@ class OutputDataEntity:
         processed_data[cls.YEAR_COLNAME] = processed_data[cls.YEAR_COLNAME].apply(str)  # TODO: Will this affect performance?
         processed_data[cls.VALUE_COLNAME] = processed_data[cls.VALUE_COLNAME].apply(str)
         processed_data[cls.UNIT_COLNAME] = processed_data[cls.UNIT_COLNAME].astype("category")
-        # Bad / unknown label mapping dictionaries
-        scenariomapping = {}
-        regionmapping = {}
-        variablemapping = {}
-        itemmapping = {}
-        unitmapping = {}
-        yearmapping = {}
-        valuemapping = {}
-        # Dropped labels set
-        droppedscenarios = set()
-        droppedregions = set()
-        droppedvariables = set()
-        droppeditems = set()
-        droppedyears = set()
-        droppedunits = set()
-        droppedvalues = set()
         # Populate the label mapping dictionaries based on the info about bad labels
+        label_mappings: Dict[str, Dict[str, str]] = {}
         for bad_label_info in input_diagnosis.bad_labels:
-            label = bad_label_info.label
-            associatedcol = bad_label_info.associated_column
-            fix = bad_label_info.fix
-            if associatedcol == input_diagnosis.SCENARIO_COLNAME:
-                scenariomapping[label] = fix
-            elif associatedcol == input_diagnosis.REGION_COLNAME:
-                regionmapping[label] = fix
-            elif associatedcol == input_diagnosis.VARIABLE_COLNAME:
-                variablemapping[label] = fix
-            elif associatedcol == input_diagnosis.ITEM_COLNAME:
-                itemmapping[label] = fix
-            elif associatedcol == input_diagnosis.UNIT_COLNAME:
-                unitmapping[label] = fix
-            elif associatedcol == input_diagnosis.YEAR_COLNAME:
-                yearmapping[label] = fix
-            elif associatedcol == input_diagnosis.VALUE_COLNAME:
-                valuemapping[label] = fix
-        # Populate the label mapping dictionaries and dropped labels set based on the info about unknown labels
-        for unknown_label_info in input_diagnosis.unknown_labels:
-            label = unknown_label_info.label
-            associatedcol = unknown_label_info.associated_column
-            fix = unknown_label_info.fix
-            override = unknown_label_info.override
-            assert not ((fix != "") and override)   # Assert that the label is not selected to be both fixed and overridden
-            if fix != "":
-                # Remember fixes
-                if associatedcol == input_diagnosis.SCENARIO_COLNAME:
-                    scenariomapping[label] = fix
-                elif associatedcol == input_diagnosis.REGION_COLNAME:
-                    regionmapping[label] = fix
-                elif associatedcol == input_diagnosis.VARIABLE_COLNAME:
-                    variablemapping[label] = fix
-                elif associatedcol == input_diagnosis.ITEM_COLNAME:
-                    itemmapping[label] = fix
-                elif associatedcol == input_diagnosis.UNIT_COLNAME:
-                    unitmapping[label] = fix
-                elif associatedcol == input_diagnosis.YEAR_COLNAME:
-                    yearmapping[label] = fix
-                elif associatedcol == input_diagnosis.VALUE_COLNAME:
-                    valuemapping[label] = fix
-            elif not override:
-                # Remember labels to be dropped
-                if associatedcol == input_diagnosis.SCENARIO_COLNAME:
-                    droppedscenarios.add(label)
-                elif associatedcol == input_diagnosis.REGION_COLNAME:
-                    droppedregions.add(label)
-                elif associatedcol == input_diagnosis.VARIABLE_COLNAME:
-                    droppedvariables.add(label)
-                elif associatedcol == input_diagnosis.ITEM_COLNAME:
-                    droppeditems.add(label)
-                elif associatedcol == input_diagnosis.YEAR_COLNAME:
-                    droppedyears.add(label)
-                elif associatedcol == input_diagnosis.UNIT_COLNAME:
-                    droppedunits.add(label)
-                elif associatedcol == input_diagnosis.VALUE_COLNAME:
-                    droppedvalues.add(label)
+            colname = cls._get_colname(bad_label_info.associated_column)
+            label_mappings.setdefault(colname, {})[bad_label_info.label] = bad_label_info.fix
         # Apply label fixes 
-        processed_data[cls.SCENARIO_COLNAME] = processed_data[cls.SCENARIO_COLNAME].apply(lambda x: scenariomapping[x] if x in scenariomapping.keys() else x)
-        processed_data[cls.REGION_COLNAME] = processed_data[cls.REGION_COLNAME].apply(lambda x: regionmapping[x] if x in regionmapping.keys() else x)
-        processed_data[cls.VARIABLE_COLNAME] = processed_data[cls.VARIABLE_COLNAME].apply(lambda x: variablemapping[x] if x in variablemapping.keys() else x)
-        processed_data[cls.ITEM_COLNAME] = processed_data[cls.ITEM_COLNAME].apply(lambda x: itemmapping[x] if x in itemmapping.keys() else x)
-        processed_data[cls.UNIT_COLNAME] = processed_data[cls.UNIT_COLNAME].apply(lambda x: unitmapping[x] if x in unitmapping.keys() else x)
-        processed_data[cls.YEAR_COLNAME] = processed_data[cls.YEAR_COLNAME].apply(lambda x: unitmapping[x] if x in unitmapping.keys() else x)
-        processed_data[cls.VALUE_COLNAME] = processed_data[cls.VALUE_COLNAME].apply(lambda x: valuemapping[x] if x in valuemapping.keys() else x)
-        # Drop records containing dropped labels
-        processed_data = processed_data[processed_data[cls.SCENARIO_COLNAME].apply(lambda x: x not in droppedscenarios)]
-        processed_data = processed_data[processed_data[cls.REGION_COLNAME].apply(lambda x: x not in droppedregions)]
-        processed_data = processed_data[processed_data[cls.VARIABLE_COLNAME].apply(lambda x: x not in droppedvariables)]
-        processed_data = processed_data[processed_data[cls.ITEM_COLNAME].apply(lambda x: x not in droppeditems)]
-        processed_data = processed_data[processed_data[cls.YEAR_COLNAME].apply(lambda x: x not in droppedyears)]
-        processed_data = processed_data[processed_data[cls.UNIT_COLNAME].apply(lambda x: x not in droppedunits)]
-        processed_data = processed_data[processed_data[cls.VALUE_COLNAME].apply(lambda x: x not in droppedvalues)]
-        # Create entity
-        output_entity = OutputDataEntity()
-        output_entity.processed_data = processed_data
-        output_entity.file_path = DOWNLOADDIR_PATH / (
-            Path(input_entity.file_path).stem + datetime.now().strftime("_%m%d%Y_%H%M%S").upper() + ".csv"
+        for colname, label_mapping in label_mappings.items():
+            processed_data[colname] = cls._relabel_column(processed_data[colname], label_mapping)
+        return processed_data
+
+    def _apply_unknown_label_actions(self, unknown_labels: List[UnknownLabelInfo], check_values: bool) -> Tuple[bool, bool]:
+        """
+        Apply the actions selected for unknown labels on top of the base data and update the processed data
+        Return whether the processed data changed and whether new records with out-of-bound values were found
+        """
+        label_colnames = [
+            self.SCENARIO_COLNAME,
+            self.REGION_COLNAME,
+            self.VARIABLE_COLNAME,
+            self.ITEM_COLNAME,
+            self.UNIT_COLNAME,
+            self.YEAR_COLNAME,
+            self.VALUE_COLNAME,
+        ]
+        actions: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        for unknown_label_info in unknown_labels:
+            # Assert that the label is not selected to be both fixed and overridden
+            assert not ((unknown_label_info.fix != "") and unknown_label_info.override)
+            colname = self._get_colname(unknown_label_info.associated_column)
+            if colname in label_colnames:  # Ignore dummy rows
+                actions[(colname, unknown_label_info.label)] = (unknown_label_info.fix, unknown_label_info.override)
+        # Relabel the columns whose label mappings changed and recompute their masks of dropped rows
+        changed_colnames = set(
+            key[0]
+            for key in set(actions.keys()) | set(self._applied_unknown_label_actions.keys())
+            if actions.get(key) != self._applied_unknown_label_actions.get(key)
         )
-        # Store processed data in a downloadable file
-        processed_data.to_csv(output_entity.file_path, header=False, index=False)
-        # Populate list of unique fields
-        cls._populate_unique_fields(output_entity)
-        # Return
-        return output_entity
+        for colname in changed_colnames:
+            base_column = self._base_data[colname]
+            label_mapping = {label: fix for (col, label), (fix, _) in actions.items() if (col == colname) and (fix != "")}
+            dropped_labels = [
+                label for (col, label), (fix, override) in actions.items() 
+                if (col == colname) and (fix == "") and (not override)
+            ]
+            self._fixed_label_columns[colname] = self._relabel_column(base_column, label_mapping)
+            self._dropped_rows_masks[colname] = base_column.isin(dropped_labels).to_numpy()
+        self._applied_unknown_label_actions = actions
+        # Re-check the values in records whose variable or unit label was fixed differently since the last check
+        has_new_issues = False
+        if check_values:
+            has_new_issues = self._check_values_of_relabeled_rows(actions)
+        has_been_built = len(self.processed_data.columns) > 0
+        if has_been_built and (len(changed_colnames) == 0) and (not has_new_issues):
+            return False, False
+        # Build the processed data from the base data
+        processed_data = DataFrame(
+            {
+                colname: self._fixed_label_columns.get(colname, self._base_data[colname]) 
+                for colname in self._base_data.columns
+            }
+        )
+        dropped_rows_mask = self._out_of_bound_rows_mask.copy()
+        for mask in self._dropped_rows_masks.values():
+            dropped_rows_mask |= mask
+        self.processed_data = processed_data[~dropped_rows_mask]
+        return True, has_new_issues
+
+    def _check_values_of_relabeled_rows(self, actions: Dict[Tuple[str, str], Tuple[str, bool]]) -> bool:
+        """
+        Update the mask of base rows with out-of-bound values, only for rows whose variable or unit fix changed
+        Return whether new records with out-of-bound values were found
+        """
+        fixes = {
+            key: fix
+            for key, (fix, _) in actions.items() 
+            if (key[0] in [self.VARIABLE_COLNAME, self.UNIT_COLNAME]) and (fix != "")
+        }
+        stale_keys = set(
+            key
+            for key in set(fixes.keys()) | set(self._range_checked_fixes.keys())
+            if fixes.get(key) != self._range_checked_fixes.get(key)
+        )
+        self._range_checked_fixes = fixes
+        if len(stale_keys) == 0:
+            return False
+        variables = self._base_data[self.VARIABLE_COLNAME]
+        units = self._base_data[self.UNIT_COLNAME]
+        stale_rows_mask = (
+            variables.isin([label for (col, label) in stale_keys if col == self.VARIABLE_COLNAME]).to_numpy()
+            | units.isin([label for (col, label) in stale_keys if col == self.UNIT_COLNAME]).to_numpy()
+        )
+        # Forget previous results for stale rows, and only re-check the ones that are still fixed
+        self._out_of_bound_rows_mask[stale_rows_mask] = False
+        fixed_rows_mask = (
+            variables.isin([label for (col, label) in fixes.keys() if col == self.VARIABLE_COLNAME]).to_numpy()
+            | units.isin([label for (col, label) in fixes.keys() if col == self.UNIT_COLNAME]).to_numpy()
+        )
+        rows_to_check = np.flatnonzero(stale_rows_mask & fixed_rows_mask)
+        if rows_to_check.size == 0:
+            return False
+        checked_data = DataFrame(
+            {
+                "variable": np.asarray(self._fixed_label_columns[self.VARIABLE_COLNAME].iloc[rows_to_check], dtype=str)
+                if self.VARIABLE_COLNAME in self._fixed_label_columns
+                else np.asarray(variables.iloc[rows_to_check], dtype=str),
+                "unit": np.asarray(self._fixed_label_columns[self.UNIT_COLNAME].iloc[rows_to_check], dtype=str)
+                if self.UNIT_COLNAME in self._fixed_label_columns
+                else np.asarray(units.iloc[rows_to_check], dtype=str),
+                "value": pd.to_numeric(self._base_data[self.VALUE_COLNAME].iloc[rows_to_check], errors="coerce").to_numpy(),
+            }
+        )
+        # Query min/max values once per (variable, unit) pair instead of once per row
+        bounds = checked_data[["variable", "unit"]].drop_duplicates()
+        variable_unit_pairs = list(bounds.itertuples(index=False, name=None))
+        bounds["min"] = [DataRuleRepository.query_variable_min_value(var, unit) for var, unit in variable_unit_pairs]
+        bounds["max"] = [DataRuleRepository.query_variable_max_value(var, unit) for var, unit in variable_unit_pairs]
+        checked_data = checked_data.merge(bounds, how="left", on=["variable", "unit"])
+        out_of_bound = ((checked_data["value"] < checked_data["min"]) | (checked_data["value"] > checked_data["max"])).to_numpy()
+        self._out_of_bound_rows_mask[rows_to_check[out_of_bound]] = True
+        return bool(out_of_bound.any())
 
     @classmethod
-    def create_from_rediagnosed_n_filtered_output_data(cls, input_entity: InputDataEntity, input_data_diagnosis: InputDataDiagnosis) -> OutputDataEntity:
-        """Return an output data entity based by using existing output dataset that has been rediagnosed, and filtered"""
-        # Read from accepted rows destination file
-        processed_data = pd.read_csv(input_data_diagnosis.FILTERED_OUTPUT_DSTPATH, delimiter=input_entity.delimiter, header=None, dtype=object) # type: ignore
-        # Rename data frame columns 
-        processed_data.columns = [
-            cls.MODEL_COLNAME, 
+    def read_processed_file(cls, file_path: Path, colnames: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read a processed data file (in CSV or Parquet format) and return its content in a data frame
+        Only the given columns are read, if any (the Parquet format stores each column separately, so the other columns
+        are not loaded at all)
+        Unlike our processed data, the returned data frame stores the year and value columns with numeric types
+        """
+        if file_path.suffix == ".parquet":
+            return pd.read_parquet(file_path, columns=colnames)
+        processed_data = pd.read_csv(
+            file_path,
+            header=None,
+            names=cls._get_colnames(),
+            usecols=colnames,
+            dtype={colname: "category" for colname in cls._get_label_colnames()},  # type: ignore
+            keep_default_na=False,
+        )
+        return cls._assign_typed_dtypes(processed_data)
+
+    def save_parquet_file(self) -> Optional[Path]:
+        """
+        Store the processed data in Parquet format next to its CSV file, and return the Parquet file's path
+        Return None if the Parquet format is not supported (see PARQUET_IS_SUPPORTED)
+        NOTE: This is only done once the processed data is final (e.g. at submission), since unknown label actions may
+        still change it many times before
+        """
+        if not PARQUET_IS_SUPPORTED:
+            return None
+        # Categorical label columns are dictionary-encoded by pyarrow
+        self.parquet_file_path = self.file_path.with_suffix(".parquet")
+        self._assign_typed_dtypes(self.processed_data.copy()).to_parquet(self.parquet_file_path, index=False)
+        return self.parquet_file_path
+
+    def _save_processed_data(self) -> None:
+        """Store processed data in a downloadable file and populate the lists of unique fields"""
+        self.processed_data.to_csv(self.file_path, header=False, index=False)
+        self.parquet_file_path = None  # - a previously saved Parquet file is outdated now
+        self._populate_unique_fields(self)
+
+    @classmethod
+    def _assign_typed_dtypes(cls, processed_data: pd.DataFrame) -> pd.DataFrame:
+        """Convert the label columns of the data frame into categorical columns and its year & value columns into 
+        numeric columns"""
+        for colname in cls._get_label_colnames():
+            if colname in processed_data.columns:
+                processed_data[colname] = processed_data[colname].astype("category")
+        if cls.YEAR_COLNAME in processed_data.columns:
+            processed_data[cls.YEAR_COLNAME] = pd.to_numeric(processed_data[cls.YEAR_COLNAME]).astype("int64")
+        if cls.VALUE_COLNAME in processed_data.columns:
+            processed_data[cls.VALUE_COLNAME] = pd.to_numeric(processed_data[cls.VALUE_COLNAME], errors="coerce")
+        return processed_data
+
+    @classmethod
+    def _get_colnames(cls) -> List[str]:
+        """Return the column names of the processed data, in the correct arrangement"""
+        return [
+            cls.MODEL_COLNAME,
             cls.SCENARIO_COLNAME,
             cls.REGION_COLNAME,
             cls.VARIABLE_COLNAME,
             cls.ITEM_COLNAME,
             cls.UNIT_COLNAME,
-            cls.YEAR_COLNAME, 
-            cls.VALUE_COLNAME
+            cls.YEAR_COLNAME,
+            cls.VALUE_COLNAME,
         ]
-        # Reassign column dtypes 
-        # Note: numeric columns are stored as str because we might have values like NA, N/A, #DIV/0! etc
-        processed_data[cls.SCENARIO_COLNAME] = processed_data[cls.SCENARIO_COLNAME].astype("category")  
-        processed_data[cls.REGION_COLNAME] = processed_data[cls.REGION_COLNAME].astype("category")  
-        processed_data[cls.VARIABLE_COLNAME] = processed_data[cls.VARIABLE_COLNAME].astype("category")  
-        processed_data[cls.ITEM_COLNAME] = processed_data[cls.ITEM_COLNAME].astype("category")
-        processed_data[cls.YEAR_COLNAME] = processed_data[cls.YEAR_COLNAME].apply(str)  # TODO: Will this affect performance?
-        processed_data[cls.VALUE_COLNAME] = processed_data[cls.VALUE_COLNAME].apply(str)
-        processed_data[cls.UNIT_COLNAME] = processed_data[cls.UNIT_COLNAME].astype("category")
-        # Create entity
-        output_entity = OutputDataEntity()
-        output_entity.processed_data = processed_data
-        output_entity.file_path = DOWNLOADDIR_PATH / (
-            Path(input_entity.file_path).stem + datetime.now().strftime("_%m%d%Y_%H%M%S").upper() + ".csv"
+
+    @classmethod
+    def _get_label_colnames(cls) -> List[str]:
+        """Return the names of the processed data's columns that store labels"""
+        return [
+            cls.MODEL_COLNAME,
+            cls.SCENARIO_COLNAME,
+            cls.REGION_COLNAME,
+            cls.VARIABLE_COLNAME,
+            cls.ITEM_COLNAME,
+            cls.UNIT_COLNAME,
+        ]
+
+    @classmethod
+    def _get_colname(cls, associated_column: str) -> str:
+        """Return the processed data's column name for the given associated column of a bad / unknown label"""
+        return {
+            InputDataDiagnosis.SCENARIO_COLNAME: cls.SCENARIO_COLNAME,
+            InputDataDiagnosis.REGION_COLNAME: cls.REGION_COLNAME,
+            InputDataDiagnosis.VARIABLE_COLNAME: cls.VARIABLE_COLNAME,
+            InputDataDiagnosis.ITEM_COLNAME: cls.ITEM_COLNAME,
+            InputDataDiagnosis.UNIT_COLNAME: cls.UNIT_COLNAME,
+            InputDataDiagnosis.YEAR_COLNAME: cls.YEAR_COLNAME,
+            InputDataDiagnosis.VALUE_COLNAME: cls.VALUE_COLNAME,
+        }.get(associated_column, "")
+
+    @staticmethod
+    def _relabel_column(column: pd.Series, label_mapping: Dict[str, str]) -> pd.Series:
+        """
+        Return a copy of the column with its labels replaced based on the given mapping
+        For categorical columns, only the categories and codes are remapped, which avoids touching every field
+        """
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            return column.replace(label_mapping)
+        categories = [str(category) for category in column.cat.categories]
+        if not any(category in label_mapping for category in categories):
+            return column
+        relabeled_categories = [label_mapping.get(category, category) for category in categories]
+        new_categories = list(dict.fromkeys(relabeled_categories))  # Remove duplicates while preserving order
+        new_category_codes = {category: code for code, category in enumerate(new_categories)}
+        # The trailing -1 maps the code of missing fields (-1) to itself
+        code_mapping = np.array([new_category_codes[category] for category in relabeled_categories] + [-1])
+        new_codes = code_mapping[column.cat.codes.to_numpy()]
+        return pd.Series(
+            pd.Categorical.from_codes(new_codes, categories=new_categories), index=column.index, name=column.name
         )
-        # Store processed data in a downloadable file
-        processed_data.to_csv(output_entity.file_path, header=False, index=False)
-        # Populate list of unique fields
-        cls._populate_unique_fields(output_entity)
-        # Return
-        return output_entity
 
     @classmethod
     def _populate_unique_fields(cls, output_entity: OutputDataEntity) -> None:
@@ -1218,6 +2018,626 @@ class OutputDataEntity:
         output_entity.unique_years.sort()
 
 
+class MergedDataCube:
+    """
+    A domain entity that represents the merged data cube of a project
+    The cube contains the unique records of all accepted submissions in the project's submission directory, and it is
+    stored as a partitioned store. Records are partitioned by their model and then by their scenario, with one 
+    (headerless) CSV file per partition:
+
+        <submission dir>/merged/<model>/v<version>/<scenario>.csv
+
+    A manifest lists the partitions of each model and the submission files they were merged from. When a submission 
+    is added, only the partitions of the scenarios it has records for are rewritten, from their current content and 
+    the new file. When a submission is modified or removed, the partitions of its models are rebuilt. The written 
+    partitions are put into a new version directory (partitions that did not change keep referring to their current 
+    files), and are only made visible by atomically replacing the manifest, so readers never see a partially written 
+    model. Concurrent submitters merge one after another, by holding a lock on the store. Readers (e.g. GAMS export or
+    admin views) can read the partitions they need instead of one ever-growing file.
+    @date Oct 19, 2026
+    """
+
+    STOREDIR_NAME = "merged"
+    MANIFEST_NAME = "manifest.json"
+    LOCKFILE_NAME = ".lock"
+    _NLINES_IN_CHUNK = 100000
+
+    def __init__(self) -> None:
+        self.dir_path: Path = Path()  # - submission directory of the project
+        # - names of the merged submission files, mapped to their sizes and the models of their records
+        self.merged_files: Dict[str, dict] = {}
+        # - partitions of each model, i.e. {model: {"version": int, "scenarios": {scenario: {"path": str, "nrows": int}}}}
+        self.partitions: Dict[str, dict] = {}
+
+    @classmethod
+    def create(cls, dir_path: Path) -> MergedDataCube:
+        """
+        Create an instance of this class from the given submission directory
+        The cube will be rebuilt from scratch if its manifest does not exist or if it is out of sync with the store
+        """
+        assert dir_path.is_dir()
+        cube = MergedDataCube()
+        cube.dir_path = dir_path
+        if not cube._load():
+            cube.rebuild()
+        return cube
+
+    @property
+    def store_dir_path(self) -> Path:
+        return self.dir_path / self.STOREDIR_NAME
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.store_dir_path / self.MANIFEST_NAME
+
+    @property
+    def nrows(self) -> int:
+        """Number of records in the cube"""
+        return sum(
+            partition["nrows"]
+            for model_partitions in self.partitions.values()
+            for partition in model_partitions["scenarios"].values()
+        )
+
+    @instrumented("MergedDataCube.merge_new_submissions", lambda _, cube: (cube.nrows, 0))
+    def merge_new_submissions(self) -> List[str]:
+        """
+        Update the partitions of models whose submission files have been added, modified or removed since the last
+        merge. Return the updated models
+        """
+        with self._lock():
+            if not self._load():  # Reload, since another submitter may have merged since this cube was loaded
+                self._rebuild()
+                return sorted(self.partitions.keys())
+            submission_file_paths = self._get_submission_file_paths()
+            submission_file_sizes = {file_path.name: file_path.stat().st_size for file_path in submission_file_paths}
+            rebuilt_models: Set[str] = set()  # - models with modified or removed files
+            for file_name, file_info in list(self.merged_files.items()):
+                if submission_file_sizes.get(file_name) != file_info["size"]:
+                    rebuilt_models.update(file_info["models"])
+                    del self.merged_files[file_name]
+            added_file_paths: Dict[str, List[Path]] = {}  # - added files, mapped by the models of their records
+            for file_path in submission_file_paths:
+                if file_path.name not in self.merged_files:
+                    file_models = self._scan_models(file_path)
+                    self.merged_files[file_path.name] = {"size": submission_file_sizes[file_path.name], "models": file_models}
+                    for model in file_models:
+                        added_file_paths.setdefault(model, []).append(file_path)
+            affected_models = sorted(rebuilt_models | set(added_file_paths.keys()))
+            if len(affected_models) == 0:
+                return []
+            self._update_models(
+                affected_models,
+                {model: file_paths for model, file_paths in added_file_paths.items() if model not in rebuilt_models},
+            )
+            return affected_models
+
+    def rebuild(self) -> None:
+        """Rebuild all partitions of the cube from scratch"""
+        with self._lock():
+            self._rebuild()
+
+    def get_partition_paths(self, models: Optional[List[str]] = None, scenarios: Optional[List[str]] = None) -> List[Path]:
+        """Return the paths of the partitions of the given models and scenarios (or of all of them, if not given)"""
+        partition_paths = []
+        for model in sorted(self.partitions.keys()):
+            if (models is not None) and (model not in models):
+                continue
+            model_scenarios = self.partitions[model]["scenarios"]
+            for scenario in sorted(model_scenarios.keys()):
+                if (scenarios is not None) and (scenario not in scenarios):
+                    continue
+                partition_paths.append(self.store_dir_path / model_scenarios[scenario]["path"])
+        return partition_paths
+
+    def read_partitions(self, models: Optional[List[str]] = None, scenarios: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read the partitions of the given models and scenarios into a (typed) processed data frame"""
+        partition_paths = self.get_partition_paths(models, scenarios)
+        if len(partition_paths) == 0:
+            return OutputDataEntity._assign_typed_dtypes(pd.DataFrame(columns=OutputDataEntity._get_colnames()))
+        merged_data = pd.concat(
+            [OutputDataEntity.read_processed_file(path) for path in partition_paths], ignore_index=True
+        )
+        # Concatenating categorical columns with different categories produces object columns
+        return OutputDataEntity._assign_typed_dtypes(merged_data)
+
+    def write_merged_file(self, file_path: Path, models: Optional[List[str]] = None, scenarios: Optional[List[str]] = None) -> None:
+        """Write the records of the given models and scenarios into a single (headerless) CSV file"""
+        with open(str(file_path), "wb") as mergedfile:
+            for partition_path in self.get_partition_paths(models, scenarios):
+                with open(str(partition_path), "rb") as partitionfile:
+                    shutil.copyfileobj(partitionfile, mergedfile)
+
+    def _rebuild(self) -> None:
+        """Rebuild all partitions of the cube from scratch (the caller must hold the lock)"""
+        self.merged_files = {}
+        self.partitions = {}
+        for file_path in self._get_submission_file_paths():
+            self.merged_files[file_path.name] = {"size": file_path.stat().st_size, "models": self._scan_models(file_path)}
+        existing_models = [path.name for path in self.store_dir_path.glob("*") if path.is_dir()]
+        source_models = [model for file_info in self.merged_files.values() for model in file_info["models"]]
+        # Models that exist in the store but not in any submission file are removed by the rebuild
+        self._update_models(sorted(set(source_models) | {self._unquote(model) for model in existing_models}), {})
+
+    def _update_models(self, models: List[str], added_file_paths: Dict[str, List[Path]]) -> None:
+        """
+        Update the partitions of the given models, then commit them by replacing the manifest
+        Models in added_file_paths only had files added, so the records of those files are added to their current 
+        partitions. The other models are rebuilt from all of their submission files.
+        """
+        for model in models:
+            if (model in added_file_paths) and (model in self.partitions):
+                base_partitions = self.partitions[model]["scenarios"]
+                source_file_paths = added_file_paths[model]
+            else:
+                base_partitions = {}
+                source_file_paths = [
+                    self.dir_path / file_name
+                    for file_name, file_info in sorted(self.merged_files.items())
+                    if model in file_info["models"]
+                ]
+            if len(source_file_paths) == 0:
+                self.partitions.pop(model, None)
+                continue
+            version = self.partitions.get(model, {}).get("version", 0) + 1
+            self.partitions[model] = {
+                "version": version,
+                "scenarios": self._write_model_partitions(model, version, source_file_paths, base_partitions),
+            }
+        self._save()
+        # Old versions are unreachable once the new manifest is in place
+        for model in models:
+            self._remove_stale_versions(model)
+
+    def _write_model_partitions(
+        self, model: str, version: int, file_paths: List[Path], base_partitions: Dict[str, dict]
+    ) -> Dict[str, dict]:
+        """
+        Stream the records of the model in the given files into a new version directory, one file per scenario, and
+        return the info of the model's partitions
+        The records are added to the given base partitions. Only the partitions of scenarios with records in the files
+        are written, and the other base partitions keep referring to their current files.
+        """
+        model_dir_path = self.store_dir_path / self._quote(model)
+        model_dir_path.mkdir(parents=True, exist_ok=True)
+        # The partitions are written into a unique temporary directory first, which is then renamed into place
+        temp_dir_path = model_dir_path / ".v{}.{}.{}.tmp".format(version, os.getpid(), uuid.uuid4().hex)
+        temp_dir_path.mkdir()
+        partitions = dict(base_partitions)
+        try:
+            staging_file_paths = self._stage_model_records(model, file_paths, temp_dir_path)
+            for scenario, staging_file_path in staging_file_paths.items():
+                relative_path = Path(self._quote(model)) / f"v{version}" / f"{self._quote(scenario)}.csv"
+                src_file_paths = [staging_file_path]
+                if scenario in base_partitions:
+                    src_file_paths.insert(0, self.store_dir_path / base_partitions[scenario]["path"])
+                nrows = self._write_unique_records(src_file_paths, temp_dir_path / relative_path.name)
+                staging_file_path.unlink()
+                partitions[scenario] = {"path": relative_path.as_posix(), "nrows": nrows}
+            version_dir_path = model_dir_path / f"v{version}"
+            if version_dir_path.exists():  # Leftover of an interrupted merge (merges are serialized by the lock)
+                shutil.rmtree(str(version_dir_path))
+            os.rename(str(temp_dir_path), str(version_dir_path))
+        except BaseException:
+            shutil.rmtree(str(temp_dir_path), ignore_errors=True)
+            raise
+        return partitions
+
+    def _stage_model_records(self, model: str, file_paths: List[Path], dir_path: Path) -> Dict[str, Path]:
+        """
+        Split the records of the model in the given files by their scenario, into staging files in the given directory.
+        Return the paths of the staging files, mapped by their scenario
+        """
+        staging_file_paths: Dict[str, Path] = {}
+        staging_files: Dict[str, TextIOWrapper] = {}
+        try:
+            for file_path in file_paths:
+                for lines in self._read_chunks(file_path):
+                    for line, row in zip(lines, csv.reader(lines)):
+                        if (len(row) < 2) or (row[0] != model):
+                            continue
+                        scenario = row[1]
+                        if scenario not in staging_files:
+                            staging_file_paths[scenario] = dir_path / f"{self._quote(scenario)}.staging"
+                            staging_files[scenario] = open(str(staging_file_paths[scenario]), "w", encoding="utf-8")
+                        staging_files[scenario].write(line + "\n")
+        finally:
+            for stagingfile in staging_files.values():
+                stagingfile.close()
+        return staging_file_paths
+
+    def _write_unique_records(self, src_file_paths: List[Path], dst_file_path: Path) -> int:
+        """
+        Write the unique records of the given files into the destination file, and return their number
+        NOTE: Duplicates are removed per partition, so only the hashes of one partition are held in memory at a time
+        """
+        merged_keys: Set[int] = set()  # - hashes of the records written so far
+        with open(str(dst_file_path), "w", encoding="utf-8") as partitionfile:
+            for src_file_path in src_file_paths:
+                for lines in self._read_chunks(src_file_path):
+                    for line in lines:
+                        key = self._hash_record(line)
+                        if key in merged_keys:
+                            continue
+                        merged_keys.add(key)
+                        partitionfile.write(line + "\n")
+        return len(merged_keys)
+
+    def _remove_stale_versions(self, model: str) -> None:
+        """Remove the version directories of the model that are not referenced by the manifest"""
+        model_dir_path = self.store_dir_path / self._quote(model)
+        if not model_dir_path.is_dir():
+            return
+        if model not in self.partitions:
+            shutil.rmtree(str(model_dir_path), ignore_errors=True)
+            return
+        # Partitions that did not change may still be in older version directories
+        referenced_dirnames = {
+            Path(partition["path"]).parent.name for partition in self.partitions[model]["scenarios"].values()
+        }
+        referenced_dirnames.add(f"v{self.partitions[model]['version']}")
+        for version_dir_path in model_dir_path.iterdir():
+            if version_dir_path.name not in referenced_dirnames:
+                shutil.rmtree(str(version_dir_path), ignore_errors=True)
+
+    def _scan_models(self, file_path: Path) -> List[str]:
+        """
+        Return the models of the records in the given submission file
+        The models are read from the model column of the submission's Parquet copy, if it is up to date, instead of
+        parsing every line of the CSV file
+        """
+        parquet_file_path = file_path.with_suffix(".parquet")
+        if (
+            PARQUET_IS_SUPPORTED
+            and parquet_file_path.is_file()
+            and parquet_file_path.stat().st_mtime >= file_path.stat().st_mtime  # - the CSV file was not modified since
+        ):
+            model_column = OutputDataEntity.read_processed_file(
+                parquet_file_path, [OutputDataEntity.MODEL_COLNAME]
+            )[OutputDataEntity.MODEL_COLNAME]
+            return sorted(str(model) for model in model_column.unique())
+        models: Set[str] = set()
+        for lines in self._read_chunks(file_path):
+            models.update(row[0] for row in csv.reader(lines) if len(row) > 0)
+        return sorted(models)
+
+    def _read_chunks(self, file_path: Path):
+        """Yield the non-empty lines of the given file in chunks, without their line terminators"""
+        with open(str(file_path), "r", encoding="utf-8") as submissionfile:
+            while True:
+                lines = submissionfile.readlines(self._NLINES_IN_CHUNK * 64)  # ~64 bytes per line
+                if len(lines) == 0:
+                    break
+                yield [line.rstrip("\r\n") for line in lines if line.strip() != ""]
+
+    def _get_submission_file_paths(self) -> List[Path]:
+        """Return the paths of the accepted submission files, sorted by their names"""
+        # Override requests are stored next to the submission files but they contain no records
+        return sorted(
+            file_path for file_path in self.dir_path.glob("*.csv") if not file_path.name.endswith("_OverrideInfo.csv")
+        )
+
+    def _load(self) -> bool:
+        """Load the cube's manifest. Return False if it is missing or out of sync with the store"""
+        if not self.manifest_path.is_file():
+            return False
+        try:
+            with open(str(self.manifest_path), "r", encoding="utf-8") as manifestfile:
+                manifest = json.load(manifestfile)
+            self.merged_files = dict(manifest["merged_files"])
+            self.partitions = dict(manifest["partitions"])
+        except (ValueError, KeyError, OSError):
+            return False
+        return all(path.is_file() for path in self.get_partition_paths())
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the store, so that concurrent submitters merge one after another"""
+        self.store_dir_path.mkdir(exist_ok=True)
+        with open(str(self.store_dir_path / self.LOCKFILE_NAME), "a") as lockfile:
+            if fcntl is not None:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+    def _save(self) -> None:
+        """Atomically replace the cube's manifest"""
+        self.store_dir_path.mkdir(exist_ok=True)
+        manifest = {"merged_files": self.merged_files, "partitions": self.partitions}
+        temp_manifest_path = self.manifest_path.with_suffix(".tmp")
+        with open(str(temp_manifest_path), "w", encoding="utf-8") as manifestfile:
+            json.dump(manifest, manifestfile, indent=2)
+        os.replace(str(temp_manifest_path), str(self.manifest_path))
+
+    @staticmethod
+    def _quote(label: str) -> str:
+        """Return the label escaped so that it can be used as a file name"""
+        return urllib.parse.quote(label, safe="")
+
+    @staticmethod
+    def _unquote(file_name: str) -> str:
+        return urllib.parse.unquote(file_name)
+
+    @staticmethod
+    def _hash_record(record: str) -> int:
+        """
+        Return a 64-bit hash of the record
+        NOTE: Python's built-in hash() is salted per process, so it cannot be used for hashes that are stored in files
+        """
+        return int.from_bytes(hashlib.blake2b(record.encode(), digest_size=8).digest(), "little")
+
+
+class SubmittedFileInfo:
+    """
+    A value model to store information about a file submitted to a GlobalEcon project
+    The metadata attributes are only known for files recorded at submit time, so they are left empty for files 
+    submitted before the submission index existed
+    @date Oct 19, 2026
+    """
+
+    ACCEPTED = "Accepted"
+    PENDING = "Pending"
+
+    def __init__(self, file_name: str, project_dirname: str, status: str, size: int, modified_time: datetime) -> None:
+        self.file_name: str = file_name
+        self.project_dirname: str = project_dirname
+        self.status: str = status  # - ACCEPTED or PENDING
+        self.size: int = size  # - in bytes
+        self.modified_time: datetime = modified_time  # - submission time
+        # Metadata recorded at submit time
+        self.submitter: str = ""  # - username of the submitter
+        self.model_name: str = ""
+        self.nrows_accepted: Optional[int] = None
+        self.nrows_w_struct_issue: Optional[int] = None
+        self.nrows_w_ignored_scenario: Optional[int] = None
+        self.nrows_duplicates: Optional[int] = None
+        self.overridden_labels: Optional[int] = None  # - number of labels that need an override approval
+        self.file_hash: str = ""  # - SHA-256 digest of the file content
+
+    def serialize(self) -> str:
+        """Serialize self into a JSON line of the submission index"""
+        attributes = dict(vars(self))
+        attributes["modified_time"] = self.modified_time.isoformat()
+        return json.dumps(attributes)
+
+    @classmethod
+    def deserialize(cls, line: str) -> SubmittedFileInfo:
+        """Create an instance of this class from a JSON line of the submission index"""
+        attributes = json.loads(line)
+        file_info = SubmittedFileInfo(
+            attributes["file_name"],
+            attributes["project_dirname"],
+            attributes["status"],
+            attributes["size"],
+            datetime.fromisoformat(attributes["modified_time"]),
+        )
+        for name, value in attributes.items():
+            if hasattr(file_info, name) and name not in ["file_name", "project_dirname", "status", "size", "modified_time"]:
+                setattr(file_info, name, value)
+        return file_info
+
+
+class SubmissionRepository:
+    """
+    Provide interfaces to record and query the files submitted to the GlobalEcon projects in the shared directory
+
+    The project directories are the source of truth for which files exist and whether they are accepted or pending, 
+    since admins approve pending files by moving them outside of this application. Every file system call is slow on 
+    the iRODS mount, so directories are listed with os.scandir (which gets the entry types for free) and the project 
+    directories are scanned in parallel. The listing of each scanned directory is cached along with the directory's 
+    mtime, which changes whenever an entry is added, removed or renamed. An unchanged directory thus costs a single 
+    stat call.
+    NOTE: Submitted files are never overwritten in place (their names are timestamped), so the directory mtime is
+    enough to invalidate the cached file sizes as well
+
+    Each project also keeps a JSON-lines index in its submission directory, to which an entry is appended whenever a 
+    file is submitted. The index only adds metadata (like the submitter) to the listed files, and each parsed index is 
+    cached until the index file changes.
+    @date Oct 19, 2026
+    """
+
+    PROJECTDIR_PREFIX = "agmipglobalecon"
+    INDEXFILE_NAME = ".index.jsonl"
+    _NWORKERS = 8
+
+    def __init__(self, shareddir_path: Path) -> None:
+        self.shareddir_path: Path = shareddir_path
+        # - listing of scanned directories, i.e. {dir path: (dir mtime, [(entry name, is dir, size, mtime), ...])}
+        self._dir_listings_cache: Dict[str, Tuple[int, List[Tuple[str, bool, int, float]]]] = {}
+        # - parsed indexes, i.e. {index path: ((index mtime, index size), {file name: file info})}
+        self._indexes_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, SubmittedFileInfo]]] = {}
+
+    def query_submitted_files_info(self) -> List[SubmittedFileInfo]:
+        """Return the info of files submitted to all projects, grouped by project"""
+        project_dirnames = sorted(
+            name
+            for name, is_dir, _, _ in self._list_dir(self.shareddir_path)
+            if is_dir and name.startswith(self.PROJECTDIR_PREFIX)
+        )
+        if len(project_dirnames) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self._NWORKERS, len(project_dirnames))) as executor:
+            projects_files_info = list(executor.map(self.query_project_submitted_files_info, project_dirnames))
+        return [file_info for project_files_info in projects_files_info for file_info in project_files_info]
+
+    def query_project_submitted_files_info(self, project_dirname: str) -> List[SubmittedFileInfo]:
+        """Return the info of the accepted and pending files submitted to the given project"""
+        submissiondir_path = self.shareddir_path / project_dirname / ".submissions"
+        recorded_files_info = self._read_index(self._get_index_path(project_dirname))
+        files_info = []
+        for name, is_dir, size, mtime in self._list_dir(submissiondir_path):
+            if (not is_dir) and name.endswith(".csv"):
+                files_info.append(
+                    self._create_file_info(
+                        name, project_dirname, SubmittedFileInfo.ACCEPTED, size, mtime, recorded_files_info.get(name)
+                    )
+                )
+        for name, is_dir, size, mtime in self._list_dir(submissiondir_path / ".pending"):
+            # Override requests are stored next to the pending files, and their names end with "_OverrideInfo.csv"
+            if (not is_dir) and name.endswith(".csv") and name[: -len(".csv")][-1:].isdigit():
+                files_info.append(
+                    self._create_file_info(
+                        name, project_dirname, SubmittedFileInfo.PENDING, size, mtime, recorded_files_info.get(name)
+                    )
+                )
+        return files_info
+
+    def record_submission(self, file_info: SubmittedFileInfo) -> None:
+        """Record the metadata of a submitted file in its project's index"""
+        with open(str(self._get_index_path(file_info.project_dirname)), "a") as indexfile:
+            indexfile.write(file_info.serialize() + "\n")
+
+    @staticmethod
+    def _create_file_info(
+        file_name: str,
+        project_dirname: str,
+        status: str,
+        size: int,
+        mtime: float,
+        recorded_file_info: Optional[SubmittedFileInfo],
+    ) -> SubmittedFileInfo:
+        """
+        Create the info of a listed file, with the metadata of its index entry (if any)
+        The status and size always come from the listing, and the recorded submission time replaces the file's mtime
+        """
+        if recorded_file_info is None:
+            return SubmittedFileInfo(file_name, project_dirname, status, size, datetime.fromtimestamp(mtime))
+        file_info = copy(recorded_file_info)
+        file_info.project_dirname = project_dirname
+        file_info.status = status
+        file_info.size = size
+        return file_info
+
+    def _get_index_path(self, project_dirname: str) -> Path:
+        return self.shareddir_path / project_dirname / ".submissions" / self.INDEXFILE_NAME
+
+    def _read_index(self, index_path: Path) -> Dict[str, SubmittedFileInfo]:
+        """Return the submitted files info in the given index mapped by file name, with later entries replacing earlier ones"""
+        try:
+            index_stat = index_path.stat()
+        except OSError:
+            return {}
+        index_version = (index_stat.st_mtime_ns, index_stat.st_size)
+        cached_index = self._indexes_cache.get(str(index_path))
+        if (cached_index is not None) and (cached_index[0] == index_version):
+            return cached_index[1]
+        files_info: Dict[str, SubmittedFileInfo] = {}
+        with open(str(index_path), "r") as indexfile:
+            for line in indexfile:
+                if line.strip() == "":
+                    continue
+                try:
+                    file_info = SubmittedFileInfo.deserialize(line)
+                except (ValueError, KeyError):  # E.g. a partially written entry
+                    continue
+                files_info[file_info.file_name] = file_info
+        self._indexes_cache[str(index_path)] = (index_version, files_info)
+        return files_info
+
+    def _list_dir(self, dir_path: Path) -> List[Tuple[str, bool, int, float]]:
+        """
+        Return the subdirectories and CSV files in the given directory, along with the sizes and mtimes of the files
+        A missing directory is treated as an empty one
+        """
+        try:
+            dir_mtime = os.stat(str(dir_path)).st_mtime_ns
+        except OSError:
+            return []
+        cached_listing = self._dir_listings_cache.get(str(dir_path))
+        if (cached_listing is not None) and (cached_listing[0] == dir_mtime):
+            return cached_listing[1]
+        listing = []
+        try:
+            with os.scandir(str(dir_path)) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        listing.append((entry.name, True, 0, 0.0))
+                    elif entry.name.endswith(".csv") and entry.is_file():
+                        entry_stat = entry.stat()
+                        listing.append((entry.name, False, entry_stat.st_size, entry_stat.st_mtime))
+        except OSError:
+            return []
+        listing.sort()  # Sort by name, like ls does
+        self._dir_listings_cache[str(dir_path)] = (dir_mtime, listing)
+        return listing
+
+
+class SubmissionProfileRepository:
+    """
+    Provide interfaces to save and find a user's submission profiles
+
+    A profile is the spec (see InputDataEntity.apply_spec()) of the last file the user submitted for a model, along
+    with the fingerprint of that file's header row. The profiles are kept in a JSON file, one per model, and are
+    indexed by their fingerprints when loaded, so that matching an input file only takes one lookup per topmost line.
+    @date Oct 19, 2026
+    """
+
+    _NLINES_TO_MATCH = 100  # - number of topmost lines of an input file that may be its header row
+
+    def __init__(self, file_path: Path) -> None:
+        self.file_path: Path = file_path
+        # - profiles by model name, i.e. {model name: {"header_fingerprint": fingerprint, "spec": spec}}
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        # - model names by header fingerprint
+        self._model_names_by_fingerprint: Dict[str, str] = {}
+        self._load()
+
+    def save_profile(self, input_entity: InputDataEntity) -> None:
+        """
+        Save the spec of the given input entity as the profile of its model, replacing the previous one
+        Nothing is saved if the input file has no header row, since there would be nothing to match the profile with
+        """
+        header_fingerprint = input_entity.get_header_fingerprint()
+        if (header_fingerprint is None) or (len(input_entity.model_name) == 0):
+            return
+        previous_profile = self._profiles.get(input_entity.model_name)
+        if previous_profile is not None:
+            self._model_names_by_fingerprint.pop(previous_profile["header_fingerprint"], None)
+        self._profiles[input_entity.model_name] = {
+            "header_fingerprint": header_fingerprint,
+            "spec": input_entity.get_spec(),
+        }
+        self._model_names_by_fingerprint[header_fingerprint] = input_entity.model_name
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file_path = self.file_path.with_suffix(".tmp")
+        with open(str(temp_file_path), "w", encoding="utf-8") as profilefile:
+            json.dump(self._profiles, profilefile, indent=2)
+        os.replace(str(temp_file_path), str(self.file_path))
+
+    def find_profile(self, input_entity: InputDataEntity) -> Optional[Dict[str, Any]]:
+        """
+        Return the spec of the profile whose header row matches the given input file, or None if there is none
+        A header row matches if it has the same fingerprint and is preceded by the same number of lines
+        """
+        if len(self._model_names_by_fingerprint) == 0:
+            return None
+        for line_index, fingerprint in enumerate(input_entity.get_line_fingerprints(self._NLINES_TO_MATCH)):
+            model_name = self._model_names_by_fingerprint.get(fingerprint)
+            if model_name is None:
+                continue
+            spec = self._profiles[model_name]["spec"]
+            if spec.get("initial_lines_to_skip") == line_index:
+                return dict(spec)
+        return None
+
+    def _load(self) -> None:
+        """Load the profiles from the profile file, ignoring it if it is missing or invalid"""
+        try:
+            with open(str(self.file_path), "r", encoding="utf-8") as profilefile:
+                profiles = json.load(profilefile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(profiles, dict):
+            return
+        for model_name, profile in profiles.items():
+            if isinstance(profile, dict) and ("header_fingerprint" in profile) and isinstance(profile.get("spec"), dict):
+                self._profiles[model_name] = profile
+                self._model_names_by_fingerprint[profile["header_fingerprint"]] = model_name
+
+
 class DataRuleRepository:
     """
     Provide interfaces to interact with the spreadsheet that stores our data formatting rules
@@ -1327,6 +2747,23 @@ class DataRuleRepository:
         result.sort()
         return result
 
+    @classmethod
+    def query_label_hit_rates(cls, labels: pd.Series) -> Dict[str, float]:
+        """
+        Return the fraction of the given labels that exist in each label table, keyed by the table's column name (i.e.
+        "Model", "Scenario", "Region", "Variable", "Item", and "Unit")
+        """
+        if len(labels) == 0:
+            return {name: 0.0 for name in ["Model", "Scenario", "Region", "Variable", "Item", "Unit"]}
+        return {
+            "Model": float(labels.isin(cls._model_names).mean()),
+            "Scenario": float(labels.isin(cls._scenarios).mean()),
+            "Region": float(labels.isin(cls._regions).mean()),
+            "Variable": float(labels.isin(cls._variables).mean()),
+            "Item": float(labels.isin(cls._items).mean()),
+            "Unit": float(labels.isin(cls._units).mean()),
+        }
+
     @classmethod
     def query_label_in_model_names(cls, label: str) -> bool:
         """Check if the argument exists in the model name table"""
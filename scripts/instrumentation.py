@@ -0,0 +1,216 @@
+"""
+Lightweight instrumentation of the submission pipeline stages
+
+Every call of an instrumented stage (see instrumented()) appends a JSON-lines record to the stage log, with its wall
+time, CPU time, growth of the resident set size, and row / byte throughput. When a user reports that the application 
+hung, the log tells which stage was slow and on how much data. Set the AGMIP_SUBMISSION_INSTRUMENTATION environment 
+variable to "0" or "off" to turn the instrumentation off. Once the log grows past STAGELOG_MAX_SIZE, it is rotated 
+into a single backup file.
+
+For a closer look, code can also be profiled with cProfile and tracemalloc (see profiled()). This is opt-in, since 
+tracing every allocation slows the code down several times.
+@date Oct 19, 2026
+"""
+from __future__ import annotations  # Delay the evaluation of undefined types
+from contextlib import contextmanager
+import cProfile
+from datetime import datetime
+import functools
+import json
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # - not available on Windows
+    resource = None  # type: ignore
+
+STAGELOG_PATH: Path = Path(__name__).parent.parent / "workingdir" / "logs" / "pipeline_stages.jsonl"
+STAGELOG_MAX_SIZE = 10 * 1024 * 1024  # - size in bytes at which the stage log is rotated
+ENV_VAR = "AGMIP_SUBMISSION_INSTRUMENTATION"
+_DISABLED_VALUES = ["0", "off", "false", "no"]
+PROFILING_ENV_VAR = "AGMIP_SUBMISSION_PROFILING"
+_ENABLED_VALUES = ["1", "on", "true", "yes"]
+PROFILE_SUFFIX = ".prof"  # - cProfile stats, which can be read with pstats or snakeviz
+ALLOCATIONS_SUFFIX = ".allocations.txt"  # - top allocations traced by tracemalloc
+_NTOP_ALLOCATIONS = 25
+
+_thread_state = threading.local()  # - per thread, the names of the stages that are running (outermost first)
+
+
+def is_enabled() -> bool:
+    """Return whether the instrumentation is turned on (see the module docstring)"""
+    return os.environ.get(ENV_VAR, "").strip().lower() not in _DISABLED_VALUES
+
+
+def is_profiling_enabled_by_env() -> bool:
+    """Return whether profiling is turned on for every session by the AGMIP_SUBMISSION_PROFILING environment variable"""
+    return os.environ.get(PROFILING_ENV_VAR, "").strip().lower() in _ENABLED_VALUES
+
+
+def instrumented(stage: str, measure: Optional[Callable[..., Tuple[int, int]]] = None) -> Callable:
+    """
+    Return a decorator that records every call of the decorated function as the given stage
+    The measure function returns the number of rows and bytes that the call processed, for the throughput. It is called
+    with the return value of the call followed by the call's arguments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not is_enabled():
+                return func(*args, **kwargs)
+            if not hasattr(_thread_state, "stage_stack"):
+                _thread_state.stage_stack = []
+            stage_stack: List[str] = _thread_state.stage_stack
+            record: Dict[str, Any] = {
+                "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+                "stage": stage,
+                "parent_stage": stage_stack[-1] if len(stage_stack) > 0 else None,
+                "pid": os.getpid(),
+            }
+            stage_stack.append(stage)
+            start_rss = _get_current_rss()
+            start_wall_time = time.perf_counter()
+            start_cpu_time = time.process_time()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                record["error"] = type(e).__name__
+                _write_record(_with_usage(record, start_wall_time, start_cpu_time, start_rss))
+                raise
+            finally:
+                stage_stack.pop()
+            _with_usage(record, start_wall_time, start_cpu_time, start_rss)
+            if measure is not None:
+                try:
+                    nrows, nbytes = measure(result, *args, **kwargs)
+                except Exception:
+                    nrows, nbytes = 0, 0  # The measurement is best-effort, e.g. it fails when the stage failed softly
+                wall_time = max(record["wall_time"], 1e-9)
+                record.update(
+                    nrows=nrows,
+                    nbytes=nbytes,
+                    rows_per_second=round(nrows / wall_time, 1),
+                    bytes_per_second=round(nbytes / wall_time, 1),
+                )
+            _write_record(record)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profiled(stage: str, dst_dir_path: Path) -> Iterator[None]:
+    """
+    Profile the enclosed code with cProfile and tracemalloc, then save the reports into the given directory
+    The reports are named by the time and the stage, i.e. "<time>_<stage>.prof" and "<time>_<stage>.allocations.txt"
+    """
+    report_path_prefix = str(dst_dir_path / "{}_{}".format(datetime.now().strftime("%Y%m%d_%H%M%S"), stage))
+    is_tracing_allocations = tracemalloc.is_tracing()  # - e.g. by an enclosing profiled stage
+    if not is_tracing_allocations:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_traced_size = tracemalloc.get_traced_memory()
+        if not is_tracing_allocations:
+            tracemalloc.stop()
+        try:
+            dst_dir_path.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(report_path_prefix + PROFILE_SUFFIX)
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            with open(report_path_prefix + ALLOCATIONS_SUFFIX, "w", encoding="utf-8") as reportfile:
+                reportfile.write("Top {} allocations of {} (still allocated at its end)\n".format(_NTOP_ALLOCATIONS, stage))
+                reportfile.write("Peak traced memory: {:.1f} MB\n\n".format(peak_traced_size / (1024 * 1024)))
+                for statistic in snapshot.statistics("lineno")[:_NTOP_ALLOCATIONS]:
+                    reportfile.write(str(statistic) + "\n")
+        except OSError:
+            pass  # The profiling should never break the application
+
+
+def list_profiling_reports(dir_path: Path) -> List[Path]:
+    """Return the paths of the profiling reports in the given directory, newest first"""
+    if not dir_path.is_dir():
+        return []
+    report_paths = [
+        path for path in dir_path.iterdir() if path.name.endswith(PROFILE_SUFFIX) or path.name.endswith(ALLOCATIONS_SUFFIX)
+    ]
+    return sorted(report_paths, key=lambda path: path.name, reverse=True)
+
+
+def read_records(log_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Return the records in the given stage log (or in STAGELOG_PATH, if not given), oldest first"""
+    if log_path is None:
+        log_path = STAGELOG_PATH  # - resolved at call time, so that a redirected STAGELOG_PATH is read
+    if not log_path.is_file():
+        return []
+    records = []
+    with open(str(log_path), "r", encoding="utf-8") as logfile:
+        for line in logfile:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Skip lines that were cut off, e.g. when the application was killed mid-write
+    return records
+
+
+def _with_usage(
+    record: Dict[str, Any], start_wall_time: float, start_cpu_time: float, start_rss: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Add the wall time and CPU time since the given start times, the growth of the resident set size since the given 
+    start size, and the peak resident set size of the process, to the record and return it
+    NOTE: The process peak is a high-water mark over the whole lifetime of the process, so it is the same for every 
+    stage after the largest one. The RSS growth is the usage that can be attributed to the stage.
+    """
+    record["wall_time"] = round(time.perf_counter() - start_wall_time, 6)
+    record["cpu_time"] = round(time.process_time() - start_cpu_time, 6)
+    end_rss = _get_current_rss()
+    record["rss_growth_mb"] = (
+        round((end_rss - start_rss) / (1024 * 1024), 1) if (start_rss is not None) and (end_rss is not None) else None
+    )
+    record["process_peak_rss_mb"] = _get_process_peak_rss_mb()
+    return record
+
+
+def _get_current_rss() -> Optional[int]:
+    """Return the current resident set size of this process in bytes, or None if it is unknown (i.e. not on Linux)"""
+    try:
+        with open("/proc/self/statm", "r") as statmfile:
+            return int(statmfile.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _get_process_peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process so far in megabytes, or None if it is unknown"""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NOTE: ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+    peak_rss_bytes = peak_rss if sys.platform == "darwin" else peak_rss * 1024
+    return round(peak_rss_bytes / (1024 * 1024), 1)
+
+
+def _write_record(record: Dict[str, Any]) -> None:
+    """Append the record to the stage log, after rotating the log if it is too large"""
+    try:
+        STAGELOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        if STAGELOG_PATH.is_file() and (STAGELOG_PATH.stat().st_size >= STAGELOG_MAX_SIZE):
+            os.replace(str(STAGELOG_PATH), str(STAGELOG_PATH) + ".1")
+        with open(str(STAGELOG_PATH), "a", encoding="utf-8") as logfile:
+            logfile.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # The instrumentation should never break the pipeline
@@ -2,39 +2,93 @@ from __future__ import annotations  # Delay the evaluation of undefined types
 from copy import copy
 import csv
 from datetime import date, datetime
+import getpass
+import hashlib
+import math
 import os
 from pathlib import Path
 import shutil
-from typing import Any, Callable, Optional, Dict, Union, List, overload
+from typing import Any, Callable, Optional, Dict, Union, List, Tuple, overload
 
 import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
 from pandas.core.groupby.generic import DataFrameGroupBy
 
+from .instrumentation import instrumented, is_profiling_enabled_by_env, list_profiling_reports
 from .utils import ApplicationMode, Delimiter, Notification
 from .utils import JSAppModel
 from .utils import UserPage
 from .utils import VisualizationTab
 from .domain import (
+    ChunkedUpload,
     InputDataEntity,
     InputDataDiagnosis,
     OutputDataEntity,
+    MergedDataCube,
+    SubmissionProfileRepository,
+    SubmissionRepository,
+    SubmittedFileInfo,
     DataRuleRepository,
     BadLabelInfo,
     UnknownLabelInfo,
 )
 
 
+try:
+    import grp
+    import pwd
+except ImportError:  # - not available on Windows
+    grp = None  # type: ignore
+    pwd = None  # type: ignore
+
+_user_identity: Optional[Tuple[str, List[str]]] = None  # - username & group names of the current user, once looked up
+
+
+def get_user_identity() -> Tuple[str, List[str]]:
+    """
+    Return the username and the group names of the current user
+    They are looked up once per session, unless they were set with set_user_identity()
+    """
+    global _user_identity
+    if _user_identity is None:
+        if pwd is None:
+            _user_identity = (getpass.getuser(), [])
+        else:
+            passwd_entry = pwd.getpwuid(os.getuid())
+            groupnames = []
+            for group_id in os.getgrouplist(passwd_entry.pw_name, passwd_entry.pw_gid):
+                try:
+                    groupnames.append(grp.getgrgid(group_id).gr_name)
+                except KeyError:
+                    continue  # Skip groups without a name, like the "groups" command would print them as numbers
+            _user_identity = (passwd_entry.pw_name, groupnames)
+    return _user_identity
+
+
+def set_user_identity(username: Optional[str], groupnames: Optional[List[str]] = None) -> None:
+    """
+    Set the username and the group names of the current user, e.g. in tests or on a local environment
+    A None username clears them, so that they are looked up again
+    """
+    global _user_identity
+    _user_identity = None if username is None else (username, list(groupnames or []))
+
+
+def get_username() -> str:
+    """Return the username of the current user"""
+    return get_user_identity()[0]
+
+
 def check_administrator_privilege() -> bool:
     """Return whether or not user can enter the admin mode"""
-    username = os.popen("id -un").read().strip("\n")
+    username = get_username()
     return username in ["raziq", "raziqraif", "lanzhao", "rcampbel"]
 
 
 def get_user_globalecon_project_dirnames() -> list[str]:
     "Return the list of AgMIP projects that the current user is in"
-    groups = os.popen("groups").read().strip("\n").split(" ")
+    groups = get_user_identity()[1]
     project_groups = [group for group in groups if "pr-agmipglobalecon" in group]
     project_dirnames = [p_group[len("pr-") :] for p_group in project_groups]
     if len(project_dirnames) == 0:
@@ -47,8 +101,15 @@ class Model:
     WORKINGDIR_PATH = Path(__name__).parent.parent / "workingdir"  # <PROJECT_DIR>/workingdir
     UPLOADDIR_PATH = WORKINGDIR_PATH / "uploads"
     DOWNLOADDIR_PATH = WORKINGDIR_PATH / "downloads"
+    PROFILINGDIR_PATH = DOWNLOADDIR_PATH / "profiling"  # - reports of profiled page transitions
     SHAREDDIR_PATH = Path("/srv/irods/")
+    SPECSDIR_PATH = WORKINGDIR_PATH.parent / "resources" / "submissions"  # - submission specs (.opt) of modeling teams
+    PROFILEFILE_PATH = Path.home() / ".agmip-submission" / "profiles.json"  # - the user's saved submission profiles
+    SUBMISSIONS_PAGE_SIZE = 15  # - number of rows in a page of the submissions table
+    SUBMISSIONS_SORT_KEYS = ["Submitted", "File", "Associated Project", "Status", "Size"]
+    SUBMISSION_STATUSES = [SubmittedFileInfo.ACCEPTED, SubmittedFileInfo.PENDING]
 
+    @instrumented("Model.__init__")
     def __init__(self):
         # Import MVC classes here to prevent circular import problem
         from .controller import Controller
@@ -61,11 +122,23 @@ class Model:
         self.javascript_model = JSAppModel()  # - object to facilitate information injection into the Javascript context
         self.application_mode = ApplicationMode.USER
         self.is_user_an_admin = check_administrator_privilege()
+        self.profiling_is_enabled = is_profiling_enabled_by_env()  # - whether page transitions are profiled
+        self.submission_repository = SubmissionRepository(self.SHAREDDIR_PATH)  # - repository of submitted files
+        self.profile_repository = SubmissionProfileRepository(self.PROFILEFILE_PATH)  # - the user's saved profiles
         self.current_user_page = UserPage.FILE_UPLOAD  # - current user mode page
         self.furthest_active_user_page = UserPage.FILE_UPLOAD  # - furthest/last active user mode page
         self.input_data_entity = InputDataEntity()  # - domain entity for input / uploaded data file
         self.input_data_diagnosis: InputDataDiagnosis = InputDataDiagnosis()  # - domain entity for input data diagnosis
         self.output_data_entity: OutputDataEntity = OutputDataEntity()  # - domain entity for output / processed data
+        # Admin page's states
+        self.submitted_files_info: List[SubmittedFileInfo] = []  # - info of all submitted files
+        self.submissions_page = 0  # - (zero-based) index of the visible page of the submissions table
+        self.submissions_sort_key = self.SUBMISSIONS_SORT_KEYS[0]  # - column that the submissions table is sorted by
+        self.submissions_sort_ascending = False
+        self.submissions_name_filter = ""  # - substring of file names to show ("" shows all)
+        self.submissions_project_filter = ""  # - project directory name to show ("" shows all)
+        self.submissions_status_filter = ""  # - status to show ("" shows all)
+        self.profiling_reports_tbl: list[list[str]] = []  # - rows of [report path, created, size], newest first
         # File upload page's states
         self.INFOFILE_PATH = (  # - path of downloadeable info file
             self.WORKINGDIR_PATH / "AgMIP GlobalEcon Data Submission Info.zip"
@@ -75,18 +148,26 @@ class Model:
         ]  # - GlobalEcon projects the user is a part of
         self.uploadedfile_name = ""
         self.associated_project_dirnames: list[str] = []  # - associated GlobalEcon projects for this submission
+        self.imported_spec_name = ""  # - name of the saved profile or spec file imported for the uploaded file, if any
         # Data specification page's states
         # The states for this page have multiple dependencies, and changes to a state may trigger changes to
         # several other states. So, we only define 1 state as an instance attribute here, and will define the other
         # states as properties later. We also define the states as properties because changes made to them needs to be relayed to
         # to the domain model @ Aug 4, 2021
         self.VALID_MODEL_NAMES = DataRuleRepository.query_model_names()  # - valid model names
+        # - memos of the data preview properties and the values of their dependencies when they were memoized
+        self._input_data_preview_content_memo: Optional[np.ndarray] = None
+        self._input_data_preview_content_memo_key: tuple = ()
+        self._output_data_preview_content_memo: Optional[np.ndarray] = None
+        self._output_data_preview_content_memo_key: tuple = ()
         # Integrity checking page's states
         # - result of row checks
         self.nrows_w_struct_issue = 0  # - number of rows with structural issues
         self.nrows_w_ignored_scenario = 0  # - number of rows with ignored scenario
         self.nrows_duplicates = 0  # - number of duplicate rows
         self.nrows_accepted = 0  # - number of rows that passed row checks
+        # - breakdown of rows with structural issues, where each row is [issue, variable, nrows, example row numbers]
+        self.struct_issues_overview_tbl: list[list[str]] = []
         # - paths to downloadable row files
         self.STRUCTISSUEFILE_PATH = self.DOWNLOADDIR_PATH / "Rows With Structural Issue.csv"
         self.DUPLICATESFILE_PATH = self.DOWNLOADDIR_PATH / "Duplicate Records.csv"
@@ -138,32 +219,141 @@ class Model:
 
     # Admin page methods
 
-    def get_submitted_files_info(self) -> list[list[str]]:
-        """Return a list of submitted files' info"""
-        dirnames = os.popen(f'ls {self.SHAREDDIR_PATH}').read().split()
-        project_dirnames = [dirname for dirname in dirnames if dirname[:len("agmipglobalecon")] == "agmipglobalecon"]
-        files_info = []
-        for project_dirname in project_dirnames:
-            submissiondir_path = self.SHAREDDIR_PATH / project_dirname / ".submissions"
-            accepted_files = os.popen(f'ls {submissiondir_path} | grep .csv').read().split()
-            pending_files = os.popen(f'ls {submissiondir_path / ".pending"} | grep [0-9].csv').read().split()
-            for filename in accepted_files:
-                files_info.append([filename, project_dirname, "Accepted"])
-            for filename in pending_files:
-                files_info.append([filename, project_dirname, "Pending"])
-        return files_info
+    def init_admin_page_states(self) -> None:
+        """Initialize the states in the admin page (whenever it becomes active)"""
+        self.submitted_files_info = self.submission_repository.query_submitted_files_info()
+        self.submissions_page = min(self.submissions_page, self.nsubmissions_pages - 1)
+        self.init_profiling_reports_states()
+
+    def init_profiling_reports_states(self) -> None:
+        """Initialize the list of profiling reports in the admin page"""
+        self.profiling_reports_tbl = []
+        for report_path in list_profiling_reports(self.PROFILINGDIR_PATH):
+            report_stat = report_path.stat()
+            self.profiling_reports_tbl.append(
+                [
+                    str(report_path),
+                    datetime.fromtimestamp(report_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+                    self._format_file_size(report_stat.st_size),
+                ]
+            )
+
+    @property
+    def submitted_project_dirnames(self) -> List[str]:
+        """Sorted names of projects that have submitted files"""
+        return sorted({file_info.project_dirname for file_info in self.submitted_files_info})
+
+    @property
+    def nfiltered_submitted_files(self) -> int:
+        return len(self._get_filtered_submitted_files_info())
+
+    @property
+    def nsubmissions_pages(self) -> int:
+        """Number of pages in the submissions table (at least 1, even if there is no submission)"""
+        return max(1, math.ceil(self.nfiltered_submitted_files / self.SUBMISSIONS_PAGE_SIZE))
+
+    def get_submitted_files_page(self) -> list[list[str]]:
+        """Return the info of submitted files in the visible page of the submissions table, after filtering & sorting"""
+        sort_key_getters: Dict[str, Callable[[SubmittedFileInfo], Any]] = {
+            "Submitted": lambda file_info: file_info.modified_time,
+            "File": lambda file_info: file_info.file_name.lower(),
+            "Associated Project": lambda file_info: file_info.project_dirname,
+            "Status": lambda file_info: file_info.status,
+            "Size": lambda file_info: file_info.size,
+        }
+        files_info = sorted(
+            self._get_filtered_submitted_files_info(),
+            key=sort_key_getters[self.submissions_sort_key],
+            reverse=not self.submissions_sort_ascending,
+        )
+        page_start = self.submissions_page * self.SUBMISSIONS_PAGE_SIZE
+        return [
+            [
+                file_info.file_name,
+                file_info.project_dirname,
+                file_info.status,
+                file_info.modified_time.strftime("%Y-%m-%d %H:%M"),
+                self._format_file_size(file_info.size),
+            ]
+            for file_info in files_info[page_start : page_start + self.SUBMISSIONS_PAGE_SIZE]
+        ]
+
+    def get_submissions_statistics(self) -> str:
+        """Return a summary of the submitted files that pass the filters of the submissions table"""
+        files_info = self._get_filtered_submitted_files_info()
+        naccepted_files = len([file_info for file_info in files_info if file_info.status == SubmittedFileInfo.ACCEPTED])
+        model_names = {file_info.model_name for file_info in files_info if file_info.model_name != ""}
+        submitters = {file_info.submitter for file_info in files_info if file_info.submitter != ""}
+        nrecords = sum(file_info.nrows_accepted for file_info in files_info if file_info.nrows_accepted is not None)
+        return (
+            f"{len(files_info)} files ({naccepted_files} accepted, {len(files_info) - naccepted_files} pending), "
+            f"{nrecords:,} accepted records from {len(model_names)} models and {len(submitters)} submitters, "
+            f"{self._format_file_size(sum(file_info.size for file_info in files_info))} in total"
+        )
+
+    def _get_filtered_submitted_files_info(self) -> List[SubmittedFileInfo]:
+        """Return the info of submitted files that pass the filters of the submissions table"""
+        name_filter = self.submissions_name_filter.strip().lower()
+        return [
+            file_info
+            for file_info in self.submitted_files_info
+            if (
+                (name_filter in file_info.file_name.lower())
+                or (name_filter in file_info.model_name.lower())
+                or (name_filter in file_info.submitter.lower())
+            )
+            and (self.submissions_project_filter in ["", file_info.project_dirname])
+            and (self.submissions_status_filter in ["", file_info.status])
+        ]
+
+    @staticmethod
+    def _format_file_size(size: int) -> str:
+        """Return a human-readable representation of the given file size (in bytes)"""
+        for unit in ["B", "KB", "MB"]:
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024  # type: ignore
+        return f"{size:.1f} GB"
 
     # File upload page's methods
 
+    def assemble_uploaded_chunks(self, upload_id: str) -> Optional[str]:
+        """
+        Assemble the file that was uploaded in chunks (into the given chunk directory) and set it as the uploaded file
+        Return an error message if an error is encountered, else None
+        """
+        if not ChunkedUpload.is_valid_upload_id(upload_id):
+            return "Invalid upload"
+        try:
+            upload = ChunkedUpload.create(self.UPLOADDIR_PATH / ChunkedUpload.CHUNKSDIR_NAME / upload_id)
+            self.uploadedfile_name = upload.assemble(self.UPLOADDIR_PATH).name
+        except Exception as e:
+            return str(e)
+        return None
+
+    def is_chunked_upload(self, upload_id: str) -> bool:
+        """Return whether the given value of the upload area's file label refers to a chunked upload"""
+        return (
+            ChunkedUpload.is_valid_upload_id(upload_id)
+            and (self.UPLOADDIR_PATH / ChunkedUpload.CHUNKSDIR_NAME / upload_id).is_dir()
+        )
+
     def remove_uploaded_file(self) -> None:
         """Remove uploaded file from the upload directory"""
         assert len(self.uploadedfile_name) > 0
         file_path = self.UPLOADDIR_PATH / Path(self.uploadedfile_name)
         assert file_path.is_file()
         file_path.unlink()
+        transcoded_file_path = InputDataEntity.get_transcoded_file_path(file_path)
+        if transcoded_file_path.is_file():
+            transcoded_file_path.unlink()
 
     # Data specification page's methods
 
+    @instrumented(
+        "Model.init_data_specification_page_states",
+        lambda _, model, *__: (model.input_data_entity.file_nrows, model.input_data_entity.file_path.stat().st_size),
+    )
     def init_data_specification_page_states(self, file_name: str) -> Optional[str]:
         """
         Initialize the states in the data specification pages (only when it had just become active)
@@ -178,10 +368,32 @@ class Model:
         except Exception as e:
             return str(e)
         valid_delimiters = Delimiter.get_models()
-        # Guess information about the input file
-        self.input_data_entity.guess_delimiter(valid_delimiters)
-        self.input_data_entity.guess_header_is_included()
-        self.input_data_entity.guess_initial_lines_to_skip()
+        # Apply the user's saved profile whose header row matches the input file, else import the spec of the modeling
+        # team if there is one (so that repeat submitters don't need to re-enter it), else guess information about the
+        # input file
+        self.imported_spec_name = ""
+        profile_spec = self.profile_repository.find_profile(self.input_data_entity)
+        if profile_spec is not None:
+            try:
+                self.input_data_entity.apply_spec(profile_spec)
+                self.imported_spec_name = "your last {} submission".format(self.model_name)
+                return None
+            except Exception:
+                self.input_data_entity = InputDataEntity.create(self.UPLOADDIR_PATH / file_name)
+        spec_file_path = self.input_data_entity.find_spec_file(self.SPECSDIR_PATH)
+        if spec_file_path is not None:
+            try:
+                self.input_data_entity.load_spec_file(spec_file_path, valid_delimiters)
+                self.imported_spec_name = spec_file_path.name
+                # Only keep valid model names, since they are selected from a dropdown
+                matching_model_names = [
+                    name for name in self.VALID_MODEL_NAMES if name.lower() == self.model_name.lower()
+                ]
+                self.model_name = matching_model_names[0] if len(matching_model_names) > 0 else ""
+                return None
+            except Exception:
+                self.input_data_entity = InputDataEntity.create(self.UPLOADDIR_PATH / file_name)
+        self.input_data_entity.guess_input_format(valid_delimiters)
         self.input_data_entity.guess_model_name_n_column_assignments()
 
     def validate_data_specification_input(self) -> Optional[str]:
@@ -230,6 +442,10 @@ class Model:
 
     # Integrity checking page's methods
 
+    @instrumented(
+        "Model.init_integrity_checking_page_states",
+        lambda _, model: (model.input_data_diagnosis.nrows, model.input_data_entity.file_path.stat().st_size),
+    )
     def init_integrity_checking_page_states(self) -> None:
         # Diagnose input data
         self.input_data_diagnosis = InputDataDiagnosis.create(self.input_data_entity)
@@ -238,6 +454,18 @@ class Model:
         self.nrows_w_ignored_scenario = self.input_data_diagnosis.nrows_w_ignored_scenario
         self.nrows_accepted = self.input_data_diagnosis.nrows_accepted
         self.nrows_duplicates = self.input_data_diagnosis.nrows_duplicate
+        self.struct_issues_overview_tbl = [
+            [
+                issue_info.code.value,
+                issue_info.variable if issue_info.variable != "" else "-",
+                "{:,}".format(issue_info.nrows),
+                ", ".join(str(rownum) for rownum in issue_info.example_rownums)
+                + (", ..." if issue_info.nrows > len(issue_info.example_rownums) else ""),
+            ]
+            for issue_info in sorted(
+                self.input_data_diagnosis.struct_issues.values(), key=lambda issue_info: issue_info.nrows, reverse=True
+            )
+        ]
         self.bad_labels_overview_tbl = [
             [label_info.label, label_info.associated_column, label_info.fix]
             for label_info in self.input_data_diagnosis.bad_labels
@@ -256,6 +484,17 @@ class Model:
         self.bad_labels_overview_tbl += [["-", "-", "-"] for _ in range(MIN_LABEL_OVERVIEW_TABLE_NROWS)]
         self.unknown_labels_overview_tbl += [["-", "-", "-", "", False] for _ in range(MIN_LABEL_OVERVIEW_TABLE_NROWS)]
 
+    def prepare_struct_issue_file(self) -> Optional[str]:
+        """
+        Write the rows with structural issue into their downloadable file (which is only done when requested)
+        Return an error message if there is any, or None
+        """
+        try:
+            self.input_data_diagnosis.write_struct_issue_report()
+        except Exception as e:
+            return str(e)
+        return None
+
     def validate_unknown_labels_table(self, unknown_labels_table: list[list[str | bool]]) -> str | None:
         """
         Validate unknown labels table
@@ -270,6 +509,10 @@ class Model:
 
     # Plausibility checking page's methods
 
+    @instrumented(
+        "Model.init_plausibility_checking_page_states",
+        lambda _, model, *__: (model.output_data_entity.processed_data.shape[0], model.outputfile_path.stat().st_size),
+    )
     def init_plausibility_checking_page_states(self, unknown_labels_table: list[list[str | bool]]) -> str | None:
         """
         Initialize plausibility checking states. Return a popup message or None
@@ -293,9 +536,11 @@ class Model:
             [label_info for label_info in self.input_data_diagnosis.unknown_labels if label_info.override == True]
         )
         # Create output data based on information from input data and input data diagnosis
-        self.output_data_entity = OutputDataEntity.create(self.input_data_entity, self.input_data_diagnosis)
-        if self.input_data_diagnosis.rediagnose_n_filter_output_data(self.output_data_entity):
-            self.output_data_entity = OutputDataEntity.create_from_rediagnosed_n_filtered_output_data(self.input_data_entity, self.input_data_diagnosis)
+        # NOTE: If the output data was already created from the current diagnosis, only the changes made to the
+        # unknown labels table need to be applied
+        if not self.output_data_entity.is_derived_from(self.input_data_diagnosis):
+            self.output_data_entity = OutputDataEntity.create(self.input_data_entity, self.input_data_diagnosis)
+        if self.output_data_entity.update_unknown_label_actions(self.input_data_diagnosis.unknown_labels):
             popup_message = "After fixing some unknown variable or unit fields, the application found more records " \
                 "that contain out-of-bound values. The application has filtered out these records from the output data " \
                 "but it does not have a feature to report these records yet."
@@ -343,8 +588,21 @@ class Model:
             self.valuetrends_scenario, self.valuetrends_region, self.valuetrends_variable
         )
 
-    def submit_processed_file(self) -> None:
-        """Submit processed file to the correct directory"""
+    @instrumented(
+        "Model.submit_processed_file",
+        lambda _, model: (model.output_data_entity.processed_data.shape[0], model.outputfile_path.stat().st_size),
+    )
+    def submit_processed_file(self) -> Optional[str]:
+        """
+        Submit processed file to the correct directory
+        Return an error message if the file was submitted but could not be merged into a project's data cube, else None
+        """
+        merge_error_messages = []
+        outputfile_hash = hashlib.sha256()
+        with open(str(self.outputfile_path), "rb") as outputfile:
+            for chunk in iter(lambda: outputfile.read(1024 * 1024), b""):
+                outputfile_hash.update(chunk)
+        parquetfile_path = self.output_data_entity.save_parquet_file()
         for project_dirname in self.associated_project_dirnames:
             outputfile_dstpath = (
                 self.SHAREDDIR_PATH / project_dirname / ".submissions" / ".pending" / self.outputfile_path.name
@@ -352,6 +610,9 @@ class Model:
                 else self.SHAREDDIR_PATH / project_dirname / ".submissions" / self.outputfile_path.name
             )
             shutil.copy(self.outputfile_path, outputfile_dstpath)
+            # Submit the columnar copy of the processed file next to the CSV, if it was created
+            if parquetfile_path is not None:
+                shutil.copy(parquetfile_path, outputfile_dstpath.with_suffix(parquetfile_path.suffix))
             # Submit a file detailing override request or create a new data cube
             if self.overridden_labels > 0:
                 requestinfo_dstpath = outputfile_dstpath.parent / (outputfile_dstpath.stem + "_OverrideInfo.csv")
@@ -361,11 +622,41 @@ class Model:
                             line = f"{label_info.label},{label_info.associated_column},{label_info.closest_match}\n"
                             infofile.write(line)
             else:
-                submissiondir_path = outputfile_dstpath.parent
-                submission_files_wildcard = str(submissiondir_path / "*.csv")
-                # Print the content of all csv files, remove duplicates, and redirect the output to merged.csv
-                # TODO: Ignore the content of existing merged.csv when printing
-                os.system(f"cat {submission_files_wildcard} | uniq > merged.csv")
+                # Rebuild the partitions of the submitted file's model in the project's merged data cube
+                # The file is submitted already, so failing to merge it should not fail the submission (the next merge
+                # of the project will pick it up)
+                try:
+                    merged_data_cube = MergedDataCube.create(outputfile_dstpath.parent)
+                    merged_data_cube.merge_new_submissions()
+                except Exception as e:
+                    merge_error_messages.append(f"{project_dirname}: {e}")
+            # Record the submission in the project's submission index
+            submitted_file_info = SubmittedFileInfo(
+                outputfile_dstpath.name,
+                project_dirname,
+                SubmittedFileInfo.PENDING if self.overridden_labels > 0 else SubmittedFileInfo.ACCEPTED,
+                outputfile_dstpath.stat().st_size,
+                datetime.now(),
+            )
+            submitted_file_info.submitter = get_username()
+            submitted_file_info.model_name = self.input_data_entity.model_name
+            submitted_file_info.nrows_accepted = self.input_data_diagnosis.nrows_accepted
+            submitted_file_info.nrows_w_struct_issue = self.input_data_diagnosis.nrows_w_struct_issue
+            submitted_file_info.nrows_w_ignored_scenario = self.input_data_diagnosis.nrows_w_ignored_scenario
+            submitted_file_info.nrows_duplicates = self.input_data_diagnosis.nrows_duplicate
+            submitted_file_info.overridden_labels = self.overridden_labels
+            submitted_file_info.file_hash = outputfile_hash.hexdigest()
+            self.submission_repository.record_submission(submitted_file_info)
+        # Save the data specification as the user's profile for this model, so that it is applied to their next upload
+        try:
+            self.profile_repository.save_profile(self.input_data_entity)
+        except OSError:
+            pass  # A profile is only a convenience, so failing to save it should not fail the submission
+        if len(merge_error_messages) > 0:
+            return "Your file could not be merged into the data of some projects ({})".format(
+                "; ".join(merge_error_messages)
+            )
+        return None
 
     # Data specification page's properties
     # NOTE: See the comment in constructor for the reasoning behind these properties.
@@ -491,7 +782,29 @@ class Model:
 
     @property
     def input_data_preview_content(self) -> np.ndarray:
-        """Return preview table content in an ndarray"""
+        """
+        Return preview table content in an ndarray
+        NOTE: This property is queried many times per page update (by the column assignment properties and the output
+        data preview), so its value is memoized until the sample parsed input data or the header inclusion changes.
+        The sample parsed input data is memoized by the input data entity, and it is a new object whenever the entity's
+        delimiter or number of initial lines to skip changes, or the entity is replaced.
+        """
+        sample_parsed_input_data = self.input_data_entity.sample_parsed_input_data
+        memo_key = self._input_data_preview_content_memo_key
+        if (
+            (self._input_data_preview_content_memo is not None)
+            and (memo_key[0] is sample_parsed_input_data)
+            and (memo_key[1] == self.input_data_entity.header_is_included)
+        ):
+            return self._input_data_preview_content_memo
+        content = self._build_input_data_preview_content()
+        content.setflags(write=False)  # The memo is shared by all callers
+        self._input_data_preview_content_memo = content
+        self._input_data_preview_content_memo_key = (sample_parsed_input_data, self.input_data_entity.header_is_included)
+        return content
+
+    def _build_input_data_preview_content(self) -> np.ndarray:
+        """Build the input data preview content (see input_data_preview_content)"""
         # Get constants
         NROWS = 3
         DEFAULT_CONTENT = np.array(["" for _ in range(3)]).reshape((NROWS, 1))
@@ -523,14 +836,26 @@ class Model:
         Return preview table content in an ndarray
         The content is built on top of the input data preview content
         @date 6/23/21
+        NOTE: Its value is memoized until the input data preview content, the model name, or a column assignment changes
         """
+        input_data_preview_content = self.input_data_preview_content
+        memo_key = (
+            input_data_preview_content,
+            self.input_data_entity.model_name,
+            *self.input_data_entity.assigned_colnums,
+        )
+        if (self._output_data_preview_content_memo is not None) and (
+            (self._output_data_preview_content_memo_key[0] is memo_key[0])
+            and (self._output_data_preview_content_memo_key[1:] == memo_key[1:])
+        ):
+            return self._output_data_preview_content_memo
         NROWS = 3
         # Lambda func. to return column content, given the title and column number assignment
-        assert self.input_data_preview_content.shape[0] >= NROWS
+        assert input_data_preview_content.shape[0] >= NROWS
         get_column_content: Callable[[str, int], list[str]] = (
             lambda title, assigned_colnum: [title] + ["" for _ in range(NROWS - 1)]
             if assigned_colnum == 0
-            else [title] + [self.input_data_preview_content[row][assigned_colnum - 1] for row in range(1, NROWS)]
+            else [title] + [input_data_preview_content[row][assigned_colnum - 1] for row in range(1, NROWS)]
         )
         # Get the content of all columns
         model_col = ["Model", self.input_data_entity.model_name, self.input_data_entity.model_name]
@@ -541,6 +866,10 @@ class Model:
         unit_col = get_column_content("Unit", self.input_data_entity.unit_colnum)
         year_col = get_column_content("Year", self.input_data_entity.year_colnum)
         value_col = get_column_content("Value", self.input_data_entity.value_colnum)
-        return np.array(
+        content = np.array(
             [model_col, scenario_col, region_col, variable_col, item_col, unit_col, year_col, value_col]
         ).transpose()
+        content.setflags(write=False)  # The memo is shared by all callers
+        self._output_data_preview_content_memo = content
+        self._output_data_preview_content_memo_key = memo_key
+        return content
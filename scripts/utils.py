@@ -4,9 +4,12 @@ They are placed here for modularity reasons or to prevent circular imports betwe
 @date Jun 30, 2021
 """
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+import json
+from pathlib import Path
 import ipywidgets as ui
-from typing import List
+from typing import List, Optional
 
 
 class VisualizationTab(Enum):
@@ -127,6 +130,7 @@ class CSS:
     STEPPER_EL__NUMBER = "rc-stepper-element__number"
     STEPPER_EL__SEPARATOR = "rc-stepper-element__separator"
     STEPPER_EL__TITLE = "rc-stepper-element__title"
+    STRUCT_ISSUES_TABLE = "rc-struct-issues-table"
     UA = "rc-upload-area"
     UA__BACKGROUND = "rc-upload-area__background"
     UA__FILE_UPLOADER = "rc-upload-area__file-uploader"
@@ -167,9 +171,10 @@ class Notification:
 
     # Content
     FILE_UPLOAD_SUCCESS = "File uploaded successfully"
-    INVALID_FILE_FORMAT = "File format must be CSV"
+    INVALID_FILE_FORMAT = "File format must be CSV (.csv), or CSV compressed with gzip (.csv.gz) or zip (.zip)"
     PLEASE_UPLOAD = "Please upload a CSV file first"
     FIELDS_WERE_PREPOPULATED = "Some fields have been prepopulated for you"
+    FIELDS_WERE_IMPORTED = "Fields have been imported from {}"
 
     # Icons
     WARNING_ICON = ui.HTML(
@@ -208,25 +213,57 @@ class Notification:
 class JSAppModel:
     """Class to group attributes that needs to be passed to Javascript context"""
 
-    def __init__(self):
+    def __init__(self, nbserver_auth_token: Optional[str] = None):
         # Auth token of notebook server
-        self.nbserver_auth_token: str = self._get_notebook_auth_token()
+        # - unless it is given (e.g. in tests), it is looked up in the background, since the token is only needed once
+        #   the app is displayed
+        self._nbserver_auth_token_future: Future = Future()
+        if nbserver_auth_token is None:
+            executor = ThreadPoolExecutor(max_workers=1)
+            self._nbserver_auth_token_future = executor.submit(self._get_notebook_auth_token)
+            executor.shutdown(wait=False)
+        else:
+            self._nbserver_auth_token_future.set_result(nbserver_auth_token)
         # Model ID of the filename label in "UA" (upload area)
         self.ua_file_label_model_id: str = ""
 
+    @property
+    def nbserver_auth_token(self) -> str:
+        """Auth token of notebook server (waits for the lookup to finish)"""
+        return self._nbserver_auth_token_future.result()
+
     def serialize(self) -> str:
         """Serialize self into a format that can be embedded into the Javascript context"""
-        return str(vars(self))
+        return str(
+            {
+                "nbserver_auth_token": self.nbserver_auth_token,
+                "ua_file_label_model_id": self.ua_file_label_model_id,
+            }
+        )
 
     def _get_notebook_auth_token(self) -> str:
-        """Get auth token to interact with notebook server's API"""
-        # Terminal command to print the urls of running servers.
-        stream = os.popen("jupyter notebook list")
-        output = stream.read()
-        assert "http" in output
-        # Assume our server is at the top of the output and extract its token
-        # format of output -> "<title>\nhttp://<nbserver_baseurl>/?token=TOKEN :: ...\n"
-        output = output.split("token=")[1]
-        # Format of output is "TOKEN :: ..."
-        token = output.split(" ")[0]
-        return token
+        """
+        Get auth token to interact with notebook server's API
+        The token is taken from the JUPYTER_TOKEN environment variable if it is set, else from the info file that the
+        notebook server writes into the Jupyter runtime directory. An empty string is returned if there is no token.
+        """
+        if "JUPYTER_TOKEN" in os.environ:
+            return os.environ["JUPYTER_TOKEN"]
+        try:
+            from jupyter_core.paths import jupyter_runtime_dir
+        except ImportError:
+            return ""
+        # Server info files are named "nbserver-<pid>.json" (classic notebook) or "jpserver-<pid>.json" (Jupyter
+        # Server). Prefer the server that started this kernel, else assume that ours is the newest one.
+        server_infos = []
+        for info_path in Path(jupyter_runtime_dir()).glob("*server-*.json"):
+            try:
+                with open(str(info_path), "r", encoding="utf-8") as info_file:
+                    server_info = json.load(info_file)
+                server_infos.append((server_info.get("pid") == os.getppid(), info_path.stat().st_mtime, server_info))
+            except (OSError, ValueError):
+                continue  # Skip info files that were removed or half-written meanwhile
+        if len(server_infos) == 0:
+            return ""
+        server_infos.sort(key=lambda server_info: server_info[:2], reverse=True)
+        return str(server_infos[0][2].get("token", ""))
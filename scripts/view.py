@@ -1,6 +1,8 @@
 from __future__ import annotations  # Delay the evaluation of undefined types
+import html
 from matplotlib import pyplot as plt
-from threading import Timer
+from pathlib import Path
+from threading import Lock, Timer
 from typing import Callable, Optional, Union, List, Tuple, Any
 
 import ipywidgets as ui
@@ -11,6 +13,7 @@ from pandas.core.frame import DataFrame
 from pandas.core.groupby.generic import DataFrameGroupBy
 from traitlets.config.application import ApplicationError
 
+from .instrumentation import instrumented
 from .utils import ApplicationMode, CSS
 from .utils import Delimiter
 from .utils import JSAppModel
@@ -43,9 +46,9 @@ class View:
         from .controller import Controller
         from .model import Model
 
-        # MVC objects self.model: Model
-        self.model: Model = Model()
-        self.ctrl: Controller = Controller()
+        # MVC objects
+        self.model: Model
+        self.ctrl: Controller
 
         # Base app's widgets that need to be manipulated
         self.app_container: ui.Box
@@ -57,11 +60,24 @@ class View:
         self.user_page_container: ui.Box
         self.user_mode_btn: ui.Button
         self.admin_mode_btn: ui.Button
-        self.admin_page: ui.Box
+        self.admin_page: Optional[ui.Box] = None  # - built when the admin mode is first entered
         self.notification: ui.Box
         self._notification_timer: Timer = Timer(0.0, lambda x: None)
+        self._later_user_pages_are_built = False  # - see _build_later_user_pages()
+        self._later_user_pages_lock = Lock()
         # Admin page's widgets that need to be manipulated
         self.submissions_tbl: ui.HTML
+        self.submissions_name_filter_txt: ui.Text
+        self.submissions_project_filter_ddown: ui.Dropdown
+        self.submissions_status_filter_ddown: ui.Dropdown
+        self.submissions_sort_key_ddown: ui.Dropdown
+        self.submissions_sort_order_ddown: ui.Dropdown
+        self.submissions_page_lbl: ui.Label
+        self.submissions_statistics_lbl: ui.Label
+        self.previous_submissions_page_btn: ui.Button
+        self.next_submissions_page_btn: ui.Button
+        self.profiling_checkbox: ui.Checkbox
+        self.profiling_reports_tbl: ui.HTML
         # File upload page's widgets that need to be manipulated
         self.ua_file_label: ui.Label  # ua here stands for "upload area"
         self.uploaded_file_name_box: ui.Box
@@ -90,6 +106,7 @@ class View:
         self.rows_w_struct_issues_lbl: ui.Label
         self.rows_w_ignored_scenario_lbl: ui.Label
         self.accepted_rows_lbl: ui.Label
+        self.struct_issues_tbl: ui.HTML
         self.bad_labels_tbl: ui.HTML
         self.unknown_labels_tbl: ui.GridBox
         self._unknown_labels_tbl_cell_pool: list[ui.Box] = []
@@ -115,17 +132,24 @@ class View:
         self.model = model
         self.ctrl = ctrl
 
+    @instrumented("View.display")
     def display(self) -> None:
-        """Build and show notebook user interface"""
+        """
+        Build and show notebook user interface
+        Only the file upload page is built before it is shown. The other user pages are built in the background once 
+        this method returns (see _build_later_user_pages()), and the admin page is built when the admin mode is entered.
+        """
         self.app_container = self._build_app()
         # Display the appropriate html files and our ipywidgets app
         display(HTML(filename="style.html"))
         display(self.app_container)
         # Embed Javascript app model in Javascript context
+        # NOTE: The notebook server's auth token is looked up in the background while the app is built (see JSAppModel)
         # TODO: Move the serialization data / functionality to Model and remove JSAppModel class (to reduce the amount of abstractions)
         javascript_model: JSAppModel = self.model.javascript_model
         display(HTML(f"<script> APP_MODEL = {javascript_model.serialize()}</script>"))
         display(HTML(filename="script.html"))
+        Timer(0.0, self._build_later_user_pages).start()
 
     def modify_cursor_style(self, new_cursor_mod_class: Optional[str]) -> None:
         """
@@ -201,8 +225,24 @@ class View:
         )
         display(Javascript(data=data, css="modal.css"))
 
+    def download_file(self, file_path: Path) -> None:
+        """Make the browser download the given file (its path must be relative to the notebook's directory)"""
+        data = """
+            var link = document.createElement("a");
+            link.href = "%s";
+            link.download = "%s";
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            """ % (
+            str(file_path),
+            file_path.name,
+        )
+        display(Javascript(data=data))
+
     def update_base_app(self) -> None:
         """Update the base app"""
+        self._build_later_user_pages()
         # Create helper variables
         NUM_OF_PAGES = len(self.user_page_container.children)
         assert self.model.current_user_page > 0 and self.model.current_user_page <= NUM_OF_PAGES
@@ -237,34 +277,87 @@ class View:
             self.app_header.children = [self.app_title, self.admin_mode_btn]
             self.user_page_container.add_class(CSS.DISPLAY_MOD__NONE)
             self.user_page_stepper.add_class(CSS.DISPLAY_MOD__NONE)
-            table_rows = ""
-            cur_len = 0
-            for row in self.model.get_submitted_files_info():
-                table_rows += "<tr>"
-                for colidx in range(len(row)):
-                    field = row[colidx]
-                    table_rows += f"<td>{field}</td>"
-                table_rows += "</tr>"
-                cur_len += 1
-            for _ in range(cur_len, 15):
-                table_rows += "<tr><td>-</td><td>-</td><td>-</td></tr>"
-            self.submissions_tbl.value = f"""
-                <table class="table">
-                    <thead>
-                        <th style="width: 350px;">File</th>
-                        <th style="width: 200px;">Associated Project</th>
-                        <th style="width: 150px;">Status</th>
-                    </thead>
-                    <tbody>
-                        {table_rows}
-                    </tbody>
-                </table>
-            """
+            if self.admin_page is None:
+                self.admin_page = self._build_admin_page()
+            self.update_admin_page()
 
             # NOTE: It is important for us to NOT remove user pages from DOM tree even when going into admin mode. Else,
             # the event handler registration that we do in the Javascript context (e.g. for file upload) will no longer work
             self.app_body.children = [self.user_page_stepper, self.user_page_container, self.admin_page]
 
+    def update_admin_page(self) -> None:
+        """Update the admin page, sending only the visible page of the submissions table to the browser"""
+        # Update the project filter options without triggering its onchange callback
+        project_options = tuple(
+            [("All projects", "")]
+            + [(dirname[len("agmipglobalecon") :], dirname) for dirname in self.model.submitted_project_dirnames]
+        )
+        if tuple(self.submissions_project_filter_ddown.options) != project_options:
+            self.submissions_project_filter_ddown.unobserve(self.ctrl.onchange_submissions_project_filter, "value")
+            self.submissions_project_filter_ddown.options = project_options
+            self.submissions_project_filter_ddown.value = (
+                self.model.submissions_project_filter
+                if self.model.submissions_project_filter in self.model.submitted_project_dirnames
+                else ""
+            )
+            self.submissions_project_filter_ddown.observe(self.ctrl.onchange_submissions_project_filter, "value")
+        # Update the table
+        table_rows = ""
+        page_rows = self.model.get_submitted_files_page()
+        for row in page_rows:
+            table_rows += "<tr>"
+            for field in row:
+                table_rows += f"<td>{html.escape(field)}</td>"
+            table_rows += "</tr>"
+        for _ in range(len(page_rows), self.model.SUBMISSIONS_PAGE_SIZE):
+            table_rows += "<tr><td>-</td><td>-</td><td>-</td><td>-</td><td>-</td></tr>"
+        self.submissions_tbl.value = f"""
+            <table class="table">
+                <thead>
+                    <th style="width: 300px;">File</th>
+                    <th style="width: 200px;">Associated Project</th>
+                    <th style="width: 100px;">Status</th>
+                    <th style="width: 150px;">Submitted</th>
+                    <th style="width: 100px;">Size</th>
+                </thead>
+                <tbody>
+                    {table_rows}
+                </tbody>
+            </table>
+        """
+        # Update the statistics & pagination widgets
+        self.submissions_statistics_lbl.value = self.model.get_submissions_statistics()
+        self.submissions_page_lbl.value = (
+            f"Page {self.model.submissions_page + 1} of {self.model.nsubmissions_pages}"
+            f" ({self.model.nfiltered_submitted_files} files)"
+        )
+        self.previous_submissions_page_btn.disabled = self.model.submissions_page == 0
+        self.next_submissions_page_btn.disabled = self.model.submissions_page >= self.model.nsubmissions_pages - 1
+        # Update the profiling widgets
+        self.profiling_checkbox.unobserve(self.ctrl.onchange_profiling_checkbox, "value")
+        self.profiling_checkbox.value = self.model.profiling_is_enabled
+        self.profiling_checkbox.observe(self.ctrl.onchange_profiling_checkbox, "value")
+        table_rows = ""
+        for report_path, created, size in self.model.profiling_reports_tbl:
+            table_rows += (
+                f'<tr><td><a href="{html.escape(report_path)}" download>{html.escape(Path(report_path).name)}</a></td>'
+                f"<td>{html.escape(created)}</td><td>{html.escape(size)}</td></tr>"
+            )
+        if len(self.model.profiling_reports_tbl) == 0:
+            table_rows = "<tr><td>-</td><td>-</td><td>-</td></tr>"
+        self.profiling_reports_tbl.value = f"""
+            <table class="table">
+                <thead>
+                    <th style="width: 450px;">Report</th>
+                    <th style="width: 200px;">Created</th>
+                    <th style="width: 100px;">Size</th>
+                </thead>
+                <tbody>
+                    {table_rows}
+                </tbody>
+            </table>
+        """
+
     def update_file_upload_page(self) -> None:
         """Update the file upload page"""
         # Update the file name snackbar
@@ -287,6 +380,7 @@ class View:
 
     def update_data_specification_page(self):
         """Update the state of data specification page"""
+        self._build_later_user_pages()
         assert self.DATA_SPEC_PAGE_IS_BEING_UPDATED != True
         self.DATA_SPEC_PAGE_IS_BEING_UPDATED = True
         # Update input format specification widgets
@@ -353,11 +447,35 @@ class View:
 
     def update_integrity_checking_page(self) -> None:
         """Update the integrity checking page"""
+        self._build_later_user_pages()
         # Update the row summary labels
         self.rows_w_struct_issues_lbl.value = "{:,}".format(self.model.nrows_w_struct_issue)
         self.rows_w_ignored_scenario_lbl.value = "{:,}".format(self.model.nrows_w_ignored_scenario)
         self.duplicate_rows_lbl.value = "{:,}".format(self.model.nrows_duplicates)
         self.accepted_rows_lbl.value = "{:,}".format(self.model.nrows_accepted)
+        # Update the structural issues breakdown table
+        _table_rows = ""
+        for row in self.model.struct_issues_overview_tbl:
+            _table_rows += "<tr>"
+            for field in row:
+                field = html.escape(field)
+                _table_rows += f'<td title="{field}">{field}</td>'
+            _table_rows += "</tr>"
+        if len(self.model.struct_issues_overview_tbl) == 0:
+            _table_rows = "<tr><td>-</td><td>-</td><td>-</td><td>-</td></tr>"
+        self.struct_issues_tbl.value = f"""
+            <table>
+                <thead>
+                    <th>Issue</th>
+                    <th>Variable</th>
+                    <th>Rows</th>
+                    <th>Example rows</th>
+                </thead>
+                <tbody>
+                    {_table_rows}
+                </tbody>
+            </table>
+            """
         # Update the bad labels overview table
         _table_rows = ""
         for row in self.model.bad_labels_overview_tbl:
@@ -467,6 +585,7 @@ class View:
 
     def update_plausibility_checking_page(self) -> None:
         """Update the plausibility checking page"""
+        self._build_later_user_pages()
         # Update the style and visibility of tab elements and tab content
         is_active: Callable[[VisualizationTab], bool] = lambda tab: self.model.active_visualization_tab == tab
         # - update the style and visibility of value trends tab element & content
@@ -571,6 +690,7 @@ class View:
             plt.grid()
             plt.show()
 
+    @instrumented("View._build_app")
     def _build_app(self) -> ui.Box:
         """Build the application"""
         # Constants
@@ -602,19 +722,11 @@ class View:
             stepper_children.append(stepper_element)
         self.user_page_stepper = ui.HBox(children=stepper_children)
         # - create user pages & user page container
+        # - only the first page is built here, so that it can be shown sooner (see _build_later_user_pages())
         self.user_page_container = ui.Box(
-            children=[
-                self._build_file_upload_page(),
-                self._build_data_specification_page(),
-                self._build_integrity_checking_page(),
-                self._build_plausibility_checking_page(),
-            ],
+            children=[self._build_file_upload_page()] + [ui.Box() for _ in range(1, NUM_OF_PAGES)],
             layout=ui.Layout(flex="1", width="100%"),  # page container stores the current page
         )
-        for page in self.user_page_container.children[1:]:  # hide all pages, except for the first one
-            page.add_class(CSS.DISPLAY_MOD__NONE)
-        # Create admin mode widgets
-        self.admin_page = self._build_admin_page()
         # Create app header
         self.user_mode_btn = ui.Button(description="User Mode")
         self.user_mode_btn.on_click(self.ctrl.onclick_user_mode_btn)
@@ -639,6 +751,30 @@ class View:
         app.add_class(CSS.APP)
         return app
 
+    def _build_later_user_pages(self) -> None:
+        """
+        Build the user pages after the file upload page, and put them into the user page container (only once)
+        NOTE: This is run in the background after the app is displayed, but every method that updates the user pages 
+        calls it too, in case the user moves on before the pages were built
+        """
+        with self._later_user_pages_lock:
+            if self._later_user_pages_are_built:
+                return
+            later_user_pages = self._create_later_user_pages()
+            for page in later_user_pages:  # hide all pages, except for the first one
+                page.add_class(CSS.DISPLAY_MOD__NONE)
+            self.user_page_container.children = [self.user_page_container.children[0]] + later_user_pages
+            self._later_user_pages_are_built = True
+
+    @instrumented("View._build_later_user_pages")
+    def _create_later_user_pages(self) -> List[ui.Box]:
+        """Return the data specification, integrity checking, and plausibility checking pages"""
+        return [
+            self._build_data_specification_page(),
+            self._build_integrity_checking_page(),
+            self._build_plausibility_checking_page(),
+        ]
+
     def _build_file_upload_page(self) -> ui.Box:
         """Build the file upload page"""
         # Create the upload area component (or ua for short)
@@ -675,7 +811,7 @@ class View:
                     # NOTE: this widget will be targeted from the Javascript context by using the CSS class name,
                     # so do not remove the CSS class assignment
                     value=f"""
-                    <input class="{CSS.UA__FILE_UPLOADER}" type="file" title="Click to browse" accept=".csv">
+                    <input class="{CSS.UA__FILE_UPLOADER}" type="file" title="Click to browse" accept=".csv,.gz,.zip">
                     """
                 ),
                 self.ua_file_label,  # - hidden file label
@@ -913,19 +1049,10 @@ class View:
         # Create the control widgets
         # - create row download buttons
         # - we assume that the download paths are constant. else, the href values need to be updated during page update
-        download_rows_field_issues_btn = ui.HTML(
-            value=f"""
-                <a
-                    href="{str(self.model.STRUCTISSUEFILE_PATH)}" 
-                    download="{str(self.model.STRUCTISSUEFILE_PATH.name)}"
-                    class="{CSS.ICON_BUTTON}"
-                    style="line-height:36px;"
-                    title=""
-                >
-                    <i class="fa fa-download" style="margin-left: 4px;"></i>
-                </a>
-            """
-        )
+        # - the file of rows with structural issue is only written when requested, so it's downloaded via a callback
+        download_rows_field_issues_btn = ui.Button(icon="download", layout=ui.Layout(padding="0px 0px"))
+        download_rows_field_issues_btn._dom_classes = (CSS.ICON_BUTTON,)
+        download_rows_field_issues_btn.on_click(self.ctrl.onclick_download_rows_w_struct_issue)
         download_rows_w_ignored_scenario_btn = ui.HTML(
             value=f"""
                 <a
@@ -970,6 +1097,9 @@ class View:
         self.rows_w_ignored_scenario_lbl = ui.Label(value="0")
         self.duplicate_rows_lbl = ui.Label(value="0")
         self.accepted_rows_lbl = ui.Label(value="0")
+        # - create structural issues breakdown table
+        self.struct_issues_tbl = ui.HTML(value="")
+        self.struct_issues_tbl.add_class(CSS.STRUCT_ISSUES_TABLE)
         # - create bad labels table
         self.bad_labels_tbl = ui.HTML(
             value=f"""
@@ -1107,8 +1237,19 @@ class View:
                                 ),
                             ]
                         ),
+                        ui.HTML(  # --- structural issues breakdown title
+                            value='<b style="line-height:13px; margin-bottom:4px;">Structural issues breakdown</b>'
+                        ),
+                        ui.HTML(  # --- structural issues breakdown description
+                            value=(
+                                '<span style="line-height: 13px; color: var(--grey);">The table lists the'
+                                " structural issues found in the rows, with the numbers of the first rows that"
+                                " have them."
+                            )
+                        ),
+                        self.struct_issues_tbl,  # --- structural issues breakdown table
                         ui.HTML(  # --- bad labels overview title
-                            value='<b style="line-height:13px; margin-bottom:4px;">Bad labels overview</b>'
+                            value='<b style="line-height:13px; margin: 20px 0px 4px;">Bad labels overview</b>'
                         ),
                         ui.HTML(  # --- bad labels overview description
                             value=(
@@ -1305,41 +1446,74 @@ class View:
 
     def _build_admin_page(self) -> ui.Box:
         """Return an admin page"""
-        table_rows = ""
-        for row in self.model.get_submitted_files_info():
-            table_rows += "<tr>"
-            for colidx in range(len(row)):
-                field = row[colidx]
-                table_rows += f"<td>{field}</td>"
-            table_rows += "</tr>"
-        self.submissions_tbl = ui.HTML(
-            value=f"""
-            <table class="table">
-                <thead>
-                    <th style="width: 350px;">File</th>
-                    <th style="width: 200px;">Associated Project</th>
-                    <th style="width: 150px;">Status</th>
-                </thead>
-                <tbody>
-                    {table_rows}
-                    {''' 
-                    <tr>
-                        <td>-</td>
-                        <td>-</td>
-                        <td>-</td>
-                    <tr>
-                    ''' * (15 - len(table_rows))
-                    }
-                </tbody>
-            </table>
-        """
+        # The table is populated by update_admin_page() whenever the admin mode is entered
+        self.submissions_tbl = ui.HTML(value="")
+        # - filter & sort widgets
+        self.submissions_name_filter_txt = ui.Text(
+            placeholder="Filter by file, model or user", continuous_update=False, layout=ui.Layout(width="200px")
+        )
+        self.submissions_name_filter_txt.observe(self.ctrl.onchange_submissions_name_filter, "value")
+        self.submissions_project_filter_ddown = ui.Dropdown(options=[("All projects", "")], layout=ui.Layout(width="180px"))
+        self.submissions_project_filter_ddown.observe(self.ctrl.onchange_submissions_project_filter, "value")
+        self.submissions_status_filter_ddown = ui.Dropdown(
+            options=[("All statuses", "")] + [(status, status) for status in self.model.SUBMISSION_STATUSES],
+            layout=ui.Layout(width="130px"),
+        )
+        self.submissions_status_filter_ddown.observe(self.ctrl.onchange_submissions_status_filter, "value")
+        self.submissions_sort_key_ddown = ui.Dropdown(
+            description="Sort by",
+            options=self.model.SUBMISSIONS_SORT_KEYS,
+            value=self.model.submissions_sort_key,
+            layout=ui.Layout(width="220px"),
+        )
+        self.submissions_sort_key_ddown.observe(self.ctrl.onchange_submissions_sort_key, "value")
+        self.submissions_sort_order_ddown = ui.Dropdown(
+            options=[("Descending", False), ("Ascending", True)],
+            value=self.model.submissions_sort_ascending,
+            layout=ui.Layout(width="120px"),
+        )
+        self.submissions_sort_order_ddown.observe(self.ctrl.onchange_submissions_sort_order, "value")
+        # - pagination widgets
+        self.previous_submissions_page_btn = ui.Button(description="Previous", layout=ui.Layout(width="90px"))
+        self.previous_submissions_page_btn.on_click(self.ctrl.onclick_previous_submissions_page)
+        self.next_submissions_page_btn = ui.Button(description="Next", layout=ui.Layout(width="90px"))
+        self.next_submissions_page_btn.on_click(self.ctrl.onclick_next_submissions_page)
+        self.submissions_page_lbl = ui.Label(value="")
+        self.submissions_statistics_lbl = ui.Label(value="")
+        # - profiling widgets
+        self.profiling_checkbox = ui.Checkbox(
+            value=self.model.profiling_is_enabled, description="Profile page transitions in this session", indent=False
         )
+        self.profiling_checkbox.observe(self.ctrl.onchange_profiling_checkbox, "value")
+        self.profiling_reports_tbl = ui.HTML(value="")
         return ui.VBox(  # vbox for page
             children=[
                 ui.VBox(
                     children=[
                         ui.HTML(value='<h4 style="margin: 16px 0px;">Submission history</h4>'),  # - table title
+                        ui.HBox(  # - hbox for filter & sort widgets
+                            children=[
+                                self.submissions_name_filter_txt,
+                                self.submissions_project_filter_ddown,
+                                self.submissions_status_filter_ddown,
+                                self.submissions_sort_key_ddown,
+                                self.submissions_sort_order_ddown,
+                            ],
+                        ),
                         self.submissions_tbl,
+                        ui.HBox(  # - hbox for statistics & pagination widgets
+                            children=[
+                                self.submissions_statistics_lbl,
+                                ui.HBox(layout=ui.Layout(flex="1")),  # -- spacer
+                                self.submissions_page_lbl,
+                                self.previous_submissions_page_btn,
+                                self.next_submissions_page_btn,
+                            ],
+                            layout=ui.Layout(align_items="center", justify_content="flex-end", width="100%"),
+                        ),
+                        ui.HTML(value='<h4 style="margin: 16px 0px;">Profiling reports</h4>'),  # - table title
+                        self.profiling_checkbox,
+                        self.profiling_reports_tbl,
                     ],
                     layout=ui.Layout(align_items="flex-start"),
                 )
@@ -0,0 +1,12 @@
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+import pytest
+
+from scripts import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def stage_log_in_tmp_path(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Log the instrumented stages of every test into its temporary directory, instead of the working directory"""
+    monkeypatch.setattr(instrumentation, "STAGELOG_PATH", tmp_path / "pipeline_stages.jsonl")
@@ -0,0 +1,104 @@
+from concurrent.futures.process import BrokenProcessPool
+import json
+from pathlib import Path
+
+from scripts import batch
+from scripts.batch import EXIT_ERROR, EXIT_OK, EXIT_REJECTED_ROWS, SUMMARY_FILE_NAME, main
+
+ROWS = [
+    "Model,Scenario,Region,Item,Variable,Year,Unit,Notes,Value",
+    "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,RIC,CONS,2020,1000 t dm,,183.6566783",
+    "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,RIC,CONS,2030,1000 t dm,,170.3285805",
+]
+OPT_LINES = [
+    "Model:",
+    "AIM",
+    "Folder:",
+    "V:/AgMIP/AIM",
+    "Filename:",
+    "input",
+    "Skip:",
+    "0",
+    "Concordance (requires 7 lines):",
+    "2",
+    "3",
+    "5",
+    "4",
+    "6",
+    "7",
+    "9",
+    "Year column:",
+    "5",
+    "Value column:",
+    "7",
+    "Unit column:",
+    "6",
+]
+
+
+def _write_lines(file_path: Path, lines: list) -> Path:
+    with open(str(file_path), "w") as file:
+        for line in lines:
+            file.write(line + "\n")
+    return file_path
+
+
+def test_batch_w_opt_spec(tmp_path: Path) -> None:
+    """Test if an input file named by a legacy option file is processed headless"""
+    _write_lines(tmp_path / "input.csv", ROWS)
+    spec_path = _write_lines(tmp_path / "AIM.opt", OPT_LINES)
+    output_dir_path = tmp_path / "output"
+    assert main([str(spec_path), "--output-dir", str(output_dir_path), "--workers", "1"]) == EXIT_OK
+    with open(str(output_dir_path / "input.csv" / SUMMARY_FILE_NAME)) as summaryfile:
+        summary = json.load(summaryfile)
+    assert summary["model_name"] == "AIM"
+    assert summary["nrows_accepted"] == 2
+    assert summary["nrows_processed"] == 2
+    assert (output_dir_path / "input.csv" / "Accepted Records.csv").is_file()
+
+
+def test_batch_w_json_spec(tmp_path: Path) -> None:
+    """Test if exit codes reflect rejected rows and unprocessable files"""
+    input_path = _write_lines(tmp_path / "input.csv", ROWS + ["AIM,SSP2_NoMt_NoCC_FlexA_DEV,,RIC,CONS,2050,1000 t dm,,1"])
+    spec_path = tmp_path / "spec.json"
+    with open(str(spec_path), "w") as specfile:
+        json.dump({"model_name": "AIM", "value_colnum": 9}, specfile)
+    output_dir_path = tmp_path / "output"
+    args = [str(input_path), "--spec", str(spec_path), "--output-dir", str(output_dir_path), "--workers", "2"]
+    assert main(args) == EXIT_REJECTED_ROWS
+    with open(str(output_dir_path / "input.csv" / SUMMARY_FILE_NAME)) as summaryfile:
+        summary = json.load(summaryfile)
+    assert summary["nrows_w_struct_issue"] == 1
+    assert summary["struct_issues"][0]["example_rownums"] == [4]
+    assert main([str(tmp_path / "missing.csv"), "--output-dir", str(output_dir_path)]) == EXIT_ERROR
+
+
+def test_batch_w_utf16_input(tmp_path: Path) -> None:
+    """Test if a UTF-16 input file is transcoded into its output directory instead of next to the input file"""
+    input_dir_path = tmp_path / "input"
+    input_dir_path.mkdir()
+    input_path = input_dir_path / "input.csv"
+    input_path.write_bytes("".join(row + "\n" for row in ROWS).encode("utf-16"))
+    spec_path = tmp_path / "spec.json"
+    with open(str(spec_path), "w") as specfile:
+        json.dump({"model_name": "AIM", "value_colnum": 9}, specfile)
+    output_dir_path = tmp_path / "output"
+    args = [str(input_path), "--spec", str(spec_path), "--output-dir", str(output_dir_path), "--workers", "1"]
+    assert main(args) == EXIT_OK
+    assert list(input_dir_path.iterdir()) == [input_path]
+    with open(str(output_dir_path / "input.csv" / SUMMARY_FILE_NAME)) as summaryfile:
+        assert json.load(summaryfile)["nrows_processed"] == 2
+    # The UTF-8 copy is removed once the file is processed
+    assert not (output_dir_path / "input.csv" / ".input.csv.utf-8.csv").exists()
+
+
+def test_batch_w_crashed_worker(tmp_path: Path, monkeypatch) -> None:
+    """Test if a crashed worker process fails the run"""
+
+    class CrashingExecutor(batch.ProcessPoolExecutor):
+        def map(self, *args, **kwargs):
+            raise BrokenProcessPool("A worker process was terminated abruptly")
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", CrashingExecutor)
+    input_path = _write_lines(tmp_path / "input.csv", ROWS)
+    assert main([str(input_path), "--output-dir", str(tmp_path / "output"), "--workers", "1"]) == EXIT_ERROR
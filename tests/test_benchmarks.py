@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from benchmarks.run import STAGES, find_regressions, run_benchmarks
+from benchmarks.synthetic import write_synthetic_submission
+from scripts.domain import InputDataDiagnosis, InputDataEntity, OutputDataEntity
+
+
+def test_write_synthetic_submission(tmp_path: Path) -> None:
+    """Test if a synthetic submission file has the requested rows, with each kind of issue injected"""
+    input_path = tmp_path / "synthetic.csv"
+    spec = write_synthetic_submission(
+        input_path,
+        2000,
+        bad_label_rate=0.05,
+        unknown_label_rate=0.05,
+        duplicate_rate=0.05,
+        struct_issue_rate=0.05,
+        unknown_variable_rate=0.05,
+    )
+    with open(str(input_path)) as file:
+        assert len(file.readlines()) == 2001
+    input_entity = InputDataEntity.create(input_path)
+    input_entity.apply_spec(spec)
+    diagnosis = InputDataDiagnosis.create(input_entity, tmp_path)
+    assert diagnosis.nrows_w_struct_issue > 0
+    assert diagnosis.nrows_duplicate > 0
+    assert len(diagnosis.bad_labels) > 0
+    assert len(diagnosis.unknown_labels) > 0
+    assert diagnosis.nrows_accepted > 1500
+    assert any(
+        label_info.associated_column == diagnosis.VARIABLE_COLNAME for label_info in diagnosis.unknown_labels
+    )
+    # Fixing the unknown variables reveals out-of-range values
+    output_entity = OutputDataEntity.create(input_entity, diagnosis, tmp_path)
+    for label_info in diagnosis.unknown_labels:
+        label_info.fix = label_info.closest_match
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels)
+
+
+def test_run_benchmarks() -> None:
+    """Test if every stage is benchmarked, and if regressions are found by comparing results"""
+    results = run_benchmarks([1000])
+    assert [benchmark["name"] for benchmark in results["benchmarks"]] == STAGES
+    assert find_regressions(results, results) == []
+    slower_results = {"benchmarks": [dict(benchmark, median=benchmark["median"] + 1) for benchmark in results["benchmarks"]]}
+    assert len(find_regressions(slower_results, results)) == len(STAGES)
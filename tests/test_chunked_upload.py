@@ -0,0 +1,59 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.domain import ChunkedUpload
+
+
+FILE_CONTENT = b"AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2020,183.6566783\n" * 10
+CHUNK_SIZE = 256
+
+
+def _upload_chunks(dir_path: Path, indexes: list) -> None:
+    """Mimic the upload of the given chunks by the browser"""
+    dir_path.mkdir(parents=True, exist_ok=True)
+    nchunks = -(-len(FILE_CONTENT) // CHUNK_SIZE)
+    manifest = {"file_name": "upload.csv", "file_size": len(FILE_CONTENT), "chunk_size": CHUNK_SIZE, "nchunks": nchunks, "chunks": {}}
+    manifest_path = dir_path / ChunkedUpload.MANIFEST_NAME
+    if manifest_path.is_file():
+        manifest = json.loads(manifest_path.read_text())
+    for index in indexes:
+        chunk = FILE_CONTENT[index * CHUNK_SIZE : (index + 1) * CHUNK_SIZE]
+        (dir_path / f"{index}.part").write_bytes(chunk)
+        manifest["chunks"][str(index)] = hashlib.sha256(chunk).hexdigest()
+    manifest_path.write_text(json.dumps(manifest))
+
+
+def test_assemble_resumed_upload(tmp_path: Path) -> None:
+    """Test if an upload is only assembled after all chunks are confirmed"""
+    chunksdir_path = tmp_path / ChunkedUpload.CHUNKSDIR_NAME / "upload.csv.700.1"
+    _upload_chunks(chunksdir_path, [0, 2])
+    with pytest.raises(Exception, match="incomplete"):
+        ChunkedUpload.create(chunksdir_path).assemble(tmp_path)
+    _upload_chunks(chunksdir_path, [1])  # Resume the upload
+    file_path = ChunkedUpload.create(chunksdir_path).assemble(tmp_path)
+    assert file_path == tmp_path / "upload.csv"
+    assert file_path.read_bytes() == FILE_CONTENT
+    assert not chunksdir_path.exists()
+
+
+def test_assemble_corrupted_upload(tmp_path: Path) -> None:
+    """Test if corrupted chunks are dropped from the manifest so that they are resent"""
+    chunksdir_path = tmp_path / ChunkedUpload.CHUNKSDIR_NAME / "upload.csv.700.1"
+    _upload_chunks(chunksdir_path, [0, 1, 2])
+    (chunksdir_path / "1.part").write_bytes(b"x" * CHUNK_SIZE)
+    with pytest.raises(Exception, match="corrupted"):
+        ChunkedUpload.create(chunksdir_path).assemble(tmp_path)
+    assert sorted(ChunkedUpload.create(chunksdir_path).chunk_checksums.keys()) == [0, 2]
+    _upload_chunks(chunksdir_path, [1])
+    assert ChunkedUpload.create(chunksdir_path).assemble(tmp_path).read_bytes() == FILE_CONTENT
+
+
+def test_is_valid_upload_id() -> None:
+    """Test if only upload IDs made by the browser are accepted as chunk directory names"""
+    assert ChunkedUpload.is_valid_upload_id("upload.csv.700.1")
+    assert ChunkedUpload.is_valid_upload_id("my_upload-2.csv.gz.700.1")
+    for upload_id in ["", ".", "..", "../upload.csv.700.1", "/tmp", "a/b", "a\\b", "upload .csv"]:
+        assert not ChunkedUpload.is_valid_upload_id(upload_id)
@@ -1,5 +1,8 @@
+import csv
+import gzip
 import sys
 import os
+import zipfile
 import pandas as pd
 from pathlib import Path
 import pytest
@@ -8,7 +11,7 @@ from typing import List
 # Modify PATH so that the following imports work
 sys.path.insert(0, os.path.dirname("scripts"))
 from scripts.model import Model
-from scripts.domain import InputDataDiagnosis, InputDataEntity, OutputDataEntity
+from scripts.domain import InputDataDiagnosis, InputDataEntity, OutputDataEntity, StructIssueCode
 
 
 class InputEntityFactory:
@@ -27,7 +30,11 @@ class InputEntityFactory:
             "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,2030,1000 t fm,151.8507839",
         ]
         """
-        filepath = cls._create_test_file(rows)
+        return cls.create_from_file(cls._create_test_file(rows))
+
+    @classmethod
+    def create_from_file(cls, filepath: Path) -> InputDataEntity:
+        """Create and return an input entity from a file whose format is like in create_from_sample_rows()"""
         input_entity = InputDataEntity.create(filepath)
         input_entity.delimiter = ","
         input_entity.header_is_included = False
@@ -102,13 +109,24 @@ def test_rows_w_structural_issue():
     diagnosis = InputDataDiagnosis.create(input_entity)
     assert diagnosis.nrows_w_struct_issue == 5
     assert diagnosis.nrows_accepted == len(ROWS) - 5
+    with open(diagnosis.write_struct_issue_report(), "r") as structissuefile:
+        lines = structissuefile.read().splitlines()
+    # Each row is padded to the largest number of columns (10), after its row number and before its issue
+    assert [len(line.split(",")) for line in lines] == [12] * 5
+    assert lines[0] == "10,row with mismatched ncols,a,a,a,a,a,a,a,a,a,Mismatched number of fields"
+    assert lines[1] == "11,row with mismatched ncols,,,,,,,,,,Mismatched number of fields"
+    assert lines[3].endswith(",,,Empty region field")
+    # Issues are counted per code, with the first row numbers as examples
+    assert diagnosis.struct_issues[(StructIssueCode.MISMATCHED_NCOLUMNS, "")].nrows == 3
+    assert diagnosis.struct_issues[(StructIssueCode.MISMATCHED_NCOLUMNS, "")].example_rownums == [10, 11, 12]
+    assert diagnosis.struct_issues[(StructIssueCode.EMPTY_REGION, "")].example_rownums == [13, 14]
 
 
 def test_rows_with_ignored_scenario():
     """Test if rows with an ignored scenario are pruned correctly"""
     ROWS = [
         "ignored scenario 1,CAN,CONS,RIC,2010,1000 t dm,162.6840595",
-        "ignored scenario 2,CAN,CONS,RIC,2010,1000 t dm,162.6840595",
+        'ignored scenario 2,CAN,CONS,"RIC, paddy",2010,1000 t dm,162.6840595',
         "SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,2020,1000 t dm,183.6566783",
         "SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,2030,1000 t dm,170.3285805",
         "SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,2050,1000 t dm,158.6103519",
@@ -123,6 +141,9 @@ def test_rows_with_ignored_scenario():
     diagnosis = InputDataDiagnosis.create(input_entity)
     assert diagnosis.nrows_w_ignored_scenario == len(ignored_scenarios)
     assert diagnosis.nrows_accepted == len(ROWS) - len(ignored_scenarios)
+    with open(str(diagnosis.IGNOREDSCENARIOROWS_DSTPATH), "r", newline="") as ignoredscenfile:
+        logged_rows = list(csv.reader(ignoredscenfile))
+    assert logged_rows[1] == ["2", "ignored scenario 2", "CAN", "CONS", "RIC, paddy", "2010", "1000 t dm", "162.6840595"]
 
 
 def test_bad_labels() -> None:
@@ -160,31 +181,66 @@ def test_unknown_labels() -> None:
     assert len(diagnosis.unknown_labels) == len(unknown_labels)
 
 
-def test_fixed_unknown_label_w_out_of_bound_value() -> None:
-    """
-    Test if records with unknown labels and out-of-bound values are identified correctly
-    (after the labels were fixed)
-    """
+def test_compressed_input_files(tmp_path: Path) -> None:
+    """Test if gzip and zip compressed input files are diagnosed like the uncompressed file"""
+    ROWS = [
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,2030,1000 t fm,151.8507839",
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,2030,1000 t fm,151.8507839",
+        "SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,2020,1000 t dm,183.6566783",
+    ]
+    content = "".join(row + "\n" for row in ROWS)
+    gzipfile_path = tmp_path / "input.csv.gz"
+    with gzip.open(str(gzipfile_path), "wt") as gzipfile:
+        gzipfile.write(content)
+    zipfile_path = tmp_path / "input.zip"
+    with zipfile.ZipFile(str(zipfile_path), "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("input.csv", content)
+    for filepath in [gzipfile_path, zipfile_path]:
+        input_entity = InputEntityFactory.create_from_file(filepath)
+        assert input_entity.file_stem == "input"
+        assert input_entity.sample_parsed_input_data[2][:-1] == ROWS[2].split(",")[:-1]
+        diagnosis = InputDataDiagnosis.create(input_entity)
+        assert diagnosis.nrows_duplicate == 1
+        assert diagnosis.nrows_accepted == 2
+
+
+def test_quoted_fields_w_delimiter():
+    """Test if quoted fields that contain the delimiter are not mistaken for rows with structural issues"""
     ROWS = [
-        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,151",  # valid value
-        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,99999999999999999999",  # invalid value
-        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT,VFN|VEG,2030,million_XYZW,99999999999999999999",  # invalid value
+        '"SSP2_NoMt_NoCC_FlexA_WLD_2500","MEN","OTHU","VFN|VEG",2030,"1000 t fm",151.8507839',
+        '"SSP2_NoMt_NoCC_FlexA_DEV","CAN","CONS","RIC, paddy",2020,"1000 t dm",183.6566783',
     ]
     input_entity = InputEntityFactory.create_from_sample_rows(ROWS)
+    assert input_entity.sample_parsed_input_data[1][3] == "RIC, paddy"
     diagnosis = InputDataDiagnosis.create(input_entity)
-    assert len(diagnosis.unknown_labels) == 2
-    for label_info in diagnosis.unknown_labels:
-        if label_info.associated_column == diagnosis.VARIABLE_COLNAME:
-            label_info.fix = "POPT"
-        elif label_info.associated_column == diagnosis.UNIT_COLNAME:
-            label_info.fix = "million"
-        else:
-            print(label_info)
-            raise Exception("Unexpected unknown label info")
-    output_entity = OutputDataEntity.create(input_entity, diagnosis)
-    assert output_entity.processed_data.shape[0] == len(ROWS)
-    assert diagnosis.rediagnose_n_filter_output_data(output_entity) == True
-    with open(diagnosis.FILTERED_OUTPUT_DSTPATH, "r") as filteredfile:
-        lines = filteredfile.readlines()
-        assert len(lines) == 1  # filtered output file should contain only 1 valid row
-        assert lines[0].strip('\n').split(",")[-1] == '151'
\ No newline at end of file
+    assert diagnosis.nrows_w_struct_issue == 0
+    assert diagnosis.nrows_accepted == len(ROWS)
+    assert "RIC, paddy" in [label_info.label for label_info in diagnosis.unknown_labels]
+
+
+def test_unused_columns(tmp_path: Path) -> None:
+    """Test if unused columns are left out of the accepted records while still being counted for structural checks"""
+    ROWS = [
+        'note,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,"long, quoted description",2020,1000 t dm,183.6566783',
+        'note,SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,,2030,1000 t fm,151.8507839',
+        'note,SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,"VFN, VEG",2030,1000 t fm,151.8507839',  # mismatched ncols
+    ]
+    input_entity = InputEntityFactory.create_from_sample_rows(ROWS)
+    input_entity.scenario_colnum = 2
+    input_entity.region_colnum = 3
+    input_entity.variable_colnum = 4
+    input_entity.item_colnum = 5
+    input_entity.year_colnum = 7
+    input_entity.unit_colnum = 8
+    input_entity.value_colnum = 9
+    diagnosis = InputDataDiagnosis.create(input_entity, tmp_path)
+    assert diagnosis.nrows_w_struct_issue == 1
+    assert diagnosis.nrows_accepted == 2
+    with open(diagnosis.write_struct_issue_report(), "r", newline="") as structissuefile:
+        logged_rows = list(csv.reader(structissuefile))
+    assert logged_rows[0][:6] == ["3", "note", "SSP2_NoMt_NoCC_FlexA_WLD_2500", "MEN", "OTHU", "VFN, VEG"]
+    assert len(logged_rows[0]) == 9 + 2  # - padded to the largest number of columns
+    output_entity = OutputDataEntity.create(input_entity, diagnosis, tmp_path)
+    assert output_entity.processed_data.shape == (2, 8)
+    assert output_entity.processed_data[OutputDataEntity.UNIT_COLNAME].tolist() == ["1000 t dm", "1000 t fm"]
+    assert output_entity.processed_data[OutputDataEntity.YEAR_COLNAME].astype(int).tolist() == [2020, 2030]
@@ -0,0 +1,150 @@
+import csv
+from pathlib import Path
+
+from scripts.domain import InputDataEntity
+from scripts.utils import Delimiter
+
+
+def _create_input_entity(tmp_path: Path, lines: list) -> InputDataEntity:
+    file_path = tmp_path / "input.csv"
+    with open(str(file_path), "w") as file:
+        for line in lines:
+            file.write(line + "\n")
+    return InputDataEntity.create(file_path)
+
+
+def test_guess_input_format_w_header_n_initial_lines(tmp_path: Path) -> None:
+    """Test if the input format of a file with a header row and initial comment lines is guessed correctly"""
+    lines = [
+        "Submitted by: AIM team",
+        "",
+        "Scenario;Region;Variable;Item;Year;Unit;Value",
+        "SSP2_NoMt_NoCC_FlexA_DEV;CAN;CONS;RIC;2020;1000 t dm;183.6566783",
+        "SSP2_NoMt_NoCC_FlexA_DEV;CAN;CONS;RIC;2030;1000 t dm;170.3285805",
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500;MEN;OTHU;VFN|VEG;2030;million;151.8507839",
+    ]
+    input_entity = _create_input_entity(tmp_path, lines)
+    assert input_entity.guess_input_format(Delimiter.get_models())
+    assert input_entity.delimiter == ";"
+    assert input_entity.initial_lines_to_skip == 2
+    assert input_entity.header_is_included
+    assert input_entity.quoting == csv.QUOTE_NONE
+
+
+def test_sample_of_large_file(tmp_path: Path) -> None:
+    """Test if only a bounded sample of a large file is kept, and if skipping lines moves the sample down the file"""
+    nrows_in_sample = InputDataEntity._NROWS_IN_SAMPLE_DATA
+    nlines_in_head = InputDataEntity._NLINES_IN_CACHED_HEAD
+    lines = [
+        f"SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,{index},1000 t dm,1.0" for index in range(nlines_in_head + nrows_in_sample * 2)
+    ]
+    input_entity = _create_input_entity(tmp_path, lines)
+    assert input_entity.file_nrows == len(lines)
+    assert len(input_entity._input_data_topmost_sample) == nrows_in_sample
+    input_entity.delimiter = ","
+    # Samples within the cached head are sliced from it, while the others are read from the file
+    for nlines_to_skip in [10, nlines_in_head - nrows_in_sample, nlines_in_head + 500, len(lines) - 10, len(lines) + 1, 0]:
+        input_entity.initial_lines_to_skip = nlines_to_skip
+        sample_years = [row[4] for row in input_entity.sample_parsed_input_data]
+        expected_nrows = max(min(nrows_in_sample, len(lines) - nlines_to_skip), 0)
+        assert sample_years == [str(index) for index in range(nlines_to_skip, nlines_to_skip + expected_nrows)]
+
+
+def test_guess_input_format_w_quoted_fields(tmp_path: Path) -> None:
+    """Test if a delimiter inside quoted fields does not affect the guessed delimiter"""
+    lines = [
+        'SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,"RIC, paddy",2020,1000 t dm,183.6566783',
+        'SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,"RIC, paddy",2030,1000 t dm,170.3285805',
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,2030,million,151.8507839",
+    ]
+    input_entity = _create_input_entity(tmp_path, lines)
+    assert input_entity.guess_input_format(Delimiter.get_models())
+    assert input_entity.delimiter == ","
+    assert input_entity.initial_lines_to_skip == 0
+    assert not input_entity.header_is_included
+    assert input_entity.quoting == csv.QUOTE_MINIMAL
+
+
+def test_guess_encoding(tmp_path: Path) -> None:
+    """Test if files exported with a non-UTF-8 encoding (or a BOM) are decoded correctly"""
+    lines = [
+        "Scenario\tRegion\tVariable\tItem\tYear\tUnit\tValue",
+        "SSP2_NoMt_NoCC_FlexA_DEV\tCÔTE\tCONS\tRIC\t2020\t1000 t dm\t183.6566783",
+        "SSP2_NoMt_NoCC_FlexA_DEV\tCÔTE\tCONS\tRIC\t2030\t1000 t dm\t170.3285805",
+    ]
+    content = "".join(line + "\r\n" for line in lines)
+    for encoding, expected_encoding in [
+        ("utf-8", "utf-8"),
+        ("utf-8-sig", "utf-8-sig"),
+        ("cp1252", "cp1252"),
+        ("utf-16", "utf-16"),
+        ("utf-16-le", "utf-16-le"),
+    ]:
+        file_path = tmp_path / "input_{}.csv".format(encoding)
+        with open(str(file_path), "wb") as file:
+            file.write(content.encode(encoding))
+        input_entity = InputDataEntity.create(file_path)
+        assert input_entity.encoding == expected_encoding
+        # UTF-16 files are transcoded to UTF-8
+        assert InputDataEntity.get_transcoded_file_path(file_path).is_file() == encoding.startswith("utf-16")
+        assert input_entity.guess_input_format(Delimiter.get_models())
+        assert input_entity.delimiter == "\t"
+        assert input_entity.header_is_included
+        assert input_entity.sample_parsed_input_data[0][0] == "Scenario"
+        assert input_entity.sample_parsed_input_data[1][1] == "CÔTE"
+    # The UTF-8 copy can be written into another directory than the input file's
+    transcoding_dir_path = tmp_path / "transcoded"
+    transcoding_dir_path.mkdir()
+    input_entity = InputDataEntity.create(file_path, transcoding_dir_path)
+    assert InputDataEntity.get_transcoded_file_path(file_path, transcoding_dir_path).is_file()
+    assert input_entity.guess_input_format(Delimiter.get_models())
+    assert input_entity.sample_parsed_input_data[1][1] == "CÔTE"
+
+
+def test_load_opt_spec_file(tmp_path: Path) -> None:
+    """Test if a legacy option file is loaded into the input entity without guessing"""
+    lines = [
+        "Notes: exported by the IMPACT team",
+        "Scenario|Region|Variable|Item|Unit|Year|Value",
+        "SSP2_NoMt_NoCC_FlexA_DEV|CAN|CONS|RIC|1000 t dm|2020|183.6566783",
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500|MEN|OTHU|VFN|million|2030|151.8507839",
+    ]
+    input_entity = _create_input_entity(tmp_path, lines)
+    spec_lines = [
+        "Model:", "IMPACT",
+        "Folder:", "./",
+        "Filename:", "input",
+        "Skip:", "1",
+        "Delimiter:", "|",
+        "Concordance (requires 7 lines):", "1", "2", "3", "4", "6", "5", "7",
+        "Year column:", "5",
+        "Value column:", "7",
+        "Unit column:", "6",
+        "Drop scenarios:", "1", "SSP2_NoMt_NoCC_FlexA_WLD_2500",
+    ]
+    spec_file_path = tmp_path / "IMPACT.opt"
+    with open(str(spec_file_path), "w", newline="\r\n") as file:
+        file.write("\n".join(spec_lines) + "\n")
+    assert input_entity.find_spec_file(tmp_path) == spec_file_path
+    input_entity.load_spec_file(spec_file_path, Delimiter.get_models())
+    assert input_entity.model_name == "IMPACT"
+    assert input_entity.delimiter == "|"
+    assert input_entity.initial_lines_to_skip == 1
+    assert input_entity.header_is_included
+    assert input_entity.scenarios_to_ignore == ["SSP2_NoMt_NoCC_FlexA_WLD_2500"]
+    assert input_entity.assigned_colnums == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_guess_model_name_n_column_assignments(tmp_path: Path) -> None:
+    """Test if the column assignments are guessed from whole columns, and not from a stray cell"""
+    lines = [
+        "AIM,CAN,SSP2_NoMt_NoCC_FlexA_DEV,CONS,RIC,1000 t dm,2020,2010",
+        "AIM,CAN,SSP2_NoMt_NoCC_FlexA_DEV,CONS,RIC,1000 t dm,2030,170.3285805",
+        "AIM,MEN,SSP2_NoMt_NoCC_FlexA_WLD_2500,OTHU,VFN,million,2030,151.8507839",
+        "AIM,UnknownRegion,SSP2_NoMt_NoCC_FlexA_WLD_2500,OTHU,VFN,million,2050,151.8507839",
+    ]
+    input_entity = _create_input_entity(tmp_path, lines)
+    assert input_entity.guess_input_format(Delimiter.get_models())
+    assert input_entity.guess_model_name_n_column_assignments()
+    assert input_entity.model_name == "AIM"
+    assert input_entity.assigned_colnums == [3, 2, 4, 5, 6, 7, 8]
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from scripts import instrumentation
+from scripts.domain import InputDataEntity
+
+
+def test_instrumented_stage(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test if a call of an instrumented stage is logged with its usage, unless the instrumentation is turned off"""
+    log_path = tmp_path / "pipeline_stages.jsonl"
+    monkeypatch.setattr(instrumentation, "STAGELOG_PATH", log_path)
+    monkeypatch.delenv(instrumentation.ENV_VAR, raising=False)
+    input_path = tmp_path / "input.csv"
+    with open(str(input_path), "w") as file:
+        file.write("SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2020,183.6566783\n" * 10)
+    InputDataEntity.create(input_path)
+    records = instrumentation.read_records()  # - reads the redirected STAGELOG_PATH
+    assert len(records) == 1
+    assert records[0]["stage"] == "InputDataEntity.create"
+    assert records[0]["parent_stage"] is None
+    assert records[0]["nrows"] == 10
+    assert records[0]["nbytes"] == input_path.stat().st_size
+    assert records[0]["wall_time"] >= 0 and records[0]["cpu_time"] >= 0
+    assert "rss_growth_mb" in records[0] and "process_peak_rss_mb" in records[0]
+    # A failed stage is logged with its error
+    try:
+        InputDataEntity.create(tmp_path / "missing.csv")
+    except AssertionError:
+        pass
+    assert instrumentation.read_records(log_path)[-1]["error"] == "AssertionError"
+    # Nothing is logged when the instrumentation is turned off
+    monkeypatch.setenv(instrumentation.ENV_VAR, "off")
+    InputDataEntity.create(input_path)
+    assert len(instrumentation.read_records(log_path)) == 2
+    # The log is rotated once it is too large
+    monkeypatch.delenv(instrumentation.ENV_VAR)
+    monkeypatch.setattr(instrumentation, "STAGELOG_MAX_SIZE", 1)
+    InputDataEntity.create(input_path)
+    assert len(instrumentation.read_records(log_path)) == 1
+    assert len(instrumentation.read_records(Path(str(log_path) + ".1"))) == 2
+
+
+def test_profiled(tmp_path: Path) -> None:
+    """Test if the cProfile and tracemalloc reports of profiled code are saved and listed"""
+    with instrumentation.profiled("onclick_submit", tmp_path):
+        rows = [[str(index)] * 10 for index in range(1000)]
+    assert len(rows) == 1000
+    report_paths = instrumentation.list_profiling_reports(tmp_path)
+    assert sorted(path.name.split("_", 2)[-1] for path in report_paths) == [
+        "onclick_submit.allocations.txt",
+        "onclick_submit.prof",
+    ]
+    allocations_report_path = [path for path in report_paths if path.name.endswith(".txt")][0]
+    with open(str(allocations_report_path)) as reportfile:
+        assert "test_instrumentation.py" in reportfile.read()
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from scripts.domain import PARQUET_IS_SUPPORTED, MergedDataCube, OutputDataEntity
+
+
+ROWS = [
+    "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2020,183.6566783",
+    "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2030,170.3285805",
+    "AIM,SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,1000 t fm,2030,151.8507839",
+]
+OTHER_MODEL_ROWS = [
+    "GCAM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2020,180.1",
+]
+
+
+def _create_submission_file(dir_path: Path, file_name: str, rows: list) -> Path:
+    """Create a processed submission file in the given directory"""
+    file_path = dir_path / file_name
+    with open(str(file_path), "w") as file:
+        for row in rows:
+            file.write(row + "\n")
+    return file_path
+
+
+def _read_rows(file_paths: list) -> list:
+    rows = []
+    for file_path in file_paths:
+        with open(str(file_path), "r") as file:
+            rows += [line.strip("\n") for line in file.readlines()]
+    return rows
+
+
+def test_merge_deduplicates_records_into_partitions(tmp_path: Path) -> None:
+    """Test if duplicate records across and within submission files are merged once, into per-scenario partitions"""
+    _create_submission_file(tmp_path, "a.csv", [ROWS[0], ROWS[1], ROWS[0]])
+    _create_submission_file(tmp_path, "b.csv", [ROWS[1], ROWS[2]] + OTHER_MODEL_ROWS)
+    cube = MergedDataCube.create(tmp_path)
+    assert cube.nrows == len(ROWS) + len(OTHER_MODEL_ROWS)
+    assert sorted(cube.partitions.keys()) == ["AIM", "GCAM"]
+    assert _read_rows(cube.get_partition_paths(["AIM"], ["SSP2_NoMt_NoCC_FlexA_DEV"])) == ROWS[:2]
+    assert _read_rows(cube.get_partition_paths(["GCAM"])) == OTHER_MODEL_ROWS
+    merged_data = cube.read_partitions(["AIM"])
+    assert len(merged_data) == len(ROWS)
+    assert merged_data[OutputDataEntity.YEAR_COLNAME].dtype == "int64"
+
+
+def test_merge_rebuilds_only_affected_models(tmp_path: Path) -> None:
+    """Test if a new or removed submission only rebuilds the partitions of its models"""
+    _create_submission_file(tmp_path, "a.csv", ROWS[:2])
+    _create_submission_file(tmp_path, "b.csv", OTHER_MODEL_ROWS)
+    cube = MergedDataCube.create(tmp_path)
+    other_model_partition_paths = cube.get_partition_paths(["GCAM"])
+    new_row = "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2050,158.6103519"
+    _create_submission_file(tmp_path, "c.csv", [ROWS[1], new_row])
+    cube = MergedDataCube.create(tmp_path)  # Loaded from the manifest
+    assert cube.merge_new_submissions() == ["AIM"]
+    assert cube.merge_new_submissions() == []
+    assert cube.get_partition_paths(["GCAM"]) == other_model_partition_paths
+    assert _read_rows(cube.get_partition_paths(["AIM"])) == ROWS[:2] + [new_row]
+    assert cube.partitions["AIM"]["version"] == 2
+    assert not (tmp_path / "merged" / "AIM" / "v1").exists()
+    # Partitions of models without any submission files are removed
+    (tmp_path / "b.csv").unlink()
+    assert cube.merge_new_submissions() == ["GCAM"]
+    assert list(cube.partitions.keys()) == ["AIM"]
+    assert not (tmp_path / "merged" / "GCAM").exists()
+    merged_file_path = tmp_path / "export.csv"
+    cube.write_merged_file(merged_file_path)
+    assert _read_rows([merged_file_path]) == ROWS[:2] + [new_row]
+
+
+def test_merge_rewrites_only_affected_scenarios(tmp_path: Path) -> None:
+    """Test if a new submission only rewrites the partitions of its scenarios, and keeps the others in place"""
+    _create_submission_file(tmp_path, "a.csv", ROWS)
+    cube = MergedDataCube.create(tmp_path)
+    unaffected_partition_paths = cube.get_partition_paths(["AIM"], ["SSP2_NoMt_NoCC_FlexA_WLD_2500"])
+    new_row = "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2050,158.6103519"
+    _create_submission_file(tmp_path, "b.csv", [ROWS[0], new_row])
+    assert cube.merge_new_submissions() == ["AIM"]
+    assert cube.get_partition_paths(["AIM"], ["SSP2_NoMt_NoCC_FlexA_WLD_2500"]) == unaffected_partition_paths
+    assert all(path.is_file() for path in cube.get_partition_paths())
+    assert _read_rows(cube.get_partition_paths(["AIM"], ["SSP2_NoMt_NoCC_FlexA_DEV"])) == ROWS[:2] + [new_row]
+    assert cube.nrows == len(ROWS) + 1
+    # Modifying a submission rebuilds the model's partitions from all of its files
+    _create_submission_file(tmp_path, "a.csv", ROWS[:1])
+    assert cube.merge_new_submissions() == ["AIM"]
+    assert _read_rows(cube.get_partition_paths(["AIM"])) == [ROWS[0], new_row]
+    assert sorted(path.name for path in (tmp_path / "merged" / "AIM").iterdir()) == ["v3"]
+
+
+def test_merge_w_stale_cube(tmp_path: Path) -> None:
+    """Test if merging with a cube that was loaded before another submitter merged keeps both submissions"""
+    _create_submission_file(tmp_path, "a.csv", ROWS[:1])
+    cube = MergedDataCube.create(tmp_path)
+    stale_cube = MergedDataCube.create(tmp_path)
+    _create_submission_file(tmp_path, "b.csv", ROWS[1:2])
+    assert cube.merge_new_submissions() == ["AIM"]
+    _create_submission_file(tmp_path, "c.csv", ROWS[2:])
+    assert stale_cube.merge_new_submissions() == ["AIM"]
+    assert sorted(stale_cube.merged_files.keys()) == ["a.csv", "b.csv", "c.csv"]
+    assert sorted(_read_rows(MergedDataCube.create(tmp_path).get_partition_paths())) == sorted(ROWS)
+    assert not any(path.name.endswith(".tmp") for path in (tmp_path / "merged" / "AIM").iterdir())
+
+
+@pytest.mark.skipif(not PARQUET_IS_SUPPORTED, reason="pyarrow is not installed")
+def test_merge_w_parquet_copies(tmp_path: Path) -> None:
+    """Test if the models of submissions are read from their up-to-date Parquet copies"""
+    file_path = _create_submission_file(tmp_path, "a.csv", ROWS + OTHER_MODEL_ROWS)
+    processed_data = OutputDataEntity.read_processed_file(file_path)
+    processed_data.to_parquet(file_path.with_suffix(".parquet"), index=False)
+    cube = MergedDataCube.create(tmp_path)
+    assert cube.merged_files["a.csv"]["models"] == ["AIM", "GCAM"]
+    assert cube.nrows == len(ROWS) + len(OTHER_MODEL_ROWS)
+    # A Parquet copy that is older than its CSV file is not used
+    processed_data[processed_data[OutputDataEntity.MODEL_COLNAME] == "AIM"].to_parquet(
+        file_path.with_suffix(".parquet"), index=False
+    )
+    os.utime(str(file_path.with_suffix(".parquet")), (0, 0))
+    assert cube._scan_models(file_path) == ["AIM", "GCAM"]
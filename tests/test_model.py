@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from scripts.domain import InputDataEntity
+from scripts.model import Model
+from scripts.utils import Delimiter
+
+
+def test_data_preview_content_memo(tmp_path: Path) -> None:
+    """Test if the data preview contents are memoized, and rebuilt when the input data entity fields they use change"""
+    file_path = tmp_path / "input.csv"
+    with open(str(file_path), "w") as file:
+        file.write("Scenario;Region;Variable;Item;Year;Unit;Value\n")
+        file.write("SSP2_NoMt_NoCC_FlexA_DEV;CAN;CONS;RIC;2020;1000 t dm;183.6566783\n" * 5)
+    model = Model()
+    model.input_data_entity = InputDataEntity.create(file_path)
+    model.input_data_entity.guess_input_format(Delimiter.get_models())
+    input_content = model.input_data_preview_content
+    output_content = model.output_data_preview_content
+    assert model.input_data_preview_content is input_content
+    assert model.output_data_preview_content is output_content
+    assert input_content[0][0] == "a)  Scenario"
+    # Changes to a column assignment only rebuild the output data preview content
+    model.assigned_region_column = "b)  Region"
+    assert model.input_data_preview_content is input_content
+    assert model.output_data_preview_content is not output_content
+    assert list(model.output_data_preview_content[:, 2]) == ["Region", "CAN", "CAN"]
+    # Changes to the delimiter or the header inclusion rebuild both contents
+    model.input_data_entity.header_is_included = False
+    assert model.input_data_preview_content[0][0] == "Column 1"
+    model.input_data_entity.delimiter = ","
+    assert model.input_data_preview_content.shape[1] == 1
+    # Replacing the input data entity rebuilds both contents too
+    model.input_data_entity = InputDataEntity()
+    assert model.input_data_preview_content.shape == (3, 1)
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from scripts.domain import InputDataDiagnosis, OutputDataEntity
+from .test_input_data_diagnosis import InputEntityFactory
+
+
+def test_incremental_unknown_label_actions(tmp_path: Path) -> None:
+    """Test if changes to the actions for unknown labels are applied correctly on an existing output entity"""
+    ROWS = [
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,151",  # valid value
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,99999999999999999999",  # invalid value
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT,VFN|VEG,2030,million,152",
+    ]
+    input_entity = InputEntityFactory.create_from_sample_rows(ROWS)
+    diagnosis = InputDataDiagnosis.create(input_entity, tmp_path)
+    assert len(diagnosis.unknown_labels) == 1
+    # Records with unknown labels are dropped when no action is selected
+    output_entity = OutputDataEntity.create(input_entity, diagnosis, tmp_path)
+    assert output_entity.is_derived_from(diagnosis)
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == False
+    assert output_entity.processed_data.shape[0] == 1
+    # Fixing the unknown variable reveals a record with an out-of-bound value
+    diagnosis.unknown_labels[0].fix = "POPT"
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == True
+    assert output_entity.processed_data.shape[0] == 2
+    assert output_entity.unique_variables == ["POPT"]
+    # Overriding the unknown variable keeps every record, since overridden labels are not range-checked
+    diagnosis.unknown_labels[0].fix = ""
+    diagnosis.unknown_labels[0].override = True
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == False
+    assert output_entity.processed_data.shape[0] == len(ROWS)
+    with open(output_entity.file_path, "r") as outputfile:
+        assert len(outputfile.readlines()) == len(ROWS)
+    # Records with fixed unknown units are range-checked too, and so are records with both labels fixed
+    ROWS = [
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,151",  # valid value
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT_XYZW,VFN|VEG,2030,million,99999999999999999999",  # invalid value
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,POPT,VFN|VEG,2030,million_XYZW,99999999999999999999",  # invalid value
+    ]
+    input_entity = InputEntityFactory.create_from_sample_rows(ROWS)
+    diagnosis = InputDataDiagnosis.create(input_entity, tmp_path)
+    assert len(diagnosis.unknown_labels) == 2
+    unit_label_info = [
+        label_info for label_info in diagnosis.unknown_labels if label_info.associated_column == diagnosis.UNIT_COLNAME
+    ][0]
+    # Overriding the unknown unit accepts its record, since overridden labels are not range-checked
+    for label_info in diagnosis.unknown_labels:
+        label_info.override = True
+    output_entity = OutputDataEntity.create(input_entity, diagnosis, tmp_path)
+    assert output_entity.processed_data.shape[0] == len(ROWS)
+    # Fixing the unknown unit rejects its record, whose value is out of bound for the fixed unit
+    unit_label_info.override = False
+    unit_label_info.fix = "million"
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == True
+    assert output_entity.processed_data.shape[0] == len(ROWS) - 1
+    assert "million_XYZW" not in output_entity.processed_data[OutputDataEntity.UNIT_COLNAME].tolist()
+    # Fixing the unknown variable too leaves only the record with a valid value
+    for label_info in diagnosis.unknown_labels:
+        if label_info.associated_column == diagnosis.VARIABLE_COLNAME:
+            label_info.override = False
+            label_info.fix = "POPT"
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == True
+    assert output_entity.processed_data[OutputDataEntity.VALUE_COLNAME].tolist() == ["151"]
+    with open(output_entity.file_path, "r") as outputfile:
+        lines = outputfile.readlines()
+        assert len(lines) == 1  # the output file should contain only 1 valid row
+        assert lines[0].strip("\n").split(",")[-1] == "151"
+    # Overriding the unknown unit again accepts its record again
+    unit_label_info.fix = ""
+    unit_label_info.override = True
+    assert output_entity.update_unknown_label_actions(diagnosis.unknown_labels) == False
+    assert output_entity.processed_data.shape[0] == 2
+
+
+def test_read_processed_file(tmp_path: Path) -> None:
+    """Test if processed files in CSV and Parquet format are read back with typed columns"""
+    ROWS = [
+        "SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,2020,1000 t dm,183.6566783",
+        "SSP2_NoMt_NoCC_FlexA_WLD_2500,MEN,OTHU,VFN|VEG,2030,1000 t fm,NA",
+    ]
+    input_entity = InputEntityFactory.create_from_sample_rows(ROWS)
+    diagnosis = InputDataDiagnosis.create(input_entity, tmp_path)
+    output_entity = OutputDataEntity.create(input_entity, diagnosis, tmp_path)
+    file_paths = [output_entity.file_path]
+    parquet_file_path = output_entity.save_parquet_file()
+    if parquet_file_path is not None:
+        file_paths.append(parquet_file_path)
+    for file_path in file_paths:
+        processed_data = OutputDataEntity.read_processed_file(file_path)
+        assert processed_data.shape == (len(ROWS), 8)
+        assert processed_data[OutputDataEntity.REGION_COLNAME].dtype == "category"
+        assert processed_data[OutputDataEntity.YEAR_COLNAME].tolist() == [2020, 2030]
+        assert processed_data[OutputDataEntity.VALUE_COLNAME].tolist() == [183.6566783, 0]
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from scripts.domain import InputDataEntity, SubmissionProfileRepository
+from scripts.utils import Delimiter
+
+
+def _create_input_entity(file_path: Path, lines: list) -> InputDataEntity:
+    with open(str(file_path), "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return InputDataEntity.create(file_path)
+
+
+def test_find_profile(tmp_path: Path) -> None:
+    """Test if a saved profile is matched to a new file by its header row, and applied without guessing"""
+    header_lines = ["Exported by the IMPACT team", "Region|Scenario|Variable|Item|Unit|Year|Value"]
+    input_entity = _create_input_entity(
+        tmp_path / "submitted.csv", header_lines + ["CAN|SSP2_NoMt_NoCC_FlexA_DEV|CONS|RIC|1000 t dm|2020|183.65"]
+    )
+    input_entity.guess_input_format(Delimiter.get_models())
+    input_entity.guess_model_name_n_column_assignments()
+    input_entity.model_name = "IMPACT"
+    input_entity.scenarios_to_ignore = ["SSP2_NoMt_NoCC_FlexA_WLD_2500"]
+    profile_file_path = tmp_path / "profiles" / "profiles.json"
+    SubmissionProfileRepository(profile_file_path).save_profile(input_entity)
+    # The profile is found from the saved file by the header row of a new upload
+    repository = SubmissionProfileRepository(profile_file_path)
+    new_input_entity = _create_input_entity(
+        tmp_path / "new.csv", header_lines + ["MEN|SSP2_NoMt_NoCC_FlexA_DEV|OTHU|VFN|million|2030|151.85"]
+    )
+    spec = repository.find_profile(new_input_entity)
+    assert spec is not None
+    new_input_entity.apply_spec(spec)
+    assert new_input_entity.get_spec() == input_entity.get_spec()
+    assert new_input_entity.region_colnum == 1
+    assert new_input_entity.scenario_colnum == 2
+    # A header row preceded by a different number of lines, or a different header row, does not match
+    other_input_entity = _create_input_entity(tmp_path / "other.csv", header_lines[1:] + ["CAN|SSP2|CONS|RIC|t|2020|1"])
+    assert repository.find_profile(other_input_entity) is None
+    other_input_entity = _create_input_entity(tmp_path / "other.csv", ["Exported by the IMPACT team", "A|B|C|D|E|F|G"])
+    assert repository.find_profile(other_input_entity) is None
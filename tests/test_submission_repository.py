@@ -0,0 +1,84 @@
+from datetime import datetime
+from pathlib import Path
+
+from scripts.domain import SubmissionRepository, SubmittedFileInfo
+
+
+def _create_file(file_path: Path, content: str = "AIM,SSP2_NoMt_NoCC_FlexA_DEV,CAN,CONS,RIC,1000 t dm,2020,183.65\n") -> None:
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(file_path), "w") as file:
+        file.write(content)
+
+
+def test_query_submitted_files_info(tmp_path: Path) -> None:
+    """Test if the files in the project directories are listed, with the metadata of recorded submissions"""
+    submissiondir_path = tmp_path / "agmipglobaleconagclim50iv" / ".submissions"
+    _create_file(submissiondir_path / "AIM_10192026_072630.csv")
+    _create_file(submissiondir_path / "AIM_10192026_072630.parquet")
+    _create_file(submissiondir_path / ".pending" / "GCAM_10192026_072905.csv")
+    _create_file(submissiondir_path / ".pending" / "GCAM_10192026_072905_OverrideInfo.csv")
+    (tmp_path / "notaproject").mkdir()
+    repository = SubmissionRepository(tmp_path)
+    files_info = repository.query_submitted_files_info()
+    assert [(info.file_name, info.status) for info in files_info] == [
+        ("AIM_10192026_072630.csv", SubmittedFileInfo.ACCEPTED),
+        ("GCAM_10192026_072905.csv", SubmittedFileInfo.PENDING),
+    ]
+    assert files_info[0].project_dirname == "agmipglobaleconagclim50iv"
+    assert files_info[0].size == (submissiondir_path / "AIM_10192026_072630.csv").stat().st_size
+    # A recorded submission is listed with its metadata
+    _create_file(submissiondir_path / "AIM_10192026_073022.csv")
+    file_info = SubmittedFileInfo(
+        "AIM_10192026_073022.csv", "agmipglobaleconagclim50iv", SubmittedFileInfo.ACCEPTED, 64, datetime(2026, 10, 19)
+    )
+    file_info.model_name = "AIM"
+    file_info.nrows_accepted = 1
+    repository.record_submission(file_info)
+    files_info = repository.query_submitted_files_info()
+    assert len(files_info) == 3
+    assert files_info[1].file_name == "AIM_10192026_073022.csv"
+    assert files_info[1].model_name == "AIM"
+    assert files_info[1].nrows_accepted == 1
+    assert files_info[1].modified_time == datetime(2026, 10, 19)
+    assert SubmissionRepository(tmp_path / "missing").query_submitted_files_info() == []
+
+
+def test_record_submission_without_index(tmp_path: Path) -> None:
+    """Test if recording a submission in a project without an index lists the submitted file once"""
+    submissiondir_path = tmp_path / "agmipglobaleconagclim50iv" / ".submissions"
+    _create_file(submissiondir_path / "AIM_10192026_072630.csv")
+    file_info = SubmittedFileInfo(
+        "AIM_10192026_072630.csv", "agmipglobaleconagclim50iv", SubmittedFileInfo.ACCEPTED, 64, datetime(2026, 10, 19)
+    )
+    file_info.submitter = "raziq"
+    repository = SubmissionRepository(tmp_path)
+    repository.record_submission(file_info)
+    files_info = repository.query_submitted_files_info()
+    assert len(files_info) == 1
+    assert files_info[0].submitter == "raziq"
+
+
+def test_files_moved_outside_the_app(tmp_path: Path) -> None:
+    """Test if files that are approved or removed outside of the application are listed by their current state"""
+    submissiondir_path = tmp_path / "agmipglobaleconagclim50iv" / ".submissions"
+    _create_file(submissiondir_path / ".pending" / "GCAM_10192026_072905.csv")
+    _create_file(submissiondir_path / "AIM_10192026_072630.csv")
+    file_info = SubmittedFileInfo(
+        "GCAM_10192026_072905.csv", "agmipglobaleconagclim50iv", SubmittedFileInfo.PENDING, 64, datetime(2026, 10, 19)
+    )
+    file_info.submitter = "raziq"
+    repository = SubmissionRepository(tmp_path)
+    repository.record_submission(file_info)
+    files_info = repository.query_submitted_files_info()
+    assert [(info.file_name, info.status) for info in files_info] == [
+        ("AIM_10192026_072630.csv", SubmittedFileInfo.ACCEPTED),
+        ("GCAM_10192026_072905.csv", SubmittedFileInfo.PENDING),
+    ]
+    # An admin approves the pending file by moving it, and removes the other file
+    (submissiondir_path / ".pending" / "GCAM_10192026_072905.csv").rename(submissiondir_path / "GCAM_10192026_072905.csv")
+    (submissiondir_path / "AIM_10192026_072630.csv").unlink()
+    files_info = repository.query_submitted_files_info()
+    assert [(info.file_name, info.status) for info in files_info] == [
+        ("GCAM_10192026_072905.csv", SubmittedFileInfo.ACCEPTED)
+    ]
+    assert files_info[0].submitter == "raziq"
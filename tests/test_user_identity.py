@@ -0,0 +1,50 @@
+import getpass
+import json
+import os
+from pathlib import Path
+import sys
+import types
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from scripts import model
+from scripts.utils import JSAppModel
+
+
+def test_user_identity() -> None:
+    """Test if the identity of the current user is looked up natively, cached, and can be set"""
+    try:
+        model.set_user_identity(None)
+        username, groupnames = model.get_user_identity()
+        assert username == getpass.getuser()
+        assert model.get_user_identity() is model.get_user_identity()
+        model.set_user_identity("raziq", ["raziq", "pr-agmipglobaleconfoo", "pr-agmipglobaleconbar"])
+        assert model.get_username() == "raziq"
+        assert model.check_administrator_privilege()
+        assert model.get_user_globalecon_project_dirnames() == ["agmipglobaleconfoo", "agmipglobaleconbar"]
+        model.set_user_identity("someone", ["someone"])
+        assert not model.check_administrator_privilege()
+        assert model.get_user_globalecon_project_dirnames() == ["agmipglobaleconagclim50iv"]
+    finally:
+        model.set_user_identity(None)
+
+
+def test_notebook_auth_token(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test if the auth token of the notebook server is taken from the environment or the server info files"""
+    assert JSAppModel("given").nbserver_auth_token == "given"
+    monkeypatch.setenv("JUPYTER_TOKEN", "fromenv")
+    assert JSAppModel().nbserver_auth_token == "fromenv"
+    monkeypatch.delenv("JUPYTER_TOKEN")
+    # Fake the runtime directory of jupyter_core
+    jupyter_core = types.ModuleType("jupyter_core")
+    jupyter_core_paths = types.ModuleType("jupyter_core.paths")
+    jupyter_core_paths.jupyter_runtime_dir = lambda: str(tmp_path)  # type: ignore
+    monkeypatch.setitem(sys.modules, "jupyter_core", jupyter_core)
+    monkeypatch.setitem(sys.modules, "jupyter_core.paths", jupyter_core_paths)
+    assert JSAppModel().nbserver_auth_token == ""
+    with open(str(tmp_path / "nbserver-1.json"), "w") as info_file:
+        json.dump({"pid": os.getppid(), "token": "ours"}, info_file)
+    with open(str(tmp_path / "jpserver-2.json"), "w") as info_file:
+        json.dump({"pid": -1, "token": "another"}, info_file)
+    assert JSAppModel().nbserver_auth_token == "ours"
+    assert "'nbserver_auth_token': 'ours'" in JSAppModel().serialize()